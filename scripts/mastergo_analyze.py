@@ -16,33 +16,73 @@ Usage:
   python mastergo_analyze.py URL --format tree    # Tree view (default)
   python mastergo_analyze.py URL --format json    # JSON summary
   python mastergo_analyze.py URL --format flat    # Flat list
+  python mastergo_analyze.py URL --format ndjson  # One JSON node per line
+  
+  # Very large files: stream the DSL into a compact node store
+  python mastergo_analyze.py URL --compact
+  
+  # Repeated runs on a page: map a cached binary snapshot instead of parsing
+  python mastergo_analyze.py URL --snapshot
+  
+  # Overview of a huge page: prune while walking
+  python mastergo_analyze.py URL --max-depth 2 --max-nodes 500
+  python mastergo_analyze.py URL --root-id 1:234 --max-depth 3
+  
+  # Where the time goes: JSON timing spans on stderr
+  python mastergo_analyze.py URL --timings
+  
+  # Hot functions: cProfile data + collapsed stacks for flamegraphs
+  python mastergo_analyze.py URL --profile /tmp/analyze.prof > /dev/null
 
 Zero dependencies, compatible with Python 3.6+
 """
 
+if __name__ == '__main__':
+    # Hand the run to mastergo_daemon when it is running (before the heavier imports below)
+    try:
+        from mastergo_daemon import run_in_daemon
+        run_in_daemon('mastergo_analyze')
+    except ImportError:
+        pass
+
 import json
+import os
 import sys
 import argparse
-from typing import Dict, List, Any, Optional
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, Any, Optional, TextIO
+from urllib.error import URLError
 
 # Import from sibling module
 try:
-    from mastergo_get_dsl import get_dsl_from_url, extract_ids_from_url
+    from mastergo_get_dsl import get_dsl_from_url, extract_ids_from_url, open_dsl_stream
+    from mastergo_cache import add_cache_arguments
+    from mastergo_compact import CompactBuilder, CompactTree, RecordList, compact_from_stream
+    from mastergo_profile import add_profile_arguments, setup_profiling
+    from mastergo_snapshot import load_dsl_from_url
+    from mastergo_stream import DSLStreamParser
+    from mastergo_timing import add_timing_arguments, setup_timings, span
+    from mastergo_utils import (ComponentLinkExtractor, DSLIndex, NavigationExtractor, TextExtractor,
+                                TreeBuilder, find_node, get_doc_links, get_root_nodes, run_extractors)
 except ImportError:
-    import os
     sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-    from mastergo_get_dsl import get_dsl_from_url, extract_ids_from_url
+    from mastergo_get_dsl import get_dsl_from_url, extract_ids_from_url, open_dsl_stream
+    from mastergo_cache import add_cache_arguments
+    from mastergo_compact import CompactBuilder, CompactTree, RecordList, compact_from_stream
+    from mastergo_profile import add_profile_arguments, setup_profiling
+    from mastergo_snapshot import load_dsl_from_url
+    from mastergo_stream import DSLStreamParser
+    from mastergo_timing import add_timing_arguments, setup_timings, span
+    from mastergo_utils import (ComponentLinkExtractor, DSLIndex, NavigationExtractor, TextExtractor,
+                                TreeBuilder, find_node, get_doc_links, get_root_nodes, run_extractors)
 
 
 # =============================================================================
 # DSL Analysis
 # =============================================================================
 
-def analyze_node(node: Dict, depth: int = 0) -> Dict[str, Any]:
-    """Analyze a single DSL node and return summary."""
-    if not node or not isinstance(node, dict):
-        return {}
-    
+def node_summary(node: Dict, depth: int) -> Dict[str, Any]:
+    """Structure summary of a single node (without children)."""
     summary = {
         'id': node.get('id', ''),
         'name': node.get('name', ''),
@@ -88,118 +128,268 @@ def analyze_node(node: Dict, depth: int = 0) -> Dict[str, Any]:
     if token_alias:
         summary['tokens'] = list(token_alias.keys())
     
-    # Children
-    children = node.get('children', [])
-    if children:
-        summary['children'] = [analyze_node(child, depth + 1) for child in children]
-    
     return summary
 
 
-def analyze_dsl(dsl_data: Dict) -> Dict[str, Any]:
-    """Analyze complete DSL and return structured summary."""
+class SummaryExtractor(TreeBuilder):
+    """Per-node summary tree used for the `structure` field."""
+    
+    name = 'structure'
+    
+    def __init__(self, base_depth: int = 0):
+        super().__init__(self._summary)
+        self.base_depth = base_depth
+    
+    def _summary(self, node, depth):
+        return node_summary(node, self.base_depth + depth)
+
+
+def analyze_node(node: Dict, depth: int = 0, max_depth: Optional[int] = None,
+                 max_nodes: Optional[int] = None, dsl_data: Optional[Dict] = None) -> Dict[str, Any]:
+    """
+    Analyze a single DSL node and return summary.
+    
+    max_depth / max_nodes prune the walk below the node (see analyze_dsl).
+    Pass the DSL response (or a DSLIndex) the node comes from so children
+    given as ID strings (nodeMap shape) are resolved.
+    """
+    if not node or not isinstance(node, Mapping):
+        return {}
+    
+    return run_extractors(dsl_data if dsl_data is not None else {}, [SummaryExtractor(depth)], roots=[node],
+                          max_depth=max_depth, max_nodes=max_nodes)['structure'][0]
+
+
+def analyze_dsl(dsl_data: Dict, compact: bool = False, max_depth: Optional[int] = None,
+                max_nodes: Optional[int] = None, root_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze complete DSL and return structured summary (single traversal).
+    
+    Accepts a DSL response or a DSLIndex built from one. With compact=True
+    the structure is kept in a CompactTree (see analyze_compact).
+    
+    Pruning happens during the traversal, so the work follows what is kept:
+    
+    - root_id: analyze the subtree of this node only (depths count from it)
+    - max_depth: keep nodes down to this depth, 0 being the top-level nodes
+    - max_nodes: keep the first nodes in document order
+    
+    Summaries whose children were cut get 'elided' (number of direct
+    children left out); texts, navigations and stats cover the kept nodes.
+    The result then has a 'pruned' entry with the limits and 'elidedRoots'.
+    """
+    pruned = max_depth is not None or max_nodes is not None or root_id is not None
+    if compact and pruned:
+        raise ValueError("Pruning is not available for compact analysis")
+    
     # Handle wrapped response (from get_dsl script)
     dsl = dsl_data.get('dsl', dsl_data)
     
-    result = {
+    # Process root or nodes array
+    root = dsl.get('root')
+    roots = [root] if root else dsl.get('nodes', [])
+    if isinstance(dsl_data, DSLIndex):
+        roots = [dsl_data.node(r) if isinstance(r, str) else r for r in roots]
+        source = dsl_data
+    else:
+        roots = get_root_nodes({'nodes': roots, 'nodeMap': dsl.get('nodeMap')})
+        source = dsl
+    if root_id is not None:
+        focus = find_node(dsl_data if isinstance(dsl_data, DSLIndex) else dsl, root_id)
+        if focus is None:
+            raise ValueError(f"Node not found: {root_id}")
+        roots = [focus]
+    
+    if compact:
+        tree = run_extractors(source, [CompactBuilder(new_compact_tree(), _compact_record)],
+                              roots=[r for r in roots if r])['compact']
+        return analyze_compact(tree, dsl)
+    
+    summary = SummaryExtractor()
+    extracted = run_extractors(source, [
+        TextExtractor(),
+        ComponentLinkExtractor(),
+        NavigationExtractor(require_target=False),
+        summary,
+    ], roots=[r for r in roots if r], max_depth=max_depth, max_nodes=max_nodes)
+    
+    analysis = {
         'version': dsl.get('version', 'unknown'),
         'framework': dsl.get('framework', 'unknown'),
         'stats': {
-            'totalNodes': 0,
-            'textNodes': 0,
-            'componentInstances': 0,
-            'navigations': 0,
+            'totalNodes': summary.count,
+            'textNodes': len(extracted['texts']),
+            'componentInstances': len(extracted['components']),
+            'navigations': len(extracted['navigations']),
         },
-        'componentDocs': [],
-        'texts': [],
-        'navigations': [],
-        'structure': [],
+        'componentDocs': extracted['components'],
+        'texts': extracted['texts'],
+        'navigations': extracted['navigations'],
+        'structure': extracted['structure'],
     }
+    if pruned:
+        analysis['pruned'] = {
+            'rootId': root_id,
+            'maxDepth': max_depth,
+            'maxNodes': max_nodes,
+            'elidedRoots': summary.elided,
+        }
+    return analysis
+
+
+# =============================================================================
+# Compact Analysis
+# =============================================================================
+
+SUMMARY_FIELDS = ('id', 'name', 'type', 'depth', 'size', 'text', 'componentDoc', 'navigateTo', 'tag', 'tokens')
+
+def new_compact_tree() -> CompactTree:
+    """Empty CompactTree for structure summaries, see SummaryExtractor."""
+    return CompactTree(SUMMARY_FIELDS, unique=('id',),
+                       sparse=('text', 'textContent', 'navigationTargets', 'missing'),
+                       hidden=('textContent', 'navigationTargets', 'docLinks', 'missing'))
+
+
+def _compact_record(node: Dict, depth: int) -> Dict[str, Any]:
+    """Summary of a node plus what the texts/navigations/componentDocs lists need."""
+    record = node_summary(node, depth)
+    if node.get('type') == 'TEXT' and node.get('characters'):
+        record['textContent'] = node['characters']
+    if 'interactive' in node:
+        targets = [action.get('targetLayerId') for action in node['interactive']
+                   if action.get('type') == 'navigation']
+        if targets:
+            record['navigationTargets'] = targets
+    if 'componentInfo' in node:
+        links = get_doc_links(node)
+        if links:
+            record['docLinks'] = links
+    if 'id' not in node or 'name' not in node:
+        record['missing'] = ('id' not in node, 'name' not in node)
+    return record
+
+
+def analyze_compact(tree: CompactTree, dsl: Dict) -> Dict[str, Any]:
+    """
+    Analysis of a CompactTree filled with _compact_record summaries.
     
-    # Collect data
-    all_nodes = []
+    Same keys as analyze_dsl; `structure` is the tree itself and `texts` is
+    built lazily. Use analysis_to_json() before serializing.
+    """
+    def source(index):
+        # Raw id/name, None when the node had none (the summary defaults them to '')
+        missing = tree.get(index, 'missing') or (False, False)
+        return (None if missing[0] else tree.get(index, 'id'),
+                None if missing[1] else tree.get(index, 'name'))
     
-    def traverse(node: Dict, depth: int = 0):
-        if not node:
-            return
-        
-        result['stats']['totalNodes'] += 1
-        
-        # Collect text
-        if node.get('type') == 'TEXT' and node.get('characters'):
-            result['texts'].append({
-                'id': node.get('id'),
-                'name': node.get('name'),
-                'text': node.get('characters'),
-            })
-            result['stats']['textNodes'] += 1
-        
-        # Collect component docs
-        comp_info = node.get('componentInfo', {})
-        doc_links = comp_info.get('componentSetDocumentLink', [])
-        for link in doc_links:
-            if link and link not in result['componentDocs']:
-                result['componentDocs'].append(link)
-                result['stats']['componentInstances'] += 1
-        
-        # Collect navigations
-        for action in node.get('interactive', []):
-            if action.get('type') == 'navigation':
-                result['navigations'].append({
-                    'sourceId': node.get('id'),
-                    'sourceName': node.get('name'),
-                    'targetLayerId': action.get('targetLayerId'),
-                })
-                result['stats']['navigations'] += 1
-        
-        # Recurse
-        for child in node.get('children', []):
-            traverse(child, depth + 1)
+    def text_entry(index):
+        node_id, name = source(index)
+        return {'id': node_id, 'name': name, 'text': tree.get(index, 'textContent')}
     
-    # Process root or nodes array
-    root = dsl.get('root')
-    nodes = dsl.get('nodes', [])
+    navigations = []
+    for index in tree.indexes('navigationTargets'):
+        node_id, name = source(index)
+        for target in tree.get(index, 'navigationTargets'):
+            navigations.append({'sourceId': node_id, 'sourceName': name, 'targetLayerId': target})
     
-    if root:
-        traverse(root)
-        result['structure'] = [analyze_node(root)]
-    elif nodes:
-        for node in nodes:
-            traverse(node)
-        result['structure'] = [analyze_node(n) for n in nodes]
+    docs = {}
+    for index in tree.indexes('docLinks'):
+        for link in tree.get(index, 'docLinks'):
+            docs[link] = None
     
-    return result
+    texts = RecordList(tree.indexes('textContent'), text_entry)
+    return {
+        'version': dsl.get('version', 'unknown'),
+        'framework': dsl.get('framework', 'unknown'),
+        'stats': {
+            'totalNodes': len(tree),
+            'textNodes': len(texts),
+            'componentInstances': len(docs),
+            'navigations': len(navigations),
+        },
+        'componentDocs': list(docs),
+        'texts': texts,
+        'navigations': navigations,
+        'structure': tree,
+    }
+
+
+def analyze_stream(fp) -> Dict[str, Any]:
+    """
+    Analyze a DSL read incrementally from a binary file object.
+    
+    The document is never held in memory as a whole: nodes are summarized
+    into a CompactTree as they are parsed.
+    """
+    parser = DSLStreamParser(fp)
+    tree = compact_from_stream(parser, new_compact_tree(), _compact_record)
+    document = parser.document if isinstance(parser.document, dict) else {}
+    dsl = document.get('dsl', document)
+    return analyze_compact(tree, dsl if isinstance(dsl, dict) else {})
+
+
+def analysis_to_json(analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Plain JSON-serializable copy of an analysis (expands compact structures)."""
+    if not isinstance(analysis.get('structure'), CompactTree):
+        return analysis
+    return dict(analysis, texts=list(analysis['texts']), structure=analysis['structure'].to_list())
 
 
 # =============================================================================
 # Output Formatters
 # =============================================================================
 
-def format_tree(analysis: Dict, indent: str = '') -> str:
-    """Format analysis as tree view."""
-    lines = []
-    
+def _structure_walker(structure):
+    """(roots, children, record) accessors for nested summaries or a CompactTree."""
+    if isinstance(structure, CompactTree):
+        return list(structure.roots()), lambda i: list(structure.children(i)), structure.record
+    return structure, lambda node: node.get('children', []), lambda node: node
+
+
+def iter_tree(analysis: Dict) -> Iterator[str]:
+    """Lines of the tree view, produced as the structure is walked."""
     # Header
-    lines.append(f"DSL Analysis (v{analysis['version']}, {analysis['framework']})")
-    lines.append(f"Stats: {analysis['stats']['totalNodes']} nodes, "
-                 f"{analysis['stats']['textNodes']} texts, "
-                 f"{analysis['stats']['componentInstances']} components, "
-                 f"{analysis['stats']['navigations']} navigations")
-    lines.append('')
+    yield f"DSL Analysis (v{analysis['version']}, {analysis['framework']})"
+    yield (f"Stats: {analysis['stats']['totalNodes']} nodes, "
+           f"{analysis['stats']['textNodes']} texts, "
+           f"{analysis['stats']['componentInstances']} components, "
+           f"{analysis['stats']['navigations']} navigations")
+    pruned = analysis.get('pruned')
+    if pruned:
+        limits = [f"{label} {pruned[key]}" for key, label in
+                  (('rootId', 'root'), ('maxDepth', 'max depth'), ('maxNodes', 'max nodes'))
+                  if pruned[key] is not None]
+        yield f"Pruned: {', '.join(limits)} (stats cover the nodes shown)"
+    yield ''
     
     # Component docs
     if analysis['componentDocs']:
-        lines.append('Component Docs:')
+        yield 'Component Docs:'
         for doc in analysis['componentDocs']:
-            lines.append(f"  - {doc}")
-        lines.append('')
+            yield f"  - {doc}"
+        yield ''
     
     # Structure tree
-    lines.append('Structure:')
+    yield 'Structure:'
     
-    def print_node(node: Dict, prefix: str = '', is_last: bool = True):
+    # Explicit stack of (node, prefix, is_last, elided), deep trees do not recurse.
+    # Entries with an elided count stand for the "N children elided" line.
+    structure, children_of, record_of = _structure_walker(analysis.get('structure', []))
+    elided_roots = (analysis.get('pruned') or {}).get('elidedRoots', 0)
+    stack = [(node, '', i == len(structure) - 1 and not elided_roots, None)
+             for i, node in enumerate(structure)]
+    if elided_roots:
+        stack.append((None, '', True, elided_roots))
+    stack.reverse()
+    while stack:
+        handle, prefix, is_last, elided = stack.pop()
+        if elided is not None:
+            what = ('child' if elided == 1 else 'children') if prefix else 'top-level nodes'
+            yield f"{prefix}└── … {elided} {what} elided"
+            continue
+        node = record_of(handle)
         if not node:
-            return
+            continue
         
         connector = '└── ' if is_last else '├── '
         node_type = node.get('type', '?')
@@ -217,43 +407,48 @@ def format_tree(analysis: Dict, indent: str = '') -> str:
         if node.get('navigateTo'):
             line += f" → {node['navigateTo']}"
         
-        lines.append(line)
+        yield line
         
-        children = node.get('children', [])
+        children = children_of(handle)
         child_prefix = prefix + ('    ' if is_last else '│   ')
-        for i, child in enumerate(children):
-            print_node(child, child_prefix, i == len(children) - 1)
-    
-    for i, node in enumerate(analysis.get('structure', [])):
-        print_node(node, '', i == len(analysis['structure']) - 1)
+        elided = node.get('elided')
+        if elided:
+            stack.append((None, child_prefix, True, elided))
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], child_prefix, i == len(children) - 1 and not elided, None))
     
     # Text contents
     if analysis['texts']:
-        lines.append('')
-        lines.append('Text Contents:')
+        yield ''
+        yield 'Text Contents:'
         for t in analysis['texts'][:20]:  # Limit to 20
             text = t['text'][:80] + ('...' if len(t['text']) > 80 else '')
-            lines.append(f"  [{t['id']}] {t['name']}: \"{text}\"")
+            yield f"  [{t['id']}] {t['name']}: \"{text}\""
         if len(analysis['texts']) > 20:
-            lines.append(f"  ... and {len(analysis['texts']) - 20} more")
+            yield f"  ... and {len(analysis['texts']) - 20} more"
     
     # Navigations
     if analysis['navigations']:
-        lines.append('')
-        lines.append('Navigations:')
+        yield ''
+        yield 'Navigations:'
         for nav in analysis['navigations']:
-            lines.append(f"  {nav['sourceName']} ({nav['sourceId']}) → {nav['targetLayerId']}")
-    
-    return '\n'.join(lines)
+            yield f"  {nav['sourceName']} ({nav['sourceId']}) → {nav['targetLayerId']}"
 
 
-def format_flat(analysis: Dict) -> str:
-    """Format as flat node list."""
-    lines = []
-    
-    def flatten(node: Dict, path: str = ''):
+def iter_flat(analysis: Dict) -> Iterator[str]:
+    """Lines of the flat node list, produced as the structure is walked."""
+    # Explicit stack of (node, parent path), deep trees do not recurse
+    structure, children_of, record_of = _structure_walker(analysis.get('structure', []))
+    stack = [(node, '') for node in reversed(structure)]
+    while stack:
+        handle, path = stack.pop()
+        if handle is None:
+            # Elided children marker, the line is in the path slot
+            yield path
+            continue
+        node = record_of(handle)
         if not node:
-            return
+            continue
         
         name = node.get('name', 'unnamed')
         current_path = f"{path}/{name}" if path else name
@@ -268,15 +463,60 @@ def format_flat(analysis: Dict) -> str:
         if text:
             line += f' | "{text[:50]}"'
         
-        lines.append(line)
+        yield line
         
-        for child in node.get('children', []):
-            flatten(child, current_path)
+        if node.get('elided'):
+            elided = node['elided']
+            stack.append((None, f"{current_path}/… {elided} {'child' if elided == 1 else 'children'} elided"))
+        for child in reversed(children_of(handle)):
+            stack.append((child, current_path))
     
-    for node in analysis.get('structure', []):
-        flatten(node)
+    elided_roots = (analysis.get('pruned') or {}).get('elidedRoots', 0)
+    if elided_roots:
+        yield f"… {elided_roots} top-level nodes elided"
+
+
+def iter_ndjson(analysis: Dict) -> Iterator[str]:
+    """
+    One JSON object per node, in document order.
     
-    return '\n'.join(lines)
+    Objects hold the node summary (without children) plus `parentId`, so
+    the tree can be rebuilt from the stream.
+    """
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    structure, children_of, record_of = _structure_walker(analysis.get('structure', []))
+    stack = [(node, None) for node in reversed(structure)]
+    while stack:
+        handle, parent_id = stack.pop()
+        node = record_of(handle)
+        if not node:
+            continue
+        
+        item = {key: value for key, value in node.items() if key != 'children'}
+        item['parentId'] = parent_id
+        yield encode(item)
+        
+        for child in reversed(children_of(handle)):
+            stack.append((child, node.get('id')))
+
+
+def write_lines(lines: Iterable[str], stream: TextIO = None) -> None:
+    """Write lines to a stream (stdout by default) as they are produced."""
+    stream = stream or sys.stdout
+    write = stream.write
+    for line in lines:
+        write(line)
+        write('\n')
+
+
+def format_tree(analysis: Dict, indent: str = '') -> str:
+    """Format analysis as tree view."""
+    return '\n'.join(iter_tree(analysis))
+
+
+def format_flat(analysis: Dict) -> str:
+    """Format as flat node list."""
+    return '\n'.join(iter_flat(analysis))
 
 
 # =============================================================================
@@ -300,36 +540,99 @@ Examples:
   
   # Flat list output
   python mastergo_analyze.py URL --format flat
+  
+  # One JSON object per node, streamed as the tree is walked
+  python mastergo_analyze.py URL --format ndjson
+  
+  # Very large files: parse incrementally into a compact node store
+  python mastergo_analyze.py URL --compact
+  cat dsl.json | python mastergo_analyze.py --stdin --compact
+  
+  # Keep a binary snapshot of the cached page, mapped instead of parsed next time
+  python mastergo_analyze.py URL --snapshot
+  
+  # Overview only: prune the walk ("N children elided" marks what was cut)
+  python mastergo_analyze.py URL --max-depth 2 --max-nodes 500
+  
+  # One subtree only
+  python mastergo_analyze.py URL --root-id 1:234 --max-depth 3
+  
+  # Phase timings (resolve, connect, tls, wait, download, decode, traverse, format)
+  python mastergo_analyze.py URL --timings
+  
+  # Profile: pstats file, PATH.collapsed for flamegraph tools, top functions on stderr
+  python mastergo_analyze.py URL --profile /tmp/analyze.prof --profile-top 40
 '''
     )
     
     parser.add_argument('url', nargs='?', help='MasterGo URL to analyze')
     parser.add_argument('--stdin', action='store_true', help='Read DSL JSON from stdin')
-    parser.add_argument('--format', '-f', choices=['tree', 'json', 'flat'], 
+    parser.add_argument('--format', '-f', choices=['tree', 'json', 'flat', 'ndjson'],
                         default='tree', help='Output format (default: tree)')
     parser.add_argument('--token', '-t', help='API Token (defaults to MASTERGO_TOKEN)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Stream the DSL into a compact node store (for very large files)')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='Read the page from a cached binary snapshot (made on first use)')
+    parser.add_argument('--max-depth', type=int, metavar='N',
+                        help='Only walk N levels below the top-level nodes')
+    parser.add_argument('--max-nodes', type=int, metavar='N',
+                        help='Stop after N nodes (document order)')
+    parser.add_argument('--root-id', metavar='ID', help='Only analyze the subtree of this node')
+    add_cache_arguments(parser)
+    add_timing_arguments(parser)
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    setup_timings(args)
+    setup_profiling(args)
+    if args.snapshot and (args.stdin or args.compact):
+        parser.error('--snapshot works on a URL, without --stdin or --compact')
+    prune = {'max_depth': args.max_depth, 'max_nodes': args.max_nodes, 'root_id': args.root_id}
+    if any(value is not None for value in prune.values()) and args.compact:
+        parser.error('--max-depth/--max-nodes/--root-id cannot be combined with --compact')
+    if any(value is not None and value < 0 for value in (args.max_depth, args.max_nodes)):
+        parser.error('--max-depth and --max-nodes must not be negative')
     
     try:
-        # Get DSL data
-        if args.stdin:
-            dsl_data = json.load(sys.stdin)
-        elif args.url:
-            dsl_data = get_dsl_from_url(args.url, args.token)
-        else:
+        # Get DSL data and analyze
+        if not args.url and not args.stdin:
             parser.error('Please provide URL or --stdin')
-        
-        # Analyze
-        analysis = analyze_dsl(dsl_data)
+        if args.compact:
+            # Parsing and walking are one pass here
+            with span('traverse', compact=True) as record:
+                if args.stdin:
+                    analysis = analyze_stream(sys.stdin.buffer)
+                else:
+                    file_id, layer_id = extract_ids_from_url(args.url, args.cache)
+                    with open_dsl_stream(file_id, layer_id, args.token, cache=args.cache) as body:
+                        analysis = analyze_stream(body)
+                record['nodes'] = analysis['stats']['totalNodes']
+        else:
+            if args.stdin:
+                with span('decode') as record:
+                    data = sys.stdin.buffer.read()
+                    record['bytes'] = len(data)
+                    dsl_data = json.loads(data)
+            elif args.snapshot:
+                with span('load', snapshot=True):
+                    dsl_data = load_dsl_from_url(args.url, args.token, cache=args.cache)
+            else:
+                dsl_data = get_dsl_from_url(args.url, args.token, cache=args.cache)
+            with span('traverse') as record:
+                analysis = analyze_dsl(dsl_data, **prune)
+                record['nodes'] = analysis['stats']['totalNodes']
         
         # Output
-        if args.format == 'json':
-            print(json.dumps(analysis, ensure_ascii=False, indent=2))
-        elif args.format == 'flat':
-            print(format_flat(analysis))
-        else:
-            print(format_tree(analysis))
+        with span('format', format=args.format):
+            if args.format == 'json':
+                print(json.dumps(analysis_to_json(analysis), ensure_ascii=False, indent=2))
+            elif args.format == 'flat':
+                write_lines(iter_flat(analysis))
+            elif args.format == 'ndjson':
+                write_lines(iter_ndjson(analysis))
+            else:
+                write_lines(iter_tree(analysis))
         
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
@@ -337,6 +640,15 @@ Examples:
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    except URLError as e:
+        print(f"Error: Network error: {e.reason}", file=sys.stderr)
+        sys.exit(1)
+    except BrokenPipeError:
+        # Reader went away (e.g. piped into head): point stdout at devnull so
+        # the flush at interpreter exit does not raise again, and stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
     except KeyboardInterrupt:
         sys.exit(130)
 
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+MasterGo extraction benchmarks.
+
+Runs the extraction and formatting functions on synthetic pages (see
+mastergo_synth) of increasing size and records, per function and size,
+the best wall time, throughput (nodes/s) and peak memory allocated by the
+call (tracemalloc, measured in a separate run so it does not slow down
+the timing).
+
+Results are JSON on stdout. Save them as a baseline and later runs can be
+checked against it: a function that got slower or allocates more than the
+threshold allows fails the run. The baseline must have been recorded with
+the same page shape, seed and repeat count.
+
+Usage:
+  # 1k / 100k / 1M nodes, JSON results
+  python mastergo_bench.py > results.json
+
+  # Quick run, store as baseline, later compare with a 25% tolerance
+  python mastergo_bench.py --sizes 1000,20000 --save-baseline bench.json
+  python mastergo_bench.py --sizes 1000,20000 --baseline bench.json --threshold 0.25
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+# Import from sibling module
+try:
+    from mastergo_analyze import analyze_dsl, format_flat, format_tree
+    from mastergo_synth import (DEFAULT_DEPTH, DEFAULT_FANOUT, DEFAULT_INSTANCE_RATIO,
+                                DEFAULT_NAVIGATION_RATIO, DEFAULT_TEXT_RATIO, DEFAULT_TOKENS, generate_dsl)
+    from mastergo_utils import build_component_tree, extract_texts
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_analyze import analyze_dsl, format_flat, format_tree
+    from mastergo_synth import (DEFAULT_DEPTH, DEFAULT_FANOUT, DEFAULT_INSTANCE_RATIO,
+                                DEFAULT_NAVIGATION_RATIO, DEFAULT_TEXT_RATIO, DEFAULT_TOKENS, generate_dsl)
+    from mastergo_utils import build_component_tree, extract_texts
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.2
+SINGLE_RUN_NODES = 100000  # larger pages are timed once
+RESULTS_VERSION = 1
+
+# name -> (setup(dsl) -> argument, function(argument)); setup is not measured
+BENCHMARKS = OrderedDict([
+    ('extract_texts', (None, extract_texts)),
+    ('build_component_tree', (None, build_component_tree)),
+    ('analyze_dsl', (None, analyze_dsl)),
+    ('format_tree', (analyze_dsl, format_tree)),
+    ('format_flat', (analyze_dsl, format_flat)),
+])
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def time_call(function: Callable[[Any], Any], argument: Any, repeat: int) -> float:
+    """Best wall time of `repeat` calls, in seconds."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function(argument)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(function: Callable[[Any], Any], argument: Any) -> int:
+    """Peak bytes allocated during one call (tracemalloc)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(sizes: List[int], functions: List[str], repeat: int = DEFAULT_REPEAT,
+                   memory: bool = True, seed: int = 0, depth: int = DEFAULT_DEPTH,
+                   fanout: int = DEFAULT_FANOUT, tokens: int = DEFAULT_TOKENS,
+                   text_ratio: float = DEFAULT_TEXT_RATIO, instance_ratio: float = DEFAULT_INSTANCE_RATIO,
+                   navigation_ratio: float = DEFAULT_NAVIGATION_RATIO,
+                   progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """
+    Benchmark `functions` (names from BENCHMARKS) on a synthetic page per size.
+
+    depth, fanout, tokens and the ratios shape the pages, see mastergo_synth.generate_dsl.
+
+    Returns:
+        [{'function', 'nodes', 'seconds', 'nodesPerSecond', 'peakBytes'}, ...]
+        (peakBytes is None without memory measurement)
+    """
+    results = []
+    for size in sizes:
+        dsl = generate_dsl(size, depth, fanout, text_ratio, instance_ratio, navigation_ratio,
+                           tokens=tokens, seed=seed)
+        runs = 1 if size > SINGLE_RUN_NODES else max(1, repeat)
+        for name in functions:
+            setup, function = BENCHMARKS[name]
+            argument = setup(dsl) if setup else dsl
+            seconds = time_call(function, argument, runs)
+            result = {
+                'function': name,
+                'nodes': size,
+                'seconds': round(seconds, 6),
+                'nodesPerSecond': round(size / seconds) if seconds > 0 else None,
+                'peakBytes': peak_memory(function, argument) if memory else None,
+            }
+            results.append(result)
+            if progress:
+                progress(result)
+            del argument
+        del dsl
+    return results
+
+
+# =============================================================================
+# Baseline
+# =============================================================================
+
+def environment() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Regressions of results against a baseline.
+
+    A (function, nodes) pair regresses when its time or peak memory exceeds
+    the baseline by more than `threshold` (0.2 = 20%). Pairs missing from
+    either side are ignored.
+
+    Returns:
+        [{'function', 'nodes', 'metric', 'baseline', 'current', 'change'}, ...]
+    """
+    stored = {(item['function'], item['nodes']): item for item in baseline}
+    regressions = []
+    for result in results:
+        before = stored.get((result['function'], result['nodes']))
+        if not before:
+            continue
+        for metric in ('seconds', 'peakBytes'):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            if change > threshold:
+                regressions.append({
+                    'function': result['function'],
+                    'nodes': result['nodes'],
+                    'metric': metric,
+                    'baseline': old,
+                    'current': new,
+                    'change': round(change, 3),
+                })
+    return regressions
+
+
+def check_config(config: Dict[str, Any], stored: Dict[str, Any]) -> List[str]:
+    """
+    Check that a baseline's config matches the current run's.
+
+    Results are only comparable on the same pages, so a different seed,
+    page shape or repeat count raises ValueError. Sizes may differ, only
+    the common ones are compared; no common size raises ValueError too.
+
+    Returns:
+        Warnings about sizes that are missing on either side
+    """
+    different = [f"{key} {stored.get(key)} -> {value}" for key, value in config.items()
+                 if key != 'sizes' and stored.get(key) != value]
+    if different:
+        raise ValueError(f"Baseline was recorded with a different config ({', '.join(different)}), "
+                         f"rerun with the same options or save a new baseline")
+    sizes, stored_sizes = set(config['sizes']), set(stored.get('sizes') or ())
+    if not sizes & stored_sizes:
+        raise ValueError(f"Baseline has no results at {', '.join(f'{s:,}' for s in sorted(sizes))} nodes")
+    warnings = []
+    if sizes - stored_sizes:
+        warnings.append(f"not in the baseline: {', '.join(f'{s:,}' for s in sorted(sizes - stored_sizes))} nodes")
+    if stored_sizes - sizes:
+        warnings.append(f"not run: {', '.join(f'{s:,}' for s in sorted(stored_sizes - sizes))} nodes")
+    return warnings
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Load a results file written by this script ({'config', 'results', ...})."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get('version') != RESULTS_VERSION or 'config' not in data:
+        raise ValueError(f"Not a benchmark results file: {path}")
+    return data
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+def _print_result(result: Dict[str, Any]) -> None:
+    rate = result['nodesPerSecond']
+    print(f"  {result['function']:<22} {result['nodes']:>9,} nodes  {result['seconds'] * 1000:>10.1f} ms"
+          f"  {rate or 0:>12,} nodes/s  {_format_bytes(result['peakBytes']):>9}", file=sys.stderr)
+
+
+def _sizes(value: str) -> List[int]:
+    try:
+        sizes = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError('expected comma separated node counts')
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError('node counts must be at least 1')
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark MasterGo DSL extraction on synthetic pages',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f'''
+Examples:
+  # Default sizes (1k, 100k, 1M nodes), all functions
+  python mastergo_bench.py --pretty
+
+  # Two functions, no memory measurement
+  python mastergo_bench.py --sizes 10000 --functions analyze_dsl,format_tree --no-memory
+
+  # Deep, text-heavy pages
+  python mastergo_bench.py --sizes 100000 --depth 20 --fanout 3 --text-ratio 0.6
+
+  # Fail (exit 1) on more than 20% slowdown or memory growth against a baseline
+  # (recorded with the same --seed, --repeat and page shape options)
+  python mastergo_bench.py --baseline bench.json
+
+Functions: {', '.join(BENCHMARKS)}
+Progress goes to stderr, JSON results to stdout.
+'''
+    )
+    parser.add_argument('--sizes', type=_sizes, default=list(DEFAULT_SIZES),
+                        help='Comma separated node counts (default: 1000,100000,1000000)')
+    parser.add_argument('--functions', default=','.join(BENCHMARKS),
+                        help='Comma separated functions to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f'Timed runs per function, best is kept (default: {DEFAULT_REPEAT}; '
+                             f'1 above {SINGLE_RUN_NODES:,} nodes)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc peak memory runs')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic pages (default: 0)')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f'Maximum depth of the pages (default: {DEFAULT_DEPTH})')
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT,
+                        help=f'Maximum children per frame (default: {DEFAULT_FANOUT})')
+    parser.add_argument('--tokens', type=int, default=DEFAULT_TOKENS,
+                        help=f'localStyleMap size (default: {DEFAULT_TOKENS})')
+    parser.add_argument('--text-ratio', type=float, default=DEFAULT_TEXT_RATIO,
+                        help=f'Share of TEXT nodes (default: {DEFAULT_TEXT_RATIO})')
+    parser.add_argument('--instance-ratio', type=float, default=DEFAULT_INSTANCE_RATIO,
+                        help=f'Share of INSTANCE nodes (default: {DEFAULT_INSTANCE_RATIO})')
+    parser.add_argument('--navigation-ratio', type=float, default=DEFAULT_NAVIGATION_RATIO,
+                        help=f'Share of nodes with a navigation (default: {DEFAULT_NAVIGATION_RATIO})')
+    parser.add_argument('--baseline', metavar='FILE', help='Compare with stored results, exit 1 on regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Allowed slowdown / memory growth vs baseline (default: {DEFAULT_THRESHOLD})')
+    parser.add_argument('--save-baseline', metavar='FILE', help='Also write the results to FILE')
+    parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
+
+    args = parser.parse_args()
+    functions = [name.strip() for name in args.functions.split(',') if name.strip()]
+    unknown = [name for name in functions if name not in BENCHMARKS]
+    if unknown or not functions:
+        parser.error(f"unknown functions: {', '.join(unknown) or '(none given)'}")
+    if args.threshold < 0:
+        parser.error('--threshold must not be negative')
+
+    config = {'sizes': args.sizes, 'repeat': args.repeat, 'seed': args.seed,
+              'depth': args.depth, 'fanout': args.fanout, 'tokens': args.tokens,
+              'textRatio': args.text_ratio, 'instanceRatio': args.instance_ratio,
+              'navigationRatio': args.navigation_ratio}
+    try:
+        baseline = load_results(args.baseline) if args.baseline else None
+        if baseline is not None:
+            for warning in check_config(config, baseline['config']):
+                print(f"Warning: Baseline sizes differ, {warning}", file=sys.stderr)
+        print(f"Benchmarking {len(functions)} functions at {', '.join(f'{s:,}' for s in args.sizes)} nodes",
+              file=sys.stderr)
+        shape = {
+            'depth': args.depth, 'fanout': args.fanout, 'tokens': args.tokens,
+            'text_ratio': args.text_ratio, 'instance_ratio': args.instance_ratio,
+            'navigation_ratio': args.navigation_ratio,
+        }
+        results = run_benchmarks(args.sizes, functions, args.repeat, not args.no_memory, args.seed,
+                                 progress=_print_result, **shape)
+        output = {
+            'version': RESULTS_VERSION,
+            'environment': environment(),
+            'config': config,
+            'results': results,
+        }
+        if baseline is not None:
+            output['threshold'] = args.threshold
+            output['regressions'] = compare(results, baseline['results'] or [], args.threshold)
+
+        text = json.dumps(output, indent=2 if args.pretty else None)
+        if args.save_baseline:
+            with open(args.save_baseline, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        print(text)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid baseline - {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+    regressions = output.get('regressions')
+    if regressions:
+        for item in regressions:
+            print(f"Regression: {item['function']} at {item['nodes']:,} nodes, {item['metric']} "
+                  f"{item['change']:+.0%} ({item['baseline']} -> {item['current']})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
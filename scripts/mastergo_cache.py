@@ -0,0 +1,565 @@
+#!/usr/bin/env python3
+"""
+MasterGo response cache.
+
+On-disk caches stored inside the skill directory (never in the user project):
+
+  {skill_dir}/.cache/dsl/<key>.json       raw DSL response body
+  {skill_dir}/.cache/dsl/<key>.meta.json  endpoint, ids, ETag, Last-Modified, stored time
+  {skill_dir}/.cache/dsl/<key>.snap       binary snapshot of the body (mastergo_snapshot)
+  {skill_dir}/.cache/goto.json            short link -> (fileId, layerId) map
+  {skill_dir}/.cache/styles.json          shared style class table (mastergo_styles)
+
+Entries are keyed by (endpoint, fileId, layerId, token hash), so a response
+is only served to callers with the token that fetched it. They expire after
+a TTL and are revalidated with If-None-Match / If-Modified-Since when the
+server sent validators. The cache is size bounded, least recently used
+entries are evicted first.
+
+Short link resolutions rarely change and are kept for a long time. Links
+the server definitely rejected are remembered briefly so a broken link is
+not retried in a loop; transient failures are not remembered.
+
+Long-running processes (mastergo_daemon) also keep an in-memory LRU of
+parsed DSL, node indexes and fetched docs; see MemoryCache. `clear` drops
+it in a running daemon too, and the short link map is re-read whenever
+goto.json changes on disk.
+
+Environment Variables:
+  MASTERGO_CACHE            Set to 0/off to disable caching by default
+  MASTERGO_CACHE_DIR        Cache directory (default: {skill_dir}/.cache)
+  MASTERGO_CACHE_TTL        Seconds an entry is served without revalidation (default: 600)
+  MASTERGO_CACHE_MAX_BYTES  Maximum total size of cached bodies and snapshots (default: 256 MiB)
+  MASTERGO_GOTO_TTL         Seconds a resolved short link is kept (default: 30 days)
+
+Usage:
+  # Show cache contents / clear it
+  python mastergo_cache.py info
+  python mastergo_cache.py clear
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+SKILL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(SKILL_DIR, '.cache')
+DEFAULT_TTL = 600                        # seconds
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024    # bytes
+DEFAULT_GOTO_TTL = 30 * 24 * 3600        # seconds
+DEFAULT_MEMORY_MAX_BYTES = 64 * 1024 * 1024  # source bytes held by the memory cache
+GOTO_FAILURE_TTL = 60                    # seconds a failed resolution is remembered
+EVICT_INTERVAL = 64                      # writes between full size rescans of the DSL cache
+EVICT_TARGET = 0.9                       # eviction frees down to this share of max_bytes
+STYLE_TABLE_FILE = 'styles.json'         # in the cache directory, see mastergo_styles
+
+# Cache modes accepted by get_dsl(cache=...)
+CACHE_USE = 'use'          # serve fresh entries, revalidate stale ones
+CACHE_OFF = 'off'          # never read or write the cache
+CACHE_REFRESH = 'refresh'  # always fetch, then store the new response
+CACHE_MODES = (CACHE_USE, CACHE_OFF, CACHE_REFRESH)
+
+
+def get_cache_dir() -> str:
+    """Get cache directory from MASTERGO_CACHE_DIR env var (optional, has default)"""
+    return os.environ.get('MASTERGO_CACHE_DIR') or DEFAULT_CACHE_DIR
+
+
+def get_cache_mode() -> str:
+    """Get default cache mode from MASTERGO_CACHE env var (optional, enabled by default)"""
+    value = os.environ.get('MASTERGO_CACHE', '1').strip().lower()
+    return CACHE_OFF if value in ('0', 'off', 'false', 'no') else CACHE_USE
+
+
+def _env_number(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Write file atomically so concurrent readers never see partial content."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# =============================================================================
+# DSL Cache
+# =============================================================================
+
+class CacheEntry:
+    """A cached response body with its metadata."""
+
+    __slots__ = ('key', 'body', 'meta', 'fresh')
+
+    def __init__(self, key: str, body: bytes, meta: Dict, fresh: bool):
+        self.key = key
+        self.body = body
+        self.meta = meta
+        self.fresh = fresh
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidation."""
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('lastModified'):
+            headers['If-Modified-Since'] = self.meta['lastModified']
+        return headers
+
+
+class DSLCache:
+    """
+    Size-bounded LRU cache of DSL responses on disk.
+
+    Writes keep a running estimate of the total size and only scan the
+    directory (evict()) when it is over max_bytes, on the first write, and
+    every EVICT_INTERVAL writes, since other processes write here too.
+    Eviction frees down to EVICT_TARGET of the limit, so a cache kept full
+    does not rescan on every write.
+    """
+
+    def __init__(self, directory: str = None, ttl: int = None, max_bytes: int = None):
+        self.directory = os.path.join(directory or get_cache_dir(), 'dsl')
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._size = None  # estimated bytes on disk, None until the first scan
+        self._writes = 0
+
+    @staticmethod
+    def make_key(endpoint: str, file_id: str, layer_id: str, token: str) -> str:
+        """Cache key for (endpoint, fileId, layerId, token); the token only enters as a hash."""
+        token_hash = hashlib.sha256((token or '').encode('utf-8')).hexdigest()
+        raw = '\n'.join((endpoint, str(file_id), str(layer_id), token_hash))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.meta.json'
+
+    def snapshot_path(self, entry: CacheEntry) -> str:
+        """Path of the binary snapshot kept next to entry's body (see mastergo_snapshot)."""
+        return self._snapshot_path(entry.key)
+
+    def _snapshot_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.snap')
+
+    def get(self, endpoint: str, file_id: str, layer_id: str, token: str,
+            read_body: bool = True) -> Optional[CacheEntry]:
+        """Get cached entry (fresh or stale), or None. With read_body=False, use open_body()."""
+        key = self.make_key(endpoint, file_id, layer_id, token)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            body = None
+            if read_body:
+                with open(body_path, 'rb') as f:
+                    body = f.read()
+            # Record access time for LRU eviction
+            os.utime(body_path, None)
+        except (OSError, ValueError):
+            return None
+        fresh = time.time() - meta.get('storedAt', 0) < self.ttl
+        return CacheEntry(key, body, meta, fresh)
+
+    def put(self, endpoint: str, file_id: str, layer_id: str, token: str, body: bytes,
+            etag: str = None, last_modified: str = None) -> CacheEntry:
+        """Store a response body and evict old entries if over the size limit."""
+        key = self.make_key(endpoint, file_id, layer_id, token)
+        body_path, meta_path = self._paths(key)
+        meta = {
+            'endpoint': endpoint,
+            'fileId': file_id,
+            'layerId': layer_id,
+            'storedAt': time.time(),
+            'etag': etag,
+            'lastModified': last_modified,
+            'size': len(body),
+            # Identifies this body; unlike storedAt it survives revalidation
+            'bodyId': os.urandom(8).hex(),
+        }
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            try:
+                replaced = os.path.getsize(body_path)
+            except OSError:
+                replaced = 0
+            atomic_write(body_path, body)
+            atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+            self.written(len(body) - replaced)
+        except OSError:
+            # Cache is best effort, a read-only skill directory must not break fetching
+            pass
+        return CacheEntry(key, body, meta, True)
+
+    def open_body(self, entry: CacheEntry):
+        """Open the cached body of entry as a binary file (raises OSError if evicted meanwhile)."""
+        return open(self._paths(entry.key)[0], 'rb')
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Mark entry as fresh again (after a 304 Not Modified)."""
+        _, meta_path = self._paths(entry.key)
+        entry.meta['storedAt'] = time.time()
+        entry.fresh = True
+        try:
+            atomic_write(meta_path, json.dumps(entry.meta).encode('utf-8'))
+        except OSError:
+            pass
+
+    def entries(self) -> List[Dict]:
+        """List entry metadata, most recently used first."""
+        result = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return result
+        for name in names:
+            if not name.endswith('.meta.json'):
+                continue
+            key = name[:-len('.meta.json')]
+            body_path, meta_path = self._paths(key)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                meta['key'] = key
+                meta['lastUsed'] = os.path.getmtime(body_path)
+            except (OSError, ValueError):
+                continue
+            try:
+                meta['snapshotSize'] = os.path.getsize(self._snapshot_path(key))
+            except OSError:
+                meta['snapshotSize'] = 0
+            result.append(meta)
+        result.sort(key=lambda m: m['lastUsed'], reverse=True)
+        return result
+
+    def written(self, size: int) -> None:
+        """Account for `size` bytes added to the cache directory; evicts when over the limit."""
+        with self._lock:
+            self._writes += 1
+            if self._size is not None:
+                self._size += size
+            due = (self._size is None or self._size > self.max_bytes
+                   or self._writes % EVICT_INTERVAL == 0)
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries once over max_bytes. Returns count removed."""
+        removed = 0
+        with self._lock:
+            entries = self.entries()
+            total = sum(m.get('size', 0) + m['snapshotSize'] for m in entries)
+            target = self.max_bytes * EVICT_TARGET if total > self.max_bytes else total
+            while entries and total > target:
+                oldest = entries.pop()
+                total -= oldest.get('size', 0) + oldest['snapshotSize']
+                self._remove(oldest['key'])
+                removed += 1
+            self._size = total
+        return removed
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key) + (self._snapshot_path(key),):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def clear(self) -> int:
+        """Remove all entries. Returns count removed."""
+        entries = self.entries()
+        for meta in entries:
+            self._remove(meta['key'])
+        with self._lock:
+            self._size = None
+        return len(entries)
+
+
+_dsl_cache = None
+
+
+def get_dsl_cache() -> DSLCache:
+    """Get the shared DSL cache configured from environment variables."""
+    global _dsl_cache
+    if _dsl_cache is None:
+        _dsl_cache = DSLCache(
+            ttl=_env_number('MASTERGO_CACHE_TTL', DEFAULT_TTL),
+            max_bytes=_env_number('MASTERGO_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        )
+    return _dsl_cache
+
+
+# =============================================================================
+# Short Link Cache
+# =============================================================================
+
+class ShortLinkCache:
+    """Durable short link -> (fileId, layerId) map with expiry and negative entries."""
+
+    def __init__(self, directory: str = None, ttl: int = None, failure_ttl: int = None):
+        self.path = os.path.join(directory or get_cache_dir(), 'goto.json')
+        self.ttl = DEFAULT_GOTO_TTL if ttl is None else ttl
+        self.failure_ttl = GOTO_FAILURE_TTL if failure_ttl is None else failure_ttl
+        self._lock = threading.Lock()
+        self._links = None  # type: Optional[Dict[str, Dict]]
+        self._version = None  # file identity when _links was read
+
+    def _file_version(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                links = json.load(f)
+            return links if isinstance(links, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Get an unexpired entry for url, or None.
+
+        Entries are {'fileId', 'layerId'} on success or {'error'} on failure.
+        """
+        with self._lock:
+            # Re-read when another process (or `clear`) changed the file
+            version = self._file_version()
+            if self._links is None or version != self._version:
+                self._links = self._read()
+                self._version = version
+            entry = self._links.get(url)
+        if not entry or entry.get('expiresAt', 0) <= time.time():
+            return None
+        return entry
+
+    def _store(self, url: str, entry: Dict) -> None:
+        with self._lock:
+            # Merge with what other processes wrote meanwhile, dropping expired entries
+            now = time.time()
+            links = {k: v for k, v in self._read().items() if v.get('expiresAt', 0) > now}
+            links[url] = entry
+            self._links = links
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                atomic_write(self.path, json.dumps(links, ensure_ascii=False).encode('utf-8'))
+            except OSError:
+                pass
+            self._version = self._file_version()
+
+    def put(self, url: str, file_id: str, layer_id: str) -> None:
+        """Remember a successful resolution."""
+        self._store(url, {'fileId': file_id, 'layerId': layer_id,
+                          'expiresAt': time.time() + self.ttl})
+
+    def put_failure(self, url: str, error: str) -> None:
+        """Remember a failed resolution for a short time."""
+        self._store(url, {'error': error, 'expiresAt': time.time() + self.failure_ttl})
+
+    def clear(self) -> int:
+        """Remove all entries. Returns count removed."""
+        with self._lock:
+            count = len(self._read())
+            self._links = {}
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self._version = None
+        return count
+
+
+_short_link_cache = None
+
+
+def get_short_link_cache() -> ShortLinkCache:
+    """Get the shared short link cache configured from environment variables."""
+    global _short_link_cache
+    if _short_link_cache is None:
+        _short_link_cache = ShortLinkCache(ttl=_env_number('MASTERGO_GOTO_TTL', DEFAULT_GOTO_TTL))
+    return _short_link_cache
+
+
+# =============================================================================
+# Memory Cache
+# =============================================================================
+
+class MemoryCache:
+    """
+    In-process LRU of decoded values (parsed DSL, indexes, docs).
+
+    Only long-lived processes (mastergo_daemon) enable it. Sizes are those
+    of the source bytes, so max_bytes bounds the memory only roughly:
+    parsed JSON takes several times its text size. Values are shared
+    between callers and must not be modified.
+    """
+
+    def __init__(self, max_bytes: int = None, ttl: int = None):
+        self.max_bytes = DEFAULT_MEMORY_MAX_BYTES if max_bytes is None else max_bytes
+        self.ttl = DEFAULT_TTL if ttl is None else ttl
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, size, expires or None)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """Cached value for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= now:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int, expires: bool = False) -> None:
+        """Store value; `expires` entries are dropped after the TTL."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.time() + self.ttl if expires else None)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: Hashable) -> None:
+        self.size -= self._entries.pop(key)[1]
+
+    def memoize(self, kind: str, body: bytes, build: Callable[[bytes], Any]) -> Any:
+        """build(body), reused for identical bodies (keyed by kind and a digest of body)."""
+        key = (kind, hashlib.blake2b(body, digest_size=16).digest())
+        value = self.get(key)
+        if value is None:
+            value = build(body)
+            self.put(key, value, len(body))
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.size, 'maxBytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+_memory_cache = None  # type: Optional[MemoryCache]
+
+
+def enable_memory_cache(max_bytes: int = None) -> MemoryCache:
+    """Turn on the process-wide memory cache (idempotent)."""
+    global _memory_cache
+    if _memory_cache is None:
+        _memory_cache = MemoryCache(max_bytes, _env_number('MASTERGO_CACHE_TTL', DEFAULT_TTL))
+    return _memory_cache
+
+
+def get_memory_cache() -> Optional[MemoryCache]:
+    """The memory cache, or None unless enabled."""
+    return _memory_cache
+
+
+def memoize(kind: str, body: bytes, build: Callable[[bytes], Any]) -> Any:
+    """build(body), served from the memory cache when it is enabled."""
+    memory = _memory_cache
+    return memory.memoize(kind, body, build) if memory is not None else build(body)
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def add_cache_arguments(parser) -> None:
+    """Add --cache/--no-cache/--refresh switches to an argparse parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--cache', dest='cache', action='store_const', const=CACHE_USE,
+                       help='Serve DSL from the local cache when fresh (default, see MASTERGO_CACHE)')
+    group.add_argument('--no-cache', dest='cache', action='store_const', const=CACHE_OFF,
+                       help='Do not read or write the local cache')
+    group.add_argument('--refresh', dest='cache', action='store_const', const=CACHE_REFRESH,
+                       help='Ignore cached DSL, fetch again and update the cache')
+
+
+def main():
+    """CLI for inspecting the cache."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='MasterGo cache maintenance')
+    parser.add_argument('command', choices=['info', 'clear'], help='Cache command')
+
+    args = parser.parse_args()
+    cache = get_dsl_cache()
+    links = get_short_link_cache()
+
+    if args.command == 'clear':
+        print(f"Removed {cache.clear()} cached DSL responses from {cache.directory}")
+        print(f"Removed {links.clear()} short links from {links.path}")
+        styles_path = os.path.join(get_cache_dir(), STYLE_TABLE_FILE)
+        if os.path.exists(styles_path):
+            os.unlink(styles_path)
+            print(f"Removed style class table {styles_path}")
+        # A running daemon holds docs and parsed DSL in memory
+        try:
+            from mastergo_daemon import call
+        except ImportError:
+            return
+        reply = call('clear')
+        if reply and reply.get('ok'):
+            print(f"Dropped {reply['entries']} in-memory entries from the running daemon")
+        return
+
+    entries = cache.entries()
+    total = sum(m.get('size', 0) + m['snapshotSize'] for m in entries)
+    print(f"Cache: {cache.directory}")
+    print(f"DSL responses: {len(entries)}, {total} bytes (limit {cache.max_bytes}, ttl {cache.ttl}s)")
+    now = time.time()
+    for meta in entries:
+        age = int(now - meta.get('storedAt', 0))
+        snapshot = f" + {meta['snapshotSize']} snapshot" if meta['snapshotSize'] else ''
+        print(f"  {meta.get('fileId')} {meta.get('layerId')} | {meta.get('size', 0)} bytes{snapshot} | "
+              f"age {age}s | {meta.get('endpoint')}")
+
+    short_links = {url: entry for url, entry in links._read().items()
+                   if entry.get('expiresAt', 0) > now}
+    print(f"Short links: {len(short_links)} ({links.path})")
+    for url, entry in sorted(short_links.items()):
+        target = entry.get('error') or f"{entry.get('fileId')} {entry.get('layerId')}"
+        print(f"  {url} -> {target}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+MasterGo run cancellation.
+
+A host running the CLIs in-process (mastergo_daemon) cancels a run by
+setting a flag instead of interrupting its thread. The long-running parts
+check the flag at points where stopping is safe and raise Cancelled there:
+
+- the HTTP transport, before each request and each streamed body read
+  (an abandoned connection is closed, never returned to the pool)
+- the tree walks of mastergo_utils, once per node
+
+A check is a single flag test, so it costs nothing measurable when no
+host ever cancels. Cancelled is a KeyboardInterrupt, so the CLIs exit as
+on Ctrl-C (status 130).
+
+Usage:
+  import mastergo_cancel
+
+  mastergo_cancel.reset()     # before the run
+  mastergo_cancel.cancel()    # from another thread: the run stops at its next check
+  mastergo_cancel.check()     # in a loop: raises Cancelled once cancelled
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import threading
+
+
+class Cancelled(KeyboardInterrupt):
+    """The run was cancelled (e.g. the daemon's client went away)."""
+
+
+_event = threading.Event()
+
+# cancelled() -> bool, bound once so hot loops pay a single call
+cancelled = _event.is_set
+
+
+def cancel() -> None:
+    """Ask the current run to stop at its next check (from any thread)."""
+    _event.set()
+
+
+def reset() -> None:
+    """Clear a cancellation; call before starting the next run."""
+    _event.clear()
+
+
+def check() -> None:
+    """Raise Cancelled if the run was cancelled."""
+    if _event.is_set():
+        raise Cancelled()
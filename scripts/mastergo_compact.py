@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+MasterGo compact node store.
+
+Struct-of-arrays table of per-node records for very large documents.
+Nodes are kept in pre-order; every field is an `array` of indexes into a
+shared string table (names, types, sizes, tags repeat a lot), and children
+are found through subtree end offsets instead of nested lists. A node costs
+a few dozen bytes instead of a dict with its own keys and child list.
+
+Usage:
+  from mastergo_compact import CompactTree, CompactBuilder
+
+  tree = CompactTree(('id', 'name', 'type', 'depth'), unique=('id',))
+  run_extractors(dsl, [CompactBuilder(tree, build)])   # build(node, depth) -> dict
+  for i in tree.roots():
+      print(tree.record(i), list(tree.children(i)))
+
+  # From a streamed DSL (see mastergo_stream)
+  tree = compact_from_stream(DSLStreamParser(fp), tree, build)
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import collections.abc
+import sys
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+# Import from sibling module
+try:
+    from mastergo_utils import Extractor
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_utils import Extractor
+
+# Marks a field the record did not have
+_ABSENT = object()
+
+
+class _ListValue(tuple):
+    """Interned form of a list value, turned back into a list on access."""
+
+
+class StringTable:
+    """Interned values (strings, numbers, None, lists of those) <-> small ints."""
+
+    __slots__ = ('values', '_index')
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def intern(self, value: Any) -> int:
+        if value.__class__ is list:
+            value = _ListValue(value)
+        # Strings are keyed by themselves; other values by type too (1, 1.0 and True differ)
+        key = value if value.__class__ is str else (value.__class__, value)
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class CompactTree:
+    """
+    Pre-order node table with one column per field.
+
+    Args:
+        fields: Record fields, in output order; 'depth' is served from the depth column
+        unique: Fields that rarely repeat (ids), stored as a plain list instead of interned
+        sparse: Fields present on few nodes, stored as {index: value}
+        hidden: Extra fields stored like the others but left out of record()
+    """
+
+    def __init__(self, fields: Sequence[str], unique: Sequence[str] = (),
+                 sparse: Sequence[str] = (), hidden: Sequence[str] = ()):
+        self._spec = (tuple(fields), tuple(unique), tuple(sparse), tuple(hidden))
+        self.fields = tuple(fields)
+        self.strings = StringTable()
+        self.depth = array('i')
+        self.parent = array('i')
+        self.end = array('i')
+        self._interned = {}
+        self._unique = {}
+        self._sparse = {}
+        # Unhashable values found in interned columns: {(name, index): value}
+        self._overflow = {}
+        for name in self.fields + tuple(hidden):
+            if name == 'depth':
+                continue
+            if name in unique:
+                self._unique[name] = []
+            elif name in sparse:
+                self._sparse[name] = {}
+            else:
+                self._interned[name] = array('i')
+
+    def __len__(self) -> int:
+        return len(self.depth)
+
+    def append(self, record: Dict[str, Any], parent: int = -1, depth: int = 0) -> int:
+        """Add a node after all nodes added so far; call close() once its subtree is added."""
+        index = len(self.depth)
+        self.depth.append(depth)
+        self.parent.append(parent)
+        self.end.append(index + 1)
+        get = record.get
+        intern = self.strings.intern
+        for name, column in self._interned.items():
+            value = get(name, _ABSENT)
+            if value is _ABSENT:
+                column.append(-1)
+                continue
+            try:
+                column.append(intern(value))
+            except TypeError:
+                column.append(-2)
+                self._overflow[name, index] = value
+        for name, column in self._unique.items():
+            column.append(get(name, _ABSENT))
+        for name, column in self._sparse.items():
+            value = get(name, _ABSENT)
+            if value is not _ABSENT:
+                column[index] = value
+        return index
+
+    def close(self, index: int) -> None:
+        """Mark the end of the subtree of index (everything added since belongs to it)."""
+        self.end[index] = len(self.depth)
+
+    def get(self, index: int, name: str, default: Any = None) -> Any:
+        """Value of one field of a node."""
+        if name == 'depth':
+            return self.depth[index]
+        column = self._interned.get(name)
+        if column is not None:
+            value = column[index]
+            if value < 0:
+                return self._overflow[name, index] if value == -2 else default
+            value = self.strings.values[value]
+            return list(value) if value.__class__ is _ListValue else value
+        column = self._unique.get(name)
+        if column is not None:
+            value = column[index]
+            return default if value is _ABSENT else value
+        return self._sparse[name].get(index, default)
+
+    def indexes(self, name: str) -> array:
+        """Indexes of the nodes that have a field, in pre-order."""
+        if name in self._sparse:
+            return array('i', sorted(self._sparse[name]))
+        if name in self._interned:
+            return array('i', (i for i, value in enumerate(self._interned[name]) if value != -1))
+        return array('i', (i for i, value in enumerate(self._unique[name]) if value is not _ABSENT))
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """The node's fields as a dict (without children)."""
+        record = {}
+        for name in self.fields:
+            value = self.get(index, name, _ABSENT)
+            if value is not _ABSENT:
+                record[name] = value
+        return record
+
+    def roots(self) -> Iterator[int]:
+        """Indexes of the top-level nodes."""
+        index, total = 0, len(self.depth)
+        while index < total:
+            yield index
+            index = self.end[index]
+
+    def children(self, index: int) -> Iterator[int]:
+        """Indexes of the direct children of a node."""
+        end = self.end[index]
+        child = index + 1
+        while child < end:
+            yield child
+            child = self.end[child]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Nested records with 'children', like TreeBuilder output."""
+        roots = []
+        items = [None] * len(self.depth)
+        for index in range(len(self.depth)):
+            item = items[index] = self.record(index)
+            parent = self.parent[index]
+            if parent < 0:
+                roots.append(item)
+            else:
+                items[parent].setdefault('children', []).append(item)
+        return roots
+
+    def take(self, order: Sequence[int], parent: Sequence[int], depth: Sequence[int]) -> 'CompactTree':
+        """
+        New tree holding the nodes at `order` (which must be a pre-order walk),
+        with their new parent indexes and depths. The string table is shared.
+        """
+        tree = CompactTree(*self._spec)
+        tree.strings = self.strings
+        for name, column in self._interned.items():
+            tree._interned[name] = array('i', (column[i] for i in order))
+        if self._overflow:
+            for new, old in enumerate(order):
+                for name in self._interned:
+                    if (name, old) in self._overflow:
+                        tree._overflow[name, new] = self._overflow[name, old]
+        for name, column in self._unique.items():
+            tree._unique[name] = [column[i] for i in order]
+        for name, column in self._sparse.items():
+            tree._sparse[name] = {new: column[old] for new, old in enumerate(order) if old in column}
+        tree.depth = array('i', depth)
+        tree.parent = array('i', parent)
+        end = tree.end = array('i', range(1, len(order) + 1))
+        # Children come after their parent, so one backward pass propagates subtree ends
+        for index in range(len(order) - 1, -1, -1):
+            up = tree.parent[index]
+            if up >= 0 and end[index] > end[up]:
+                end[up] = end[index]
+        return tree
+
+
+class RecordList(collections.abc.Sequence):
+    """Read-only list whose items are built on access: make(index) for each index."""
+
+    def __init__(self, indexes: Sequence[int], make: Callable[[int], Any]):
+        self._indexes = indexes
+        self._make = make
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self._make(i) for i in self._indexes[item]]
+        return self._make(self._indexes[item])
+
+
+# =============================================================================
+# Builders
+# =============================================================================
+
+class CompactBuilder(Extractor):
+    """Extractor storing build(node, depth) of every node into a CompactTree."""
+
+    name = 'compact'
+
+    def __init__(self, tree: CompactTree, build: Callable[[Dict[str, Any], int], Dict[str, Any]]):
+        self.tree = tree
+        self.build = build
+        self._stack = []
+
+    def enter(self, node, depth, parent_id):
+        parent = self._stack[-1] if self._stack else -1
+        self._stack.append(self.tree.append(self.build(node, depth), parent, depth))
+
+    def leave(self, node, depth):
+        self.tree.close(self._stack.pop())
+
+    def result(self):
+        return self.tree
+
+
+def compact_from_stream(parser, tree: CompactTree,
+                        build: Callable[[Dict[str, Any], int], Dict[str, Any]]) -> CompactTree:
+    """
+    Build a CompactTree from a mastergo_stream.DSLStreamParser.
+
+    Starts from the DSL `root`, or its `nodes` when there is no root, like
+    the analyzer. ID-string children are resolved through nodeMap once the
+    stream is consumed (after the node's nested children). `tree` must be
+    empty and have an 'id' field; the returned tree replaces it.
+    """
+    seqs = array('i')
+    parent_seqs = array('i')
+    top = []
+    refs = {}
+    for event in parser:
+        node = event.node
+        handle = tree.append(build(node, event.depth), -1, event.depth)
+        seqs.append(event.seq)
+        if event.parent_seq is None:
+            parent_seqs.append(-1)
+            top.append((handle, event.source))
+        else:
+            parent_seqs.append(event.parent_seq)
+        children = node.get('children')
+        if children and isinstance(children, list):
+            refs[handle] = [child for child in children if child.__class__ is str]
+
+    total = len(seqs)
+    handle_of_seq = array('i', bytes(4 * total)) if total else array('i')
+    for handle, seq in enumerate(seqs):
+        handle_of_seq[seq] = handle
+    del seqs
+
+    # Nested children as linked lists; arrival order keeps siblings in document order
+    first = array('i', [-1]) * total
+    following = array('i', [-1]) * total
+    last = array('i', [-1]) * total
+    for handle in range(total):
+        if parent_seqs[handle] < 0:
+            continue
+        up = handle_of_seq[parent_seqs[handle]]
+        if last[up] < 0:
+            first[up] = handle
+        else:
+            following[last[up]] = handle
+        last[up] = handle
+    del last, parent_seqs, handle_of_seq
+
+    document = parser.document if isinstance(parser.document, dict) else {}
+    dsl = document.get('dsl', document)
+    if not isinstance(dsl, dict):
+        dsl = {}
+    root_refs = [dsl['root']] if isinstance(dsl.get('root'), str) else []
+    root_handles = [handle for handle, source in top if source == 'root']
+    if not (root_handles or root_refs):
+        root_handles = [handle for handle, source in top if source == 'nodes']
+        root_refs = [node for node in dsl.get('nodes') or [] if node.__class__ is str]
+
+    by_id = {}
+    if any(refs.values()) or root_refs:
+        for handle in range(total):
+            by_id.setdefault(tree.get(handle, 'id'), handle)
+    roots = root_handles + [by_id[ref] for ref in root_refs if ref in by_id]
+
+    # Pre-order walk over nested children and resolved references; a node
+    # referenced again (shared or cyclic nodeMap entries) is only taken once
+    order, parents, depths = array('i'), array('i'), array('i')
+    taken = bytearray(total)
+    stack = [(handle, -1, 0) for handle in reversed(roots)]
+    while stack:
+        handle, parent, depth = stack.pop()
+        if taken[handle]:
+            continue
+        taken[handle] = 1
+        index = len(order)
+        order.append(handle)
+        parents.append(parent)
+        depths.append(depth)
+        children = []
+        child = first[handle]
+        while child >= 0:
+            children.append(child)
+            child = following[child]
+        for ref in refs.get(handle, ()):
+            if ref in by_id:
+                children.append(by_id[ref])
+        for child in reversed(children):
+            stack.append((child, index, depth + 1))
+
+    return tree.take(order, parents, depths)
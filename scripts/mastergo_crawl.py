@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+MasterGo Multi-Page Crawler
+
+Breadth-first crawl of the navigation graph starting at one page.
+Every fetched page is written to stdout as one JSON record per line
+(NDJSON) as soon as it finishes, so consumers can start early.
+
+Usage:
+  # Crawl from a URL (same file, follows navigation targets)
+  python mastergo_crawl.py "https://mastergo.com/goto/xxx"
+
+  # Start from fileId + layerId, limit depth and page count
+  python mastergo_crawl.py --file-id 123456 --layer-id "0:1" --max-depth 2 --max-pages 20
+
+  # Only the page graph, without DSL payloads
+  python mastergo_crawl.py URL --no-dsl
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import json
+import sys
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Import from sibling modules
+try:
+    from mastergo_get_dsl import get_dsl, extract_ids_from_url
+    from mastergo_utils import extract_navigations
+    from mastergo_cache import add_cache_arguments
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_get_dsl import get_dsl, extract_ids_from_url
+    from mastergo_utils import extract_navigations
+    from mastergo_cache import add_cache_arguments
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_MAX_PAGES = 50
+
+
+# =============================================================================
+# Crawler
+# =============================================================================
+
+def crawl(file_id: str, layer_id: str, token: str = None, endpoint: str = None,
+          max_depth: int = DEFAULT_MAX_DEPTH, max_pages: int = DEFAULT_MAX_PAGES,
+          concurrency: int = DEFAULT_CONCURRENCY,
+          on_page: Optional[Callable[[Dict], None]] = None, cache: str = None) -> List[Dict]:
+    """
+    Crawl the navigation graph of a file, breadth first.
+
+    Pages are deduplicated on (fileId, layerId). Each link of a page is
+    tagged with a status:
+      - queued:      first time seen, scheduled for fetching
+      - visited:     already fetched or scheduled from another page
+      - cycle:       points back to the page itself or one of its ancestors
+      - depth-limit: not followed because max_depth was reached
+      - page-limit:  not followed because max_pages was reached
+
+    Args:
+        file_id: File ID of the entry page
+        layer_id: Layer ID of the entry page
+        token: API Token (optional, defaults to MASTERGO_TOKEN env var)
+        endpoint: API endpoint (optional, defaults to MASTERGO_ENDPOINT env var)
+        max_depth: Maximum navigation depth (entry page is depth 0)
+        max_pages: Maximum number of pages to fetch
+        concurrency: Maximum number of requests in flight
+        on_page: Callback invoked with each page record as it finishes. The
+                 returned records then leave out "result", so a large crawl
+                 does not keep every DSL in memory.
+        cache: Cache mode passed to get_dsl ('use', 'off' or 'refresh')
+
+    Returns:
+        List of page records in completion order
+    """
+    start = (file_id, layer_id)
+    seen = {start}
+    # Ancestor chain of every scheduled page, used for cycle detection
+    parents = {start: None}
+    queue = deque([(start, 0)])
+    pages = []
+
+    def ancestors(key: Tuple[str, str]) -> set:
+        chain = set()
+        while key is not None and key not in chain:
+            chain.add(key)
+            key = parents[key]
+        return chain
+
+    def fetch(key: Tuple[str, str]) -> Dict:
+        return get_dsl(key[0], key[1], token, endpoint, cache)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        in_flight = {}
+        while queue or in_flight:
+            # Keep the pool full, oldest (shallowest) pages first
+            while queue and len(in_flight) < max(1, concurrency):
+                key, depth = queue.popleft()
+                in_flight[executor.submit(fetch, key)] = (key, depth)
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                key, depth = in_flight.pop(future)
+                parent = parents[key]
+                record = {
+                    'fileId': key[0],
+                    'layerId': key[1],
+                    'depth': depth,
+                    'parentLayerId': parent[1] if parent else None,
+                }
+
+                try:
+                    result = future.result()
+                except ValueError as e:
+                    record['error'] = str(e)
+                    pages.append(record)
+                    if on_page:
+                        on_page(record)
+                    continue
+
+                links = []
+                path = ancestors(key)
+                for nav in extract_navigations(result):
+                    target = (key[0], nav['targetLayerId'])
+                    if target in path:
+                        status = 'cycle'
+                    elif target in seen:
+                        status = 'visited'
+                    elif depth + 1 > max_depth:
+                        status = 'depth-limit'
+                    elif len(seen) >= max_pages:
+                        status = 'page-limit'
+                    else:
+                        status = 'queued'
+                        seen.add(target)
+                        parents[target] = key
+                        queue.append((target, depth + 1))
+                    links.append(dict(nav, status=status))
+
+                record['navigations'] = links
+                record['result'] = result
+                if on_page:
+                    on_page(record)
+                    del record['result']
+                pages.append(record)
+
+    return pages
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Crawl MasterGo pages by following navigation targets',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Crawl from URL
+  python mastergo_crawl.py "https://mastergo.com/goto/xxx"
+
+  # Crawl from fileId and layerId with limits
+  python mastergo_crawl.py --file-id 123456 --layer-id "0:1" --max-depth 2 --max-pages 20
+
+  # Page graph only (omit DSL payloads)
+  python mastergo_crawl.py URL --no-dsl
+
+Output:
+  One JSON record per page (NDJSON), written as each page finishes:
+  {"fileId", "layerId", "depth", "parentLayerId", "navigations", "result"}
+  Failed pages carry an "error" field instead of "navigations"/"result".
+'''
+    )
+
+    parser.add_argument('url', nargs='?', help='MasterGo URL or short link of the entry page')
+    parser.add_argument('--file-id', '-f', help='File ID')
+    parser.add_argument('--layer-id', '-l', help='Layer ID')
+    parser.add_argument('--token', '-t', help='API Token (defaults to MASTERGO_TOKEN)')
+    parser.add_argument('--endpoint', '-e', help='API endpoint (defaults to MASTERGO_ENDPOINT)')
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH,
+                        help=f'Maximum navigation depth (default: {DEFAULT_MAX_DEPTH})')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help=f'Maximum number of pages (default: {DEFAULT_MAX_PAGES})')
+    parser.add_argument('--concurrency', '-c', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Concurrent requests (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--no-dsl', action='store_true',
+                        help='Omit DSL payloads, output the page graph only')
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    def emit(record: Dict) -> None:
+        if args.no_dsl:
+            record = {k: v for k, v in record.items() if k != 'result'}
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+
+    try:
+        if args.url:
+            file_id, layer_id = extract_ids_from_url(args.url, args.cache)
+        elif args.file_id and args.layer_id:
+            file_id, layer_id = args.file_id, args.layer_id
+        else:
+            parser.error('Please provide URL or --file-id and --layer-id')
+
+        pages = crawl(file_id, layer_id, args.token, args.endpoint,
+                      max_depth=args.max_depth, max_pages=args.max_pages,
+                      concurrency=args.concurrency, on_page=emit, cache=args.cache)
+
+        errors = [p for p in pages if 'error' in p]
+        print(f"Crawled {len(pages)} pages ({len(errors)} failed)", file=sys.stderr)
+        # Fail when the entry page itself could not be fetched
+        if pages and pages[0]['depth'] == 0 and 'error' in pages[0]:
+            print(f"Error: {pages[0]['error']}", file=sys.stderr)
+            sys.exit(1)
+
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,749 @@
+#!/usr/bin/env python3
+"""
+MasterGo local daemon.
+
+A long-running process that serves the analyze, get_dsl, fetch_docs and
+utils CLIs (extraction and query) over a Unix domain socket. It keeps the
+modules imported, HTTP(S) connections open, and parsed DSL, node indexes
+and fetched docs in an in-memory LRU (see mastergo_cache.MemoryCache), so
+repeated calls skip process start-up, TLS handshakes and JSON parsing.
+
+While it runs, the CLIs hand their invocation to it transparently: the
+command line, environment (MASTERGO_*, RULES, proxies), working directory
+and the stdin/stdout/stderr file descriptors are passed over the socket,
+the daemon runs the CLI on them and the client exits with its status.
+Output is the same as a local run, and interrupting the client (Ctrl-C)
+cancels the run in the daemon at its next safe point (see mastergo_cancel).
+The CLI runs locally instead when:
+
+  - no daemon is running, or MASTERGO_DAEMON=0
+  - the daemon is busy with another run (runs are serialized)
+  - --profile is given (it profiles the calling process)
+  - a setting read once per process differs from the daemon's
+    (MASTERGO_CACHE_DIR, MASTERGO_CACHE_TTL, MASTERGO_RETRIES, ...)
+  - the scripts changed since the daemon started (it then exits)
+
+The socket lives in the cache directory inside the skill directory and is
+only accessible to the current user. The daemon exits after an idle
+period (default 30 minutes). Not available on platforms without Unix
+domain sockets.
+
+Environment Variables:
+  MASTERGO_DAEMON         Set to 0/off to never use the daemon
+  MASTERGO_DAEMON_SOCKET  Socket path (default: {skill_dir}/.cache/daemon.sock)
+
+Usage:
+  # Start in the background, check, stop
+  python mastergo_daemon.py start
+  python mastergo_daemon.py status
+  python mastergo_daemon.py stop
+
+  # Run in the foreground
+  python mastergo_daemon.py serve --idle-timeout 0
+
+  # The CLIs use it when it is running
+  python mastergo_analyze.py "https://mastergo.com/goto/LhGgBAK"
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import array
+import io
+import json
+import os
+import select
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+# Imported when a CLI starts: the client side stays clear of the heavier sibling modules
+SKILL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_DIR = os.path.join(SKILL_DIR, '.cache')  # as mastergo_cache.get_cache_dir()
+
+PROTOCOL_VERSION = 1
+SCRIPTS = ('mastergo_analyze', 'mastergo_get_dsl', 'mastergo_fetch_docs', 'mastergo_utils')
+SOCKET_NAME = 'daemon.sock'  # in the cache directory
+LOG_NAME = 'daemon.log'
+DEFAULT_IDLE_TIMEOUT = 1800  # seconds without runs before the daemon exits (0: never)
+CONNECT_TIMEOUT = 1.0        # seconds
+START_TIMEOUT = 15.0         # seconds to wait for a started daemon to answer
+STOP_TIMEOUT = 10.0          # seconds to wait for a stopped daemon to go away
+CONTROL_TIMEOUT = 10.0       # seconds to wait for status / stop answers (a run can hold the GIL in C)
+BUFFER_SIZE = 65536
+WATCH_INTERVAL = 0.2         # seconds between checks that the client of a run is still there
+
+# Read once per process (cache and policy setup); runs with other values fall back to local
+CONFIG_ENV = ('MASTERGO_CACHE_DIR', 'MASTERGO_CACHE_TTL', 'MASTERGO_CACHE_MAX_BYTES', 'MASTERGO_GOTO_TTL',
+              'MASTERGO_RETRIES', 'MASTERGO_RATE_LIMIT', 'MASTERGO_RATE_BURST')
+
+
+def _forwarded(name: str) -> bool:
+    """Environment variables passed from the client to each run."""
+    return name.startswith('MASTERGO_') or name == 'RULES' or name.lower().endswith('_proxy')
+
+
+def _disabled() -> bool:
+    return os.environ.get('MASTERGO_DAEMON', '1').strip().lower() in ('0', 'off', 'false', 'no')
+
+
+def get_socket_path() -> str:
+    """Socket path from MASTERGO_DAEMON_SOCKET, default in the cache directory."""
+    return os.environ.get('MASTERGO_DAEMON_SOCKET') or os.path.join(_cache_dir(), SOCKET_NAME)
+
+
+def _cache_dir() -> str:
+    return os.environ.get('MASTERGO_CACHE_DIR') or DEFAULT_CACHE_DIR
+
+
+# =============================================================================
+# Protocol
+# =============================================================================
+# One JSON line per request and per reply. A run request carries the
+# client's stdin, stdout and stderr as SCM_RIGHTS file descriptors.
+
+def _connect(path: str, timeout: float = CONNECT_TIMEOUT) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _send(sock: socket.socket, message: Dict[str, Any], fds: List[int] = None) -> None:
+    data = json.dumps(message).encode('utf-8') + b'\n'
+    if fds:
+        sent = sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+        data = data[sent:]
+    if data:
+        # Not even an empty send after the whole request: the daemon may have answered and closed
+        sock.sendall(data)
+
+
+def _receive(sock: socket.socket, max_fds: int = 0) -> Tuple[Optional[Dict[str, Any]], List[int]]:
+    """Read one message (None when the peer closed first) and the descriptors sent with it."""
+    fds = array.array('i')
+    if max_fds:
+        data, ancdata, _, _ = sock.recvmsg(BUFFER_SIZE, socket.CMSG_SPACE(max_fds * fds.itemsize))
+        for level, kind, payload in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(payload[:len(payload) - len(payload) % fds.itemsize])
+    else:
+        data = sock.recv(BUFFER_SIZE)
+    chunks = [data]
+    while data and b'\n' not in data:
+        data = sock.recv(BUFFER_SIZE)
+        chunks.append(data)
+    line = b''.join(chunks)
+    if not line.endswith(b'\n'):
+        return None, list(fds)
+    try:
+        message = json.loads(line)
+    except ValueError:
+        message = None
+    return (message if isinstance(message, dict) else None), list(fds)
+
+
+def call(command: str, path: str = None, timeout: float = CONNECT_TIMEOUT, **fields) -> Optional[Dict[str, Any]]:
+    """Send a control command (ping, stats, clear, shutdown); None when no daemon answers."""
+    try:
+        sock = _connect(path or get_socket_path(), timeout)
+    except (OSError, AttributeError):
+        return None
+    try:
+        _send(sock, dict(fields, command=command, version=PROTOCOL_VERSION))
+        return _receive(sock)[0]
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+
+# =============================================================================
+# Client Shim
+# =============================================================================
+
+def run_in_daemon(script: str) -> None:
+    """
+    Run this CLI invocation (sys.argv) of `script` in the daemon.
+
+    Exits the process with the run's status when the daemon served it;
+    returns when the CLI should run locally.
+    """
+    if _disabled() or not hasattr(socket, 'AF_UNIX') or not hasattr(socket.socket, 'sendmsg'):
+        return
+    argv = sys.argv[1:]
+    if any(arg == '--profile' or arg.startswith('--profile=') for arg in argv):
+        return
+    path = get_socket_path()
+    if not os.path.exists(path):
+        return
+    request = {
+        'command': 'run',
+        'version': PROTOCOL_VERSION,
+        'script': script,
+        'argv': argv,
+        'cwd': os.getcwd(),
+        'env': {name: value for name, value in os.environ.items() if _forwarded(name)},
+        'streams': [[stream.encoding, stream.errors] if stream else None
+                    for stream in (sys.stdin, sys.stdout, sys.stderr)],
+    }
+    try:
+        sock = _connect(path)
+        _send(sock, request, [0, 1, 2])
+    except OSError:
+        return
+    try:
+        sock.settimeout(None)
+        reply = _receive(sock)[0]
+    except KeyboardInterrupt:
+        sys.exit(130)
+    except OSError:
+        reply = None
+    finally:
+        sock.close()
+
+    if reply is None:
+        print("Error: mastergo daemon stopped during the run", file=sys.stderr)
+        sys.exit(1)
+    if 'exit' in reply:
+        sys.exit(reply['exit'])
+    # Declined (fallback): run locally
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+def _scripts_mtime() -> float:
+    directory = os.path.dirname(os.path.abspath(__file__))
+    latest = 0.0
+    for entry in os.scandir(directory):
+        if entry.name.startswith('mastergo_') and entry.name.endswith('.py'):
+            latest = max(latest, entry.stat().st_mtime)
+    return latest
+
+
+def _exit_status(code: Any) -> int:
+    """Process exit status for SystemExit(code), printing a message code like Python does."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _open_streams(fds: List[int], settings: List[Any]) -> List[io.TextIOWrapper]:
+    """
+    Text streams like the client's stdin, stdout and stderr over their descriptors.
+
+    The streams do not close the descriptors; the request handler does.
+    """
+    settings = [item or [None, None] for item in (list(settings or []) + [None] * 3)[:3]]
+    streams = []
+    for index, (fd, (encoding, errors)) in enumerate(zip(fds, settings)):
+        if index == 0:
+            streams.append(io.open(fd, 'r', encoding=encoding or 'utf-8', errors=errors or 'strict',
+                                   closefd=False))
+        else:
+            # stderr as Python sets it up: line buffered, never failing on encoding
+            line_buffered = index == 2 or os.isatty(fd)
+            streams.append(io.open(fd, 'w', buffering=1 if line_buffered else -1, encoding=encoding or 'utf-8',
+                                   errors='backslashreplace' if index == 2 else errors or 'strict',
+                                   closefd=False))
+    return streams
+
+
+class _ClientWatch:
+    """
+    Cancels the current run when its client disconnects.
+
+    The client only closes the socket before the reply when it is gone
+    (Ctrl-C, killed). Cancellation is cooperative (see mastergo_cancel):
+    the run stops at its next check, between requests, body reads or
+    nodes, so it never leaves a lock held or a half-read connection in
+    the pool. A run blocked in a read notices it when the read returns.
+    """
+
+    def __init__(self, sock: socket.socket):
+        import mastergo_cancel
+
+        self._cancel = mastergo_cancel
+        self._sock = sock
+        self._lock = threading.Lock()
+        self._active = True
+        mastergo_cancel.reset()
+        threading.Thread(target=self._watch, name='mastergo-daemon-client', daemon=True).start()
+
+    def _watch(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    return
+            try:
+                readable, _, _ = select.select([self._sock], [], [], WATCH_INTERVAL)
+                if not readable:
+                    continue
+                gone = not self._sock.recv(1, socket.MSG_PEEK)
+            except (OSError, ValueError):
+                gone = True
+            with self._lock:
+                if gone and self._active:
+                    self._cancel.cancel()
+            return
+
+    def stop(self) -> None:
+        """The run is over: no cancellation from now on, a pending one is cleared."""
+        with self._lock:
+            self._active = False
+            self._cancel.reset()
+
+
+class _RunStream:
+    """
+    sys.stdin / stdout / stderr while a run is active.
+
+    The run's thread and the threads it starts use the client's stream. The
+    daemon's other threads (control connections, declined runs, pool threads
+    left over from earlier runs) keep the daemon's own, so their output never
+    reaches the client.
+    """
+
+    def __init__(self, server: 'DaemonServer', client, own):
+        self._server = server
+        self._client = client
+        self._own = own
+
+    def _target(self):
+        return self._client if self._server.in_run() else self._own
+
+    def write(self, data: str) -> int:
+        return self._target().write(data)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+
+def _log(message: str) -> None:
+    """Daemon diagnostics: to the daemon's own stderr (its log), never a client's."""
+    print(message, file=sys.__stderr__, flush=True)
+
+
+# Without AF_UNIX (Windows) the class is still defined, serve() refuses to start
+_UnixStreamServer = getattr(socketserver, 'UnixStreamServer', socketserver.TCPServer)
+
+
+class DaemonServer(socketserver.ThreadingMixIn, _UnixStreamServer):
+    """Unix socket server running the CLIs in-process, one run at a time."""
+
+    daemon_threads = True
+
+    def __init__(self, path: str, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.last_active = self.started
+        self.runs = 0
+        self.fallbacks = 0
+        self.per_script = {name: 0 for name in SCRIPTS}
+        self.config = {name: os.environ.get(name) for name in CONFIG_ENV}
+        self.scripts_mtime = _scripts_mtime()
+        self._run_lock = threading.Lock()
+        self._run = None  # (thread ident, idents of threads alive before it) of the active run
+        self._connections = set()  # idents of threads handling a connection
+        self._stopping = threading.Event()
+        super().__init__(path, _Handler)
+
+    def stop(self) -> None:
+        """Stop serving (from any thread but the serving one)."""
+        if not self._stopping.is_set():
+            self._stopping.set()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def in_run(self) -> bool:
+        """Whether the calling thread belongs to the active run (its own or one it started)."""
+        run = self._run
+        if run is None:
+            return False
+        ident = threading.get_ident()
+        run_ident, before = run
+        return ident == run_ident or (ident not in before and ident not in self._connections)
+
+    def watch_idle(self) -> None:
+        """Stop after idle_timeout seconds without runs (call in a thread)."""
+        if not self.idle_timeout:
+            return
+        while not self._stopping.wait(min(60.0, max(1.0, self.idle_timeout / 4))):
+            if not self._run_lock.locked() and time.time() - self.last_active > self.idle_timeout:
+                _log(f"Idle for {self.idle_timeout:g}s, exiting")
+                self.stop()
+
+    def handle_message(self, message: Dict[str, Any], fds: List[int], sock: socket.socket) -> Dict[str, Any]:
+        command = message.get('command')
+        if message.get('version') != PROTOCOL_VERSION:
+            return {'error': f"protocol version {message.get('version')} not supported"}
+        if command == 'run':
+            return self.run(message, fds, sock)
+        if command == 'ping':
+            return {'ok': True, 'pid': os.getpid()}
+        if command == 'stats':
+            return dict(self.stats(), ok=True)
+        if command == 'clear':
+            return dict(self.clear_memory(), ok=True)
+        if command == 'shutdown':
+            self.stop()
+            return {'ok': True, 'pid': os.getpid()}
+        return {'error': f"unknown command: {command}"}
+
+    def stats(self) -> Dict[str, Any]:
+        from mastergo_cache import get_memory_cache
+        from mastergo_policy import policy_stats
+
+        memory = get_memory_cache()
+        return {
+            'pid': os.getpid(),
+            'socket': self.path,
+            'uptime': round(time.time() - self.started, 3),
+            'idleTimeout': self.idle_timeout,
+            'busy': self._run_lock.locked(),
+            'runs': self.runs,
+            'fallbacks': self.fallbacks,
+            'scripts': dict(self.per_script),
+            'memory': memory.stats if memory is not None else None,
+            'policies': policy_stats(),
+        }
+
+    def clear_memory(self) -> Dict[str, Any]:
+        """Drop the in-memory cache (mastergo_cache.py clear); on-disk caches are re-read on change."""
+        from mastergo_cache import get_memory_cache
+
+        memory = get_memory_cache()
+        if memory is None:
+            return {'entries': 0}
+        entries = memory.stats['entries']
+        memory.clear()
+        return {'entries': entries}
+
+    def _decline(self, reason: str) -> Dict[str, Any]:
+        self.fallbacks += 1
+        return {'fallback': reason}
+
+    def run(self, message: Dict[str, Any], fds: List[int], sock: socket.socket) -> Dict[str, Any]:
+        import importlib
+
+        script = message.get('script')
+        if script not in SCRIPTS or len(fds) != 3:
+            return {'error': 'invalid run request'}
+        env = message.get('env') or {}
+        if any(env.get(name) != value for name, value in self.config.items()):
+            return self._decline('settings differ from the daemon')
+        if _scripts_mtime() != self.scripts_mtime:
+            _log("Scripts changed, exiting")
+            self.stop()
+            return self._decline('scripts changed')
+        if not self._run_lock.acquire(blocking=False):
+            return self._decline('busy')
+        try:
+            self.last_active = time.time()
+            status = self._run_script(importlib.import_module(script), message, fds, sock)
+            self.runs += 1
+            self.per_script[script] += 1
+            return {'exit': status}
+        finally:
+            self.last_active = time.time()
+            self._run_lock.release()
+
+    def _run_script(self, module, message: Dict[str, Any], fds: List[int], sock: socket.socket) -> int:
+        """
+        Run module.main() with the client's argv, environment, cwd and streams.
+
+        These are process globals, swapped for the duration of the run (runs
+        are serialized). The daemon's other threads do not read argv, the
+        environment or relative paths, and _RunStream keeps their output on
+        the daemon's own streams.
+        """
+        import mastergo_timing
+
+        try:
+            streams = _open_streams(fds, message.get('streams'))
+        except (OSError, ValueError, LookupError) as e:
+            raise ValueError(f"cannot open client streams: {e}")
+        env = message.get('env') or {}
+        saved_env = {name: os.environ.get(name) for name in set(env) | set(filter(_forwarded, os.environ))}
+        saved = (sys.argv, sys.stdin, sys.stdout, sys.stderr, os.getcwd(), mastergo_timing._hooks)
+        try:
+            for name in saved_env:
+                if name in env:
+                    os.environ[name] = env[name]
+                else:
+                    os.environ.pop(name, None)
+            sys.argv = [module.__file__] + list(message.get('argv') or [])
+            self._run = (threading.get_ident(), {thread.ident for thread in threading.enumerate()})
+            sys.stdin, sys.stdout, sys.stderr = (_RunStream(self, stream, own)
+                                                 for stream, own in zip(streams, saved[1:4]))
+            try:
+                watch = _ClientWatch(sock)
+                try:
+                    os.chdir(message.get('cwd') or '/')
+                    module.main()
+                    status = 0
+                finally:
+                    watch.stop()
+            except SystemExit as e:
+                status = _exit_status(e.code)
+            except KeyboardInterrupt:
+                status = 130
+            except Exception:
+                traceback.print_exc()
+                status = 1
+            for stream in streams[1:]:
+                try:
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+            return status
+        finally:
+            self._run = None
+            sys.argv, sys.stdin, sys.stdout, sys.stderr, cwd, mastergo_timing._hooks = saved
+            os.chdir(cwd)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+            for stream in streams:
+                try:
+                    stream.close()
+                except (OSError, ValueError):
+                    pass
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        ident = threading.get_ident()
+        self.server._connections.add(ident)
+        try:
+            self._handle()
+        finally:
+            self.server._connections.discard(ident)
+
+    def _handle(self) -> None:
+        try:
+            message, fds = _receive(self.request, max_fds=3)
+        except OSError:
+            return
+        try:
+            reply = self.server.handle_message(message, fds, self.request) if message is not None else None
+        except ValueError as e:
+            reply = {'error': str(e)}
+        except Exception as e:
+            # Failed before the CLI ran (its own errors are handled in the run): it runs locally
+            traceback.print_exc(file=sys.__stderr__)
+            reply = {'error': f"internal error: {e}"}
+        finally:
+            # Closed before replying: the client's readers see EOF when it exits
+            for fd in fds:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        if reply is not None:
+            try:
+                _send(self.request, reply)
+            except OSError:
+                pass
+
+
+def _preload(memory_bytes: int = None) -> None:
+    """Import the served modules and create the shared clients up front."""
+    import importlib
+    from mastergo_cache import enable_memory_cache, get_dsl_cache, get_short_link_cache
+    from mastergo_http import get_transport
+
+    for script in SCRIPTS:
+        importlib.import_module(script)
+    enable_memory_cache(memory_bytes)
+    get_dsl_cache()
+    get_short_link_cache()
+    get_transport()
+
+
+def serve(path: str = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, memory_bytes: int = None) -> None:
+    """Serve in the foreground until stopped, idle or interrupted."""
+    import signal
+
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError("Unix domain sockets are not available on this platform")
+    path = path or get_socket_path()
+    reply = call('ping', path)
+    if reply:
+        raise ValueError(f"Daemon already running (pid {reply.get('pid')}) on {path}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)  # stale socket of a daemon that did not exit cleanly
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    _preload(memory_bytes)
+    umask = os.umask(0o177)  # socket accessible to the current user only
+    try:
+        server = DaemonServer(path, idle_timeout)
+    except OSError as e:
+        raise ValueError(f"Cannot listen on {path} - {e}")
+    finally:
+        os.umask(umask)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+    threading.Thread(target=server.watch_idle, name='mastergo-daemon-idle', daemon=True).start()
+    _log(f"mastergo daemon {os.getpid()} listening on {path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            if os.path.exists(path):
+                os.unlink(path)
+        except OSError:
+            pass
+        _log(f"mastergo daemon {os.getpid()} stopped")
+
+
+def start(path: str = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT, memory_bytes: int = None) -> int:
+    """Start the daemon in the background; returns its pid."""
+    import subprocess
+
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError("Unix domain sockets are not available on this platform")
+    path = path or get_socket_path()
+    reply = call('ping', path)
+    if reply:
+        raise ValueError(f"Daemon already running (pid {reply.get('pid')}) on {path}")
+
+    command = [sys.executable, os.path.abspath(__file__), 'serve', '--socket', path,
+               '--idle-timeout', str(idle_timeout)]
+    if memory_bytes is not None:
+        command += ['--memory-bytes', str(memory_bytes)]
+    # Tokens come with each run; the daemon itself does not keep one
+    env = {name: value for name, value in os.environ.items() if name != 'MASTERGO_TOKEN'}
+    log_dir = _cache_dir()
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, LOG_NAME)
+    with open(log_path, 'ab') as log:
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=log, env=env,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), start_new_session=True)
+
+    deadline = time.time() + START_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise ValueError(f"Daemon exited with status {process.returncode}, see {log_path}")
+        if call('ping', path):
+            return process.pid
+        time.sleep(0.05)
+    raise ValueError(f"Daemon did not answer within {START_TIMEOUT:g}s, see {log_path}")
+
+
+def stop(path: str = None) -> Optional[int]:
+    """Stop a running daemon; returns its pid, or None when none was running."""
+    path = path or get_socket_path()
+    reply = call('shutdown', path, CONTROL_TIMEOUT)
+    if not reply:
+        return None
+    deadline = time.time() + STOP_TIMEOUT
+    while time.time() < deadline and os.path.exists(path):
+        time.sleep(0.05)
+    return reply.get('pid')
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _format_bytes(size: int) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Local daemon keeping MasterGo caches and connections warm',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Start in the background; the CLIs then run in it transparently
+  python mastergo_daemon.py start
+  python mastergo_get_dsl.py "https://mastergo.com/goto/LhGgBAK"
+
+  # Counters, memory cache and request policy stats
+  python mastergo_daemon.py status --json
+
+  # Stop it (it also exits after --idle-timeout seconds without runs)
+  python mastergo_daemon.py stop
+
+Set MASTERGO_DAEMON=0 to run a CLI locally while the daemon is up.
+'''
+    )
+    parser.add_argument('command', choices=['start', 'stop', 'status', 'serve'],
+                        help='start in the background, stop, show status, or serve in the foreground')
+    parser.add_argument('--socket', metavar='PATH', help='Socket path (default: MASTERGO_DAEMON_SOCKET or '
+                                                         'daemon.sock in the cache directory)')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT, metavar='SECONDS',
+                        help=f'Exit after this long without runs, 0 to never (default: {DEFAULT_IDLE_TIMEOUT})')
+    parser.add_argument('--memory-bytes', type=int, metavar='N',
+                        help='Source bytes of parsed DSL and docs kept in memory (default: 64 MiB)')
+    parser.add_argument('--json', action='store_true', help='status: JSON output')
+
+    args = parser.parse_args()
+    if args.idle_timeout < 0:
+        parser.error('--idle-timeout must not be negative')
+    path = args.socket or get_socket_path()
+
+    try:
+        if args.command == 'serve':
+            serve(path, args.idle_timeout, args.memory_bytes)
+        elif args.command == 'start':
+            pid = start(path, args.idle_timeout, args.memory_bytes)
+            print(f"Daemon started (pid {pid}) on {path}")
+        elif args.command == 'stop':
+            pid = stop(path)
+            print(f"Daemon stopped (pid {pid})" if pid else "Daemon not running")
+        else:
+            stats = call('stats', path, CONTROL_TIMEOUT)
+            if not stats:
+                if args.json:
+                    print(json.dumps({'running': False}))
+                else:
+                    print(f"Daemon not running ({path})")
+                sys.exit(1)
+            stats.pop('ok', None)
+            if args.json:
+                print(json.dumps(dict(stats, running=True), indent=2))
+                return
+            print(f"Daemon: pid {stats['pid']}, up {stats['uptime']:.0f}s, socket {stats['socket']}"
+                  f"{' (busy)' if stats['busy'] else ''}")
+            print(f"Runs: {stats['runs']} ({stats['fallbacks']} handed back to the CLI)")
+            memory = stats.get('memory')
+            if memory:
+                print(f"Memory cache: {memory['entries']} entries, {_format_bytes(memory['bytes'])} of "
+                      f"{_format_bytes(memory['maxBytes'])}, {memory['hits']} hits, {memory['misses']} misses")
+            for endpoint, policy in sorted(stats.get('policies', {}).items()):
+                print(f"  {endpoint}: {policy.get('requests', 0)} requests, {policy.get('retries', 0)} retries")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+MasterGo DSL diff.
+
+Compare two versions of a DSL response and report what changed:
+
+- added / removed:  nodes only in the new / old version (nested additions
+                    and removals are folded into their topmost node)
+- moved:            nodes whose parent changed
+- modified:         nodes whose id, type, name, characters, style or layout
+                    changed, or whose children were reordered
+
+Every subtree gets a Merkle hash, computed bottom-up from the node's own
+fields and its children's hashes. Both trees are walked top-down and a
+subtree whose hash is unchanged is skipped as a whole, so the comparison
+work follows the size of the change rather than the size of the page.
+Nodes are matched by id; nodes without an id by position among their
+id-less siblings.
+
+Usage:
+  # Two saved responses (JSON files, snapshots or "-" for stdin)
+  python mastergo_diff.py old.json new.json
+
+  # What changed since the cached version of a page (refetches it)
+  python mastergo_diff.py "https://mastergo.com/goto/xxx"
+
+  # As module
+  from mastergo_diff import diff_dsl, subtree_hashes
+  report = diff_dsl(old_dsl, new_dsl)
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Import from sibling module
+try:
+    from mastergo_cache import get_dsl_cache, CACHE_REFRESH
+    from mastergo_get_dsl import build_dsl_response, extract_ids_from_url, get_dsl, get_endpoint, get_token
+    from mastergo_snapshot import MAGIC, Snapshot
+    from mastergo_utils import DSLIndex
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cache import get_dsl_cache, CACHE_REFRESH
+    from mastergo_get_dsl import build_dsl_response, extract_ids_from_url, get_dsl, get_endpoint, get_token
+    from mastergo_snapshot import MAGIC, Snapshot
+    from mastergo_utils import DSLIndex
+
+# Node fields covered by the hashes (and reported as changes)
+HASHED_FIELDS = ('id', 'type', 'name', 'characters', 'style', 'layout')
+
+DIGEST_SIZE = 16
+
+_dump = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), sort_keys=True,
+                         check_circular=False, default=dict).encode
+
+
+# =============================================================================
+# Hashing
+# =============================================================================
+
+def hash_index(index: DSLIndex) -> Tuple[Dict[str, bytes], Dict[str, bytes]]:
+    """
+    Hash every node of an index.
+
+    Returns:
+        (subtree hashes, own hashes): key -> digest. The own hash covers
+        HASHED_FIELDS; the subtree hash also covers the children's subtree
+        hashes, in order.
+    """
+    subtree = {}
+    own = {}
+    nodes, children = index.nodes, index.children
+    # Reverse pre-order: children are hashed before their parent
+    for key in reversed(index.order):
+        node = nodes[key]
+        digest = own[key] = hashlib.blake2b(
+            _dump([node.get(field) for field in HASHED_FIELDS]).encode('utf-8', 'surrogatepass'),
+            digest_size=DIGEST_SIZE).digest()
+        h = hashlib.blake2b(digest, digest_size=DIGEST_SIZE)
+        for child in children[key]:
+            h.update(subtree[child])
+        subtree[key] = h.digest()
+    return subtree, own
+
+
+def subtree_hashes(dsl_data: Union[Dict[str, Any], DSLIndex]) -> Dict[str, str]:
+    """
+    Hex subtree hash of every node, keyed like DSLIndex (node id).
+
+    Equal hashes mean equal subtrees (same fields, same children, in order).
+
+    Example:
+        >>> subtree_hashes(dsl_response)['1:12']
+        '5f0c1d6e0c7a4f3b9d2e8a61c4b7f0aa'
+    """
+    index = dsl_data if isinstance(dsl_data, DSLIndex) else DSLIndex(dsl_data)
+    return {key: digest.hex() for key, digest in hash_index(index)[0].items()}
+
+
+# =============================================================================
+# Diff
+# =============================================================================
+
+class _Side:
+    """One version: index, hashes and id-based lookups."""
+
+    def __init__(self, dsl_data: Union[Dict[str, Any], DSLIndex]):
+        self.index = dsl_data if isinstance(dsl_data, DSLIndex) else DSLIndex(dsl_data)
+        self.subtree, self.own = hash_index(self.index)
+
+    def real_id(self, key: str) -> Optional[str]:
+        """The node's id if it is its index key (not a synthetic or duplicate key)."""
+        return key if self.index.nodes[key].get('id') == key else None
+
+    def parent_id(self, key: str) -> Optional[str]:
+        parent = self.index.parents[key]
+        return None if parent is None else self.index.nodes[parent].get('id')
+
+    def describe(self, key: str) -> Dict[str, Any]:
+        node = self.index.nodes[key]
+        return {'id': node.get('id'), 'name': node.get('name'), 'type': node.get('type')}
+
+
+def _pair_idless(old: _Side, new: _Side, old_keys: List[str], new_keys: List[str],
+                 pairs: Dict[str, str]) -> None:
+    """Pair nodes without an id by their position among id-less siblings."""
+    old_idless = [key for key in old_keys if old.real_id(key) is None]
+    new_idless = [key for key in new_keys if new.real_id(key) is None]
+    for old_key, new_key in zip(old_idless, new_idless):
+        pairs[new_key] = old_key
+
+
+def diff_dsl(old_data: Union[Dict[str, Any], DSLIndex],
+             new_data: Union[Dict[str, Any], DSLIndex]) -> Dict[str, Any]:
+    """
+    Structural diff of two DSL responses (or DSLIndexes).
+
+    Returns:
+        {
+          'summary': {'oldNodes', 'newNodes', 'unchanged', 'added', 'removed', 'moved', 'modified'},
+          'added':    [{'id', 'name', 'type', 'parentId', 'size'}],
+          'removed':  [{'id', 'name', 'type', 'parentId', 'size'}],
+          'moved':    [{'id', 'name', 'type', 'from', 'to'}],
+          'modified': [{'id', 'name', 'type', 'changes': [field, ..., 'childOrder']}],
+        }
+        `size` counts the nodes of a folded added/removed subtree; `from`
+        and `to` are parent ids. Lists are in document order.
+    """
+    old, new = _Side(old_data), _Side(new_data)
+    pairs = {}  # new key -> old key, for nodes without an id
+    _pair_idless(old, new, old.index.roots, new.index.roots, pairs)
+
+    def match(new_key):
+        new_id = new.real_id(new_key)
+        if new_id is None:
+            return pairs.get(new_key)
+        return new_id if new_id in old.index.nodes and old.real_id(new_id) else None
+
+    added, moved, modified = [], [], []
+    matched_old = set()
+    identical_old = set()
+    unchanged = 0
+
+    # New version, top-down. Stack entries: (key, added entry of its parent if the parent was added)
+    stack = [(key, None) for key in reversed(new.index.roots)]
+    while stack:
+        key, parent_added = stack.pop()
+        old_key = match(key)
+        if old_key is None:
+            if parent_added is not None:
+                parent_added['size'] += 1
+                entry = parent_added
+            else:
+                entry = dict(new.describe(key), parentId=new.parent_id(key), size=1)
+                added.append(entry)
+            stack.extend((child, entry) for child in reversed(new.index.children[key]))
+            continue
+
+        matched_old.add(old_key)
+        new_parent = new.index.parents[key]
+        if old.index.parents[old_key] != (None if new_parent is None else match(new_parent)):
+            moved.append(dict(new.describe(key), **{'from': old.parent_id(old_key), 'to': new.parent_id(key)}))
+        if old.subtree[old_key] == new.subtree[key]:
+            # Identical subtree: skip it whole
+            identical_old.add(old_key)
+            unchanged += new.index.subtree_size(key)
+            continue
+
+        changes = []
+        if old.own[old_key] != new.own[key]:
+            old_node, new_node = old.index.nodes[old_key], new.index.nodes[key]
+            changes = [field for field in HASHED_FIELDS if old_node.get(field) != new_node.get(field)]
+        old_children, new_children = old.index.children[old_key], new.index.children[key]
+        _pair_idless(old, new, old_children, new_children, pairs)
+        kept = [match(child) for child in new_children]
+        kept_set = set(kept)
+        old_set = set(old_children)
+        if [child for child in kept if child in old_set] != [child for child in old_children if child in kept_set]:
+            changes.append('childOrder')
+        if changes:
+            modified.append(dict(new.describe(key), changes=changes))
+        stack.extend((child, None) for child in reversed(new_children))
+
+    # Old version, top-down: whatever was not matched was removed
+    removed = []
+    stack = [(key, None) for key in reversed(old.index.roots)]
+    while stack:
+        key, parent_removed = stack.pop()
+        if key in identical_old:
+            continue
+        entry = None
+        if key not in matched_old:
+            if parent_removed is not None:
+                parent_removed['size'] += 1
+                entry = parent_removed
+            else:
+                entry = dict(old.describe(key), parentId=old.parent_id(key), size=1)
+                removed.append(entry)
+        stack.extend((child, entry) for child in reversed(old.index.children[key]))
+
+    return {
+        'summary': {
+            'oldNodes': len(old.index),
+            'newNodes': len(new.index),
+            'unchanged': unchanged,
+            'added': sum(entry['size'] for entry in added),
+            'removed': sum(entry['size'] for entry in removed),
+            'moved': len(moved),
+            'modified': len(modified),
+        },
+        'added': added,
+        'removed': removed,
+        'moved': moved,
+        'modified': modified,
+    }
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _load(source: str, cache: str = None) -> Dict[str, Any]:
+    """DSL from a JSON file, a snapshot file, stdin ('-') or a MasterGo URL."""
+    if source == '-':
+        return json.load(sys.stdin)
+    if '://' in source:
+        file_id, layer_id = extract_ids_from_url(source, cache)
+        return get_dsl(file_id, layer_id, cache=cache)
+    with open(source, 'rb') as f:
+        is_snapshot = f.read(len(MAGIC)) == MAGIC
+    if is_snapshot:
+        return Snapshot(source).document
+    with open(source, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _cached_and_fresh(url: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(cached version, refetched version) of a page."""
+    file_id, layer_id = extract_ids_from_url(url)
+    entry = get_dsl_cache().get(get_endpoint(), file_id, layer_id, get_token())
+    if entry is None:
+        raise ValueError("No cached version of this page to compare with "
+                         "(fetch it once with mastergo_get_dsl.py first)")
+    return build_dsl_response(entry.body), get_dsl(file_id, layer_id, cache=CACHE_REFRESH)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Diff two versions of a MasterGo DSL',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Saved responses: JSON files, snapshots, or - for stdin
+  python mastergo_diff.py old.json new.json
+  python mastergo_get_dsl.py URL | python mastergo_diff.py old.json -
+
+  # Changes since the cached version of a page (refetches and updates the cache)
+  python mastergo_diff.py "https://mastergo.com/goto/xxx"
+
+  # Counts only
+  python mastergo_diff.py old.json new.json --summary
+'''
+    )
+    parser.add_argument('old', help='Old version (file, snapshot, -, or URL alone: cached vs refetched)')
+    parser.add_argument('new', nargs='?', help='New version (file, snapshot, - or URL)')
+    parser.add_argument('--summary', '-s', action='store_true', help='Only print the summary counts')
+    parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
+
+    args = parser.parse_args()
+    if args.old == '-' and args.new == '-':
+        parser.error('only one version can be read from stdin')
+
+    try:
+        if args.new is None:
+            if '://' not in args.old:
+                parser.error('give two versions, or a single URL to compare with its cached version')
+            old, new = _cached_and_fresh(args.old)
+        else:
+            old, new = _load(args.old), _load(args.new)
+        report = diff_dsl(old, new)
+        result = report['summary'] if args.summary else report
+        indent = 2 if args.pretty else None
+        print(json.dumps(result, ensure_ascii=False, indent=indent))
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,70 +12,136 @@ Usage:
   # Fetch all docs from DSL (pipe from get_dsl)
   python mastergo_get_dsl.py URL | python mastergo_fetch_docs.py --from-dsl
   
-  # Fetch multiple URLs
+  # Fetch multiple URLs (concurrently, printed as they complete)
   python mastergo_fetch_docs.py URL1 URL2 URL3
+  
+  # Keep input order
+  python mastergo_fetch_docs.py URL1 URL2 URL3 --ordered
+  
+  # Timing spans per doc (connect, tls, wait, download, doc) on stderr
+  python mastergo_fetch_docs.py URL1 URL2 --timings
 
 Zero dependencies, compatible with Python 3.6+
 """
 
+if __name__ == '__main__':
+    # Hand the run to mastergo_daemon when it is running (before the heavier imports below)
+    try:
+        from mastergo_daemon import run_in_daemon
+        run_in_daemon('mastergo_fetch_docs')
+    except ImportError:
+        pass
+
 import json
 import sys
-import ssl
 import argparse
-from typing import List, Dict
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.error import URLError
+from urllib.parse import urlparse
+
+# Import from sibling modules
+try:
+    from mastergo_cache import get_memory_cache, memoize
+    from mastergo_http import get_transport
+    from mastergo_timing import add_timing_arguments, setup_timings, span
+    from mastergo_utils import extract_component_links
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cache import get_memory_cache, memoize
+    from mastergo_http import get_transport
+    from mastergo_timing import add_timing_arguments, setup_timings, span
+    from mastergo_utils import extract_component_links
 
-REQUEST_TIMEOUT = 30
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
 
 
 def fetch_url(url: str) -> str:
     """Fetch content from URL."""
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
+    headers = {'Accept': 'text/plain, text/markdown, text/html, */*'}
+    memory = get_memory_cache()
+    content = memory.get(('doc', url)) if memory is not None else None
+    if content is not None:
+        return content
     
-    req = Request(url, method='GET')
-    req.add_header('User-Agent', 'MasterGo-DSL-Tool/1.0')
-    req.add_header('Accept', 'text/plain, text/markdown, text/html, */*')
-    
-    try:
-        with urlopen(req, timeout=REQUEST_TIMEOUT, context=ctx) as resp:
-            return resp.read().decode('utf-8')
-    except HTTPError as e:
-        raise ValueError(f"HTTP {e.code} fetching {url}")
-    except URLError as e:
-        raise ValueError(f"Network error fetching {url}: {e.reason}")
+    with span('doc', url=url) as record:
+        try:
+            resp = get_transport().request('GET', url, headers, follow_redirects=True)
+        except URLError as e:
+            raise ValueError(f"Network error fetching {url}: {e.reason}")
+        
+        record['bytes'] = len(resp.body)
+        if resp.status >= 300:
+            raise ValueError(f"HTTP {resp.status} fetching {url}")
+        content = resp.text()
+    if memory is not None:
+        memory.put(('doc', url), content, len(resp.body), expires=True)
+    return content
+
+
+def fetch_urls(urls: List[str], workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+               ordered: bool = False) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Fetch URLs concurrently with a bounded worker pool.
+    
+    At most `workers` requests are in flight overall and at most `per_host`
+    to the same host. Results are yielded as (url, content, error) in
+    completion order, or in input order when `ordered` is set.
+    
+    Example:
+        >>> for url, content, error in fetch_urls(links):
+        ...     print(url, error or len(content))
+    """
+    workers = max(1, workers)
+    per_host = max(1, per_host)
+    pending = deque(enumerate(urls))
+    host_load = {}
+    in_flight = {}
+    buffered = {}
+    next_index = 0
+    
+    def fetch(url: str) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            return fetch_url(url), None
+        except ValueError as e:
+            return None, str(e)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or in_flight:
+            # Schedule URLs whose host has a free slot, keep the others queued
+            deferred = deque()
+            while pending and len(in_flight) < workers:
+                index, url = pending.popleft()
+                host = urlparse(url).netloc
+                if host_load.get(host, 0) >= per_host:
+                    deferred.append((index, url))
+                    continue
+                host_load[host] = host_load.get(host, 0) + 1
+                in_flight[executor.submit(fetch, url)] = (index, url, host)
+            deferred.extend(pending)
+            pending = deferred
+            
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                index, url, host = in_flight.pop(future)
+                host_load[host] -= 1
+                content, error = future.result()
+                if not ordered:
+                    yield url, content, error
+                    continue
+                buffered[index] = (url, content, error)
+                while next_index in buffered:
+                    yield buffered.pop(next_index)
+                    next_index += 1
 
 
 def extract_component_links_from_dsl(dsl_data: Dict) -> List[str]:
     """Extract component doc links from DSL response."""
-    # Handle both wrapped and unwrapped formats
-    if 'componentDocumentLinks' in dsl_data:
-        return dsl_data['componentDocumentLinks']
-    
-    links = set()
-    dsl = dsl_data.get('dsl', dsl_data)
-    
-    def traverse(node):
-        if not node or not isinstance(node, dict):
-            return
-        try:
-            doc_links = node.get('componentInfo', {}).get('componentSetDocumentLink', [])
-            for link in doc_links:
-                if link:
-                    links.add(link)
-        except (TypeError, AttributeError):
-            pass
-        for child in node.get('children', []):
-            traverse(child)
-    
-    for node in dsl.get('nodes', []):
-        traverse(node)
-    if dsl.get('root'):
-        traverse(dsl['root'])
-    
-    return list(links)
+    # Handles both wrapped and unwrapped formats
+    return extract_component_links(dsl_data)
 
 
 def main():
@@ -92,6 +158,12 @@ Examples:
   
   # Output as JSON
   python mastergo_fetch_docs.py URL1 URL2 --json
+  
+  # Print in input order, limit concurrency
+  python mastergo_fetch_docs.py URL1 URL2 --ordered --workers 4 --per-host 2
+  
+  # Where the time goes: JSON timing spans on stderr
+  python mastergo_fetch_docs.py URL1 URL2 --timings
 '''
     )
     
@@ -100,16 +172,28 @@ Examples:
                         help='Read DSL JSON from stdin and extract component links')
     parser.add_argument('--json', action='store_true',
                         help='Output as JSON object with URL keys')
+    parser.add_argument('--ordered', action='store_true',
+                        help='Print docs in input order instead of completion order')
+    parser.add_argument('--workers', '-w', type=int, default=DEFAULT_WORKERS,
+                        help=f'Maximum concurrent requests (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help=f'Maximum concurrent requests per host (default: {DEFAULT_PER_HOST})')
+    add_timing_arguments(parser)
     
     args = parser.parse_args()
+    setup_timings(args)
     
     urls = list(args.urls)
     
     # Extract URLs from DSL if requested
     if args.from_dsl:
         try:
-            dsl_data = json.load(sys.stdin)
-            urls.extend(extract_component_links_from_dsl(dsl_data))
+            with span('decode') as record:
+                data = sys.stdin.buffer.read()
+                record['bytes'] = len(data)
+                dsl_data = memoize('json', data, json.loads)
+            with span('traverse'):
+                urls.extend(extract_component_links_from_dsl(dsl_data))
         except json.JSONDecodeError as e:
             print(f"Error: Invalid JSON from stdin - {e}", file=sys.stderr)
             sys.exit(1)
@@ -126,16 +210,27 @@ Examples:
             unique_urls.append(url)
     
     # Fetch docs
-    results = {}
-    errors = []
-    
-    for url in unique_urls:
-        try:
-            content = fetch_url(url)
-            results[url] = content
-        except ValueError as e:
-            errors.append(str(e))
-            results[url] = None
+    results = {url: None for url in unique_urls}
+    errors = {}
+    
+    for url, content, error in fetch_urls(unique_urls, args.workers, args.per_host, args.ordered):
+        results[url] = content
+        if error:
+            errors[url] = error
+        if args.json:
+            continue
+        # Stream each doc as soon as it is available
+        print(f"{'='*60}")
+        print(f"URL: {url}")
+        print(f"{'='*60}")
+        if content:
+            print(content)
+        else:
+            print("[FETCH FAILED]")
+        print(flush=True)
+    
+    # Keep errors in input order
+    errors = [errors[url] for url in unique_urls if url in errors]
     
     # Output
     if args.json:
@@ -144,16 +239,6 @@ Examples:
             'errors': errors if errors else None,
         }
         print(json.dumps(output, ensure_ascii=False, indent=2))
-    else:
-        for url, content in results.items():
-            print(f"{'='*60}")
-            print(f"URL: {url}")
-            print(f"{'='*60}")
-            if content:
-                print(content)
-            else:
-                print("[FETCH FAILED]")
-            print()
     
     # Exit with error if any fetch failed
     if errors:
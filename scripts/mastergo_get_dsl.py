@@ -6,25 +6,61 @@ Fetch DSL data from MasterGo design files. Supports:
 - Direct fileId + layerId
 - Short links (https://{domain}/goto/xxx)
 - Full URLs
+- Batches of the above, fetched concurrently (NDJSON output)
+
+Transient API failures (429, 5xx, network errors) are retried with backoff,
+and requests can be rate limited per endpoint, see mastergo_policy.
+With --timings, per-phase spans (resolve, connect, tls, wait, download,
+decode, ...) are written to stderr as JSON lines, see mastergo_timing.
 
 Zero dependencies, compatible with Python 3.6+
 """
 
+if __name__ == '__main__':
+    # Hand the run to mastergo_daemon when it is running (before the heavier imports below)
+    try:
+        from mastergo_daemon import run_in_daemon
+        run_in_daemon('mastergo_get_dsl')
+    except ImportError:
+        pass
+
 import json
 import os
-import ssl
 import sys
-from typing import Dict, Optional, Tuple
-from urllib.parse import urlparse, parse_qs
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError, URLError
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse, urljoin, parse_qs
+from urllib.error import URLError
+
+# Import from sibling module
+try:
+    from mastergo_http import get_transport, REDIRECT_CODES
+    from mastergo_policy import get_policy
+    from mastergo_cache import (get_dsl_cache, get_short_link_cache, get_cache_mode,
+                                add_cache_arguments, memoize, CACHE_OFF, CACHE_USE)
+    from mastergo_timing import add_timing_arguments, setup_timings, span
+    from mastergo_utils import iter_nodes
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_http import get_transport, REDIRECT_CODES
+    from mastergo_policy import get_policy
+    from mastergo_cache import (get_dsl_cache, get_short_link_cache, get_cache_mode,
+                                add_cache_arguments, memoize, CACHE_OFF, CACHE_USE)
+    from mastergo_timing import add_timing_arguments, setup_timings, span
+    from mastergo_utils import iter_nodes
 
 # =============================================================================
 # Configuration
 # =============================================================================
 
 DEFAULT_ENDPOINT = "https://mastergo.com"
-REQUEST_TIMEOUT = 30  # seconds
+MAX_SHORT_LINK_HOPS = 5
+DEFAULT_CONCURRENCY = 4
+TRANSIENT_STATUSES = (408, 429)   # 4xx answers that may change on retry
+
+
+class ShortLinkError(ValueError):
+    """A short link that is definitely broken (not found, or not pointing at a design)."""
 
 
 def get_token() -> str:
@@ -77,46 +113,77 @@ def resolve_short_link(url: str) -> str:
     Resolve short link to get the full redirect URL.
     
     Short links return 3xx redirect, we need to get target URL from Location header.
+    The target page itself is not fetched, only chained short links are followed.
+    
+    Raises ShortLinkError when the server's answer is final (a 4xx other than
+    TRANSIENT_STATUSES, or a redirect loop), ValueError for anything that may
+    resolve on retry (network errors, 5xx, 429).
     """
-    # Create SSL context without verification (consistent with original TS impl)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
+    transport = get_transport()
     
-    req = Request(url, method='GET')
-    req.add_header('User-Agent', 'MasterGo-DSL-Tool/1.0')
+    for _ in range(MAX_SHORT_LINK_HOPS):
+        try:
+            resp = get_policy(url).request(transport, 'GET', url)
+        except URLError as e:
+            raise ValueError(f"Failed to resolve short link: {e.reason}")
+        
+        location = resp.header('Location')
+        if resp.status in REDIRECT_CODES and location:
+            url = urljoin(url, location)
+            if not is_short_link(url):
+                return url
+            continue
+        if resp.status < 300:
+            # No redirect, return final URL
+            return url
+        if 400 <= resp.status < 500 and resp.status not in TRANSIENT_STATUSES:
+            raise ShortLinkError(f"Failed to resolve short link: HTTP {resp.status}")
+        raise ValueError(f"Failed to resolve short link: HTTP {resp.status}")
     
-    try:
-        # Normally short links will redirect
-        with urlopen(req, timeout=REQUEST_TIMEOUT, context=ctx) as resp:
-            # If no redirect, return final URL
-            return resp.url
-    except HTTPError as e:
-        # 3xx redirect throws exception, get Location from headers
-        if 300 <= e.code < 400:
-            location = e.headers.get('Location')
-            if location:
-                return location
-        raise ValueError(f"Failed to resolve short link: HTTP {e.code}")
-
-
-def extract_ids_from_url(url: str) -> Tuple[str, str]:
+    raise ShortLinkError("Failed to resolve short link: too many redirects")
+
+
+def extract_ids_from_url(url: str, cache: str = None) -> Tuple[str, str]:
     """
     Extract fileId and layerId from URL.
     
-    Automatically handles short link resolution.
+    Automatically handles short link resolution. Resolved short links (and,
+    briefly, definitive failures, see ShortLinkError) are remembered in the
+    local cache.
+    
+    Args:
+        url: MasterGo URL or short link
+        cache: Cache mode, 'use', 'off' or 'refresh' (defaults to MASTERGO_CACHE env var)
     """
-    target_url = url
+    if not is_short_link(url):
+        result = parse_mastergo_url(url)
+        if not result:
+            raise ValueError(f"Cannot extract fileId or layerId from URL: {url}")
+        return result['fileId'], result['layerId']
     
-    # Handle short links
-    if is_short_link(url):
-        target_url = resolve_short_link(url)
+    cache = cache or get_cache_mode()
+    links = get_short_link_cache() if cache != CACHE_OFF else None
+    entry = links.get(url) if links and cache == CACHE_USE else None
+    if entry:
+        if 'error' in entry:
+            raise ValueError(entry['error'])
+        return entry['fileId'], entry['layerId']
     
-    # Parse URL
-    result = parse_mastergo_url(target_url)
-    if not result:
-        raise ValueError(f"Cannot extract fileId or layerId from URL: {target_url}")
+    try:
+        with span('resolve', url=url):
+            target_url = resolve_short_link(url)
+        result = parse_mastergo_url(target_url)
+        if not result:
+            raise ShortLinkError(f"Cannot extract fileId or layerId from URL: {target_url}")
+    except ShortLinkError as e:
+        # Only final answers are remembered: network errors, 5xx, 429 or an
+        # open circuit say nothing about the link itself
+        if links:
+            links.put_failure(url, str(e))
+        raise
     
+    if links:
+        links.put(url, result['fileId'], result['layerId'])
     return result['fileId'], result['layerId']
 
 
@@ -124,7 +191,109 @@ def extract_ids_from_url(url: str) -> Tuple[str, str]:
 # DSL Fetching
 # =============================================================================
 
-def get_dsl(file_id: str, layer_id: str, token: str = None, endpoint: str = None) -> Dict:
+def fetch_dsl_body(file_id: str, layer_id: str, token: str, endpoint: str,
+                   cache: str = None) -> bytes:
+    """
+    Fetch the raw /mcp/dsl response body, going through the local cache.
+    
+    Args:
+        cache: Cache mode, 'use', 'off' or 'refresh' (defaults to MASTERGO_CACHE env var)
+    """
+    cache = cache or get_cache_mode()
+    store = get_dsl_cache() if cache != CACHE_OFF else None
+    entry = None
+    if store and cache == CACHE_USE:
+        with span('cache') as record:
+            entry = store.get(endpoint, file_id, layer_id, token)
+            record['hit'] = ('fresh' if entry.fresh else 'stale') if entry else 'miss'
+    if entry and entry.fresh:
+        return entry.body
+    
+    # Build request
+    api_url = f"{endpoint}/mcp/dsl?fileId={file_id}&layerId={layer_id}"
+    
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'X-MG-UserAccessToken': token,
+    }
+    if entry:
+        # Stale entry, ask the server whether it is still valid
+        headers.update(entry.validators())
+    
+    try:
+        resp = get_policy(endpoint).request(get_transport(), 'GET', api_url, headers, follow_redirects=True)
+    except URLError as e:
+        raise ValueError(f"Network error: {e.reason}")
+    
+    if resp.status == 304 and entry:
+        store.touch(entry)
+        return entry.body
+    
+    if resp.status >= 300:
+        error_body = resp.body.decode('utf-8', 'replace') or resp.reason
+        raise ValueError(f"API request failed: HTTP {resp.status} - {error_body}")
+    
+    if store:
+        store.put(endpoint, file_id, layer_id, token, resp.body,
+                  etag=resp.header('ETag'), last_modified=resp.header('Last-Modified'))
+    return resp.body
+
+
+def open_dsl_stream(file_id: str, layer_id: str, token: str = None, endpoint: str = None,
+                    cache: str = None):
+    """
+    Open the raw /mcp/dsl response body as a binary file-like object.
+    
+    For payloads too large to load at once: read it incrementally, e.g. with
+    mastergo_stream.DSLStreamParser. A fresh (or revalidated) cache entry is
+    read from disk; network responses are streamed and not cached.
+    Close the returned object when done.
+    """
+    token = token or get_token()
+    endpoint = endpoint or get_endpoint()
+    
+    if not token:
+        raise ValueError("MASTERGO_TOKEN env var is required but not set")
+    
+    cache = cache or get_cache_mode()
+    store = get_dsl_cache() if cache == CACHE_USE else None
+    entry = store.get(endpoint, file_id, layer_id, token, read_body=False) if store else None
+    if entry and entry.fresh:
+        try:
+            return store.open_body(entry)
+        except OSError:
+            entry = None
+    
+    api_url = f"{endpoint}/mcp/dsl?fileId={file_id}&layerId={layer_id}"
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'X-MG-UserAccessToken': token,
+    }
+    if entry:
+        headers.update(entry.validators())
+    
+    try:
+        resp = get_policy(endpoint).request(get_transport(), 'GET', api_url, headers,
+                                            follow_redirects=True, stream=True)
+        if resp.status == 304 and entry:
+            resp.close()
+            store.touch(entry)
+            return store.open_body(entry)
+        if resp.status >= 300:
+            with resp:
+                error_body = resp.read().decode('utf-8', 'replace') or resp.reason
+            raise ValueError(f"API request failed: HTTP {resp.status} - {error_body}")
+    except URLError as e:
+        raise ValueError(f"Network error: {e.reason}")
+    except OSError as e:
+        raise ValueError(f"Cache error: {e}")
+    return resp
+
+
+def get_dsl(file_id: str, layer_id: str, token: str = None, endpoint: str = None,
+            cache: str = None) -> Dict:
     """
     Fetch MasterGo DSL data.
     
@@ -133,6 +302,7 @@ def get_dsl(file_id: str, layer_id: str, token: str = None, endpoint: str = None
         layer_id: Layer ID
         token: API Token (optional, defaults to MASTERGO_TOKEN env var)
         endpoint: API endpoint (optional, defaults to MASTERGO_ENDPOINT env var)
+        cache: Cache mode, 'use', 'off' or 'refresh' (optional, defaults to MASTERGO_CACHE env var)
     
     Returns:
         Dict containing dsl, componentDocumentLinks, and rules
@@ -143,30 +313,24 @@ def get_dsl(file_id: str, layer_id: str, token: str = None, endpoint: str = None
     if not token:
         raise ValueError("MASTERGO_TOKEN env var is required but not set")
     
-    # Build request
-    api_url = f"{endpoint}/mcp/dsl?fileId={file_id}&layerId={layer_id}"
-    
-    req = Request(api_url, method='GET')
-    req.add_header('Content-Type', 'application/json')
-    req.add_header('Accept', 'application/json')
-    req.add_header('X-MG-UserAccessToken', token)
-    
-    # SSL config (consistent with original impl, skip certificate verification)
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urlopen(req, timeout=REQUEST_TIMEOUT, context=ctx) as resp:
-            dsl_data = json.loads(resp.read().decode('utf-8'))
-    except HTTPError as e:
-        error_body = e.read().decode('utf-8') if e.fp else str(e)
-        raise ValueError(f"API request failed: HTTP {e.code} - {error_body}")
-    except URLError as e:
-        raise ValueError(f"Network error: {e.reason}")
+    body = fetch_dsl_body(file_id, layer_id, token, endpoint, cache)
+    return build_dsl_response(body)
+
+
+def _parse_dsl_body(body: bytes) -> Tuple[Dict, List[str]]:
+    with span('decode', bytes=len(body)):
+        dsl_data = json.loads(body)
     
     # Extract component document links
-    component_links = extract_component_links(dsl_data)
+    with span('traverse'):
+        component_links = extract_component_links(dsl_data)
+    return dsl_data, component_links
+
+
+def build_dsl_response(body: bytes) -> Dict:
+    """Parse a raw /mcp/dsl body into the { dsl, componentDocumentLinks, rules } result."""
+    # Parsed bodies are reused when the memory cache is on (mastergo_daemon)
+    dsl_data, component_links = memoize('dsl', body, _parse_dsl_body)
     
     return {
         'dsl': dsl_data,
@@ -175,14 +339,114 @@ def get_dsl(file_id: str, layer_id: str, token: str = None, endpoint: str = None
     }
 
 
-def get_dsl_from_url(url: str, token: str = None, endpoint: str = None) -> Dict:
+def get_dsl_from_url(url: str, token: str = None, endpoint: str = None, cache: str = None) -> Dict:
     """
     Fetch DSL data from MasterGo URL (convenience method).
     
     Automatically parses fileId and layerId from URL.
     """
-    file_id, layer_id = extract_ids_from_url(url)
-    return get_dsl(file_id, layer_id, token, endpoint)
+    file_id, layer_id = extract_ids_from_url(url, cache)
+    return get_dsl(file_id, layer_id, token, endpoint, cache)
+
+
+def load_dsl(source: str, token: str = None, cache: str = None) -> Dict:
+    """DSL from a MasterGo URL, a JSON file or stdin ('-')."""
+    if source == '-':
+        return json.load(sys.stdin)
+    if '://' in source:
+        return get_dsl_from_url(source, token, cache=cache)
+    with open(source, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# =============================================================================
+# Batch Fetching
+# =============================================================================
+
+def read_batch(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (line number, item) for each batch input line.
+    
+    Items are a MasterGo URL / short link or "fileId layerId". Blank lines
+    and lines starting with # are skipped.
+    """
+    for number, line in enumerate(lines, 1):
+        item = line.strip()
+        if item and not item.startswith('#'):
+            yield number, item
+
+
+def _fetch_batch_item(item: str, token: str, endpoint: str, cache: str) -> Tuple[str, str, Dict]:
+    parts = item.split()
+    if len(parts) == 2 and '://' not in item:
+        file_id, layer_id = parts
+    elif len(parts) == 1 and '://' in item:
+        file_id, layer_id = extract_ids_from_url(item, cache)
+    else:
+        raise ValueError(f"Expected a MasterGo URL or 'fileId layerId', got: {item}")
+    return file_id, layer_id, get_dsl(file_id, layer_id, token, endpoint, cache)
+
+
+def fetch_batch(items: Iterable[Tuple[int, str]], token: str = None, endpoint: str = None,
+                concurrency: int = DEFAULT_CONCURRENCY,
+                on_record: Optional[Callable[[Dict], None]] = None, cache: str = None) -> List[Dict]:
+    """
+    Fetch many pages concurrently, in one process.
+    
+    Short links are resolved by the workers too. Items are pulled from
+    `items` as workers free up, so a long input is never read ahead.
+    
+    Args:
+        items: (line number, item) pairs, see read_batch()
+        token: API Token (optional, defaults to MASTERGO_TOKEN env var)
+        endpoint: API endpoint (optional, defaults to MASTERGO_ENDPOINT env var)
+        concurrency: Maximum number of items in flight
+        on_record: Callback invoked with each record as it finishes. The
+                   returned records then leave out "result", so a long batch
+                   does not keep every DSL in memory.
+        cache: Cache mode passed to get_dsl ('use', 'off' or 'refresh')
+    
+    Returns:
+        Records in completion order: {"line", "input", "fileId", "layerId", "result"},
+        or {"line", "input", "error"} for items that failed
+    """
+    token = token or get_token()
+    endpoint = endpoint or get_endpoint()
+    concurrency = max(1, concurrency)
+    items = iter(items)
+    records = []
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < concurrency:
+                try:
+                    number, item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                future = executor.submit(_fetch_batch_item, item, token, endpoint, cache)
+                in_flight[future] = (number, item)
+            if not in_flight:
+                break
+            
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                number, item = in_flight.pop(future)
+                record = {'line': number, 'input': item}
+                try:
+                    file_id, layer_id, result = future.result()
+                except ValueError as e:
+                    record['error'] = str(e)
+                else:
+                    record.update(fileId=file_id, layerId=layer_id, result=result)
+                if on_record:
+                    on_record(record)
+                    record.pop('result', None)
+                records.append(record)
+    
+    return records
 
 
 # =============================================================================
@@ -193,9 +457,8 @@ def extract_component_links(dsl: Dict) -> list:
     """Extract component document links from DSL"""
     links = set()
     
-    def traverse(node):
-        if not node or not isinstance(node, dict):
-            return
+    # Traverse nodes array and root, ID-string children resolved through nodeMap
+    for node, _, _, _ in iter_nodes(dsl):
         # Extract componentSetDocumentLink
         try:
             link = node.get('componentInfo', {}).get('componentSetDocumentLink', [None])[0]
@@ -203,13 +466,6 @@ def extract_component_links(dsl: Dict) -> list:
                 links.add(link)
         except (TypeError, IndexError, AttributeError):
             pass
-        # Recursively process children
-        for child in node.get('children', []):
-            traverse(child)
-    
-    # Traverse nodes array
-    for node in dsl.get('nodes', []):
-        traverse(node)
     
     return list(links)
 
@@ -241,6 +497,35 @@ def build_dsl_rules() -> list:
 # CLI
 # =============================================================================
 
+def run_batch(args) -> int:
+    """Batch mode of the CLI, returns the exit status."""
+    def emit(record: Dict) -> None:
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + '\n')
+        sys.stdout.flush()
+    
+    # The policy counts for the whole process, which can outlive this run (mastergo_daemon)
+    policy = get_policy(args.endpoint or get_endpoint())
+    retries_before = policy.stats['retries']
+    try:
+        if args.batch == '-':
+            records = fetch_batch(read_batch(sys.stdin), args.token, args.endpoint,
+                                  args.concurrency, emit, args.cache)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                records = fetch_batch(read_batch(f), args.token, args.endpoint,
+                                      args.concurrency, emit, args.cache)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    
+    failed = sum(1 for record in records if 'error' in record)
+    retries = policy.stats['retries'] - retries_before
+    print(f"Fetched {len(records)} items ({failed} failed, {retries} retries)", file=sys.stderr)
+    return 1 if failed else 0
+
+
 def main():
     """CLI entry point"""
     import argparse
@@ -258,10 +543,30 @@ Examples:
   
   # Using fileId and layerId
   python mastergo_get_dsl.py --file-id 123456 --layer-id "1:0001"
+  
+  # Bypass the local DSL cache / force a refetch
+  python mastergo_get_dsl.py URL --no-cache
+  python mastergo_get_dsl.py URL --refresh
+  
+  # Very large files: stream the raw response into a streaming extractor
+  python mastergo_get_dsl.py URL --stream | python mastergo_utils.py texts --stream
+  
+  # Many pages in one process: URLs or "fileId layerId" lines, NDJSON out
+  python mastergo_get_dsl.py --batch pages.txt --concurrency 8
+  printf '123456 1:0001\\n123456 1:0002\\n' | python mastergo_get_dsl.py --batch -
+  
+  # Where the time goes: JSON timing spans on stderr
+  python mastergo_get_dsl.py URL --timings > /dev/null
+  
+Batch output:
+  One JSON record per line, written as each item finishes:
+  {"line", "input", "fileId", "layerId", "result"}, or {"line", "input", "error"}.
+  Exit status is 1 if any item failed.
 
 Environment Variables:
   MASTERGO_TOKEN     API Token (required)
   MASTERGO_ENDPOINT  API endpoint (optional, default: https://mastergo.com)
+  MASTERGO_CACHE     Set to 0 to disable the local DSL cache (optional)
 '''
     )
     
@@ -271,20 +576,54 @@ Environment Variables:
     parser.add_argument('--token', '-t', help='API Token (defaults to MASTERGO_TOKEN)')
     parser.add_argument('--endpoint', '-e', help='API endpoint (defaults to MASTERGO_ENDPOINT)')
     parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
+    parser.add_argument('--stream', action='store_true',
+                        help='Write the raw DSL response to stdout as it arrives (no wrapping)')
+    parser.add_argument('--batch', '-b', metavar='FILE',
+                        help='Fetch every URL or "fileId layerId" line of FILE (- for stdin), NDJSON output')
+    parser.add_argument('--concurrency', '-c', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Concurrent requests in batch mode (default: {DEFAULT_CONCURRENCY})')
+    add_cache_arguments(parser)
+    add_timing_arguments(parser)
     
     args = parser.parse_args()
+    setup_timings(args)
+    
+    if args.batch:
+        if args.url or args.file_id or args.layer_id or args.stream or args.pretty:
+            parser.error('--batch cannot be combined with a URL, --file-id/--layer-id, --stream or --pretty')
+        sys.exit(run_batch(args))
     
     try:
+        if args.stream:
+            if args.url:
+                file_id, layer_id = extract_ids_from_url(args.url, args.cache)
+            elif args.file_id and args.layer_id:
+                file_id, layer_id = args.file_id, args.layer_id
+            else:
+                parser.error('Please provide URL or --file-id and --layer-id')
+            with open_dsl_stream(file_id, layer_id, args.token, args.endpoint, args.cache) as body:
+                try:
+                    while True:
+                        chunk = body.read(65536)
+                        if not chunk:
+                            break
+                        sys.stdout.buffer.write(chunk)
+                except URLError as e:
+                    raise ValueError(f"Network error: {e.reason}")
+            sys.stdout.buffer.flush()
+            return
+        
         if args.url:
-            result = get_dsl_from_url(args.url, args.token, args.endpoint)
+            result = get_dsl_from_url(args.url, args.token, args.endpoint, args.cache)
         elif args.file_id and args.layer_id:
-            result = get_dsl(args.file_id, args.layer_id, args.token, args.endpoint)
+            result = get_dsl(args.file_id, args.layer_id, args.token, args.endpoint, args.cache)
         else:
             parser.error('Please provide URL or --file-id and --layer-id')
         
         # Output JSON
         indent = 2 if args.pretty else None
-        print(json.dumps(result, ensure_ascii=False, indent=indent))
+        with span('format'):
+            print(json.dumps(result, ensure_ascii=False, indent=indent))
         
     except ValueError as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+MasterGo HTTP transport.
+
+Shared keep-alive connection pool used by all network code:
+- One SSL context for the whole process
+- Persistent http.client connections, pooled per (scheme, host, port)
+- Thread-safe checkout/checkin, idle connections are evicted
+- Honours http_proxy / https_proxy / no_proxy like urllib
+
+Usage:
+  from mastergo_http import get_transport
+
+  resp = get_transport().request('GET', 'https://mastergo.com/mcp/dsl?...', headers)
+  if resp.status == 200:
+      data = json.loads(resp.text())
+
+  # Incremental body reads
+  with get_transport().open('GET', url, headers) as resp:
+      chunk = resp.read(65536)
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import http.client
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.error import URLError
+from urllib.parse import urlparse, urljoin
+from urllib.request import getproxies, proxy_bypass
+
+# Import from sibling module
+try:
+    from mastergo_cancel import Cancelled, cancelled, check as check_cancelled
+    from mastergo_timing import emit_span, enabled as timings_enabled, span
+except ImportError:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cancel import Cancelled, cancelled, check as check_cancelled
+    from mastergo_timing import emit_span, enabled as timings_enabled, span
+
+REQUEST_TIMEOUT = 30     # seconds
+IDLE_TIMEOUT = 60        # seconds an unused connection is kept open
+MAX_IDLE_PER_HOST = 8    # idle connections kept per host
+MAX_REDIRECTS = 5
+USER_AGENT = 'MasterGo-DSL-Tool/1.0'
+
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+# Errors raised when a pooled connection was closed by the server meanwhile
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+    ConnectionAbortedError,
+)
+
+
+def create_ssl_context() -> ssl.SSLContext:
+    """Create SSL context (consistent with original impl, skip certificate verification)."""
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+# =============================================================================
+# Response
+# =============================================================================
+
+class Response:
+    """Fully read HTTP response."""
+
+    __slots__ = ('status', 'reason', 'headers', 'url', 'body')
+
+    def __init__(self, status: int, reason: str, headers, url: str, body: bytes):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.url = url
+        self.body = body
+
+    def header(self, name: str, default: str = None) -> Optional[str]:
+        """Get a response header (case-insensitive)."""
+        return self.headers.get(name, default)
+
+    def text(self, encoding: str = 'utf-8') -> str:
+        """Decode body as text."""
+        return self.body.decode(encoding)
+
+
+# =============================================================================
+# Transport
+# =============================================================================
+
+class HTTPTransport:
+    """
+    Thread-safe pool of persistent HTTP(S) connections.
+
+    Network failures are raised as urllib.error.URLError so callers can keep
+    their existing error handling. HTTP error statuses are returned, not raised.
+    """
+
+    def __init__(self, timeout: float = REQUEST_TIMEOUT, idle_timeout: float = IDLE_TIMEOUT,
+                 max_idle_per_host: int = MAX_IDLE_PER_HOST, ssl_context: ssl.SSLContext = None):
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.ssl_context = ssl_context or create_ssl_context()
+        self._lock = threading.Lock()
+        self._idle = {}  # type: Dict[Tuple[str, str, int], List[Tuple[http.client.HTTPConnection, float]]]
+        self.stats = {'requests': 0, 'connections': 0, 'reused': 0}
+
+    # -------------------------------------------------------------------------
+    # Connection management
+    # -------------------------------------------------------------------------
+
+    def _new_connection(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        proxy = None if proxy_bypass(host) else getproxies().get(scheme)
+        if proxy:
+            proxy_url = urlparse(proxy if '://' in proxy else f'http://{proxy}')
+            proxy_port = proxy_url.port or (443 if proxy_url.scheme == 'https' else 80)
+            if proxy_url.scheme == 'https':
+                conn = http.client.HTTPSConnection(proxy_url.hostname, proxy_port,
+                                                   timeout=self.timeout, context=self.ssl_context)
+            else:
+                conn = http.client.HTTPConnection(proxy_url.hostname, proxy_port, timeout=self.timeout)
+            if scheme == 'https':
+                conn.set_tunnel(host, port)
+            else:
+                conn._mg_absolute_url = True  # plain HTTP proxies want absolute request URLs
+        elif scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, timeout=self.timeout, context=self.ssl_context)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+        with self._lock:
+            self.stats['connections'] += 1
+        return conn
+
+    def _checkout(self, key: Tuple[str, str, int]) -> Tuple[http.client.HTTPConnection, bool]:
+        """Get an idle connection for key, or a new one. Returns (conn, reused)."""
+        now = time.monotonic()
+        expired = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used > self.idle_timeout:
+                    expired.append(candidate)
+                    continue
+                conn = candidate
+                self.stats['reused'] += 1
+                break
+        for old in expired:
+            old.close()
+        if conn is not None:
+            return conn, True
+        return self._new_connection(*key), False
+
+    def _checkin(self, key: Tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        """Return a connection to the pool, evicting idle ones beyond the limits."""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            idle.append((conn, now))
+            fresh = [(c, t) for c, t in idle if now - t <= self.idle_timeout]
+            evicted = [c for c, t in idle if now - t > self.idle_timeout]
+            if len(fresh) > self.max_idle_per_host:
+                evicted.extend(c for c, _ in fresh[:-self.max_idle_per_host])
+                fresh = fresh[-self.max_idle_per_host:]
+            self._idle[key] = fresh
+        for old in evicted:
+            old.close()
+
+    def _connect(self, conn: http.client.HTTPConnection) -> None:
+        """Connect now instead of on the first request, timing TCP and TLS as separate spans."""
+        if isinstance(conn, http.client.HTTPSConnection) and not conn._tunnel_host:
+            with span('connect', host=conn.host):
+                sock = socket.create_connection((conn.host, conn.port), conn.timeout, conn.source_address)
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with span('tls', host=conn.host):
+                    conn.sock = self.ssl_context.wrap_socket(sock, server_hostname=conn.host)
+            except BaseException:
+                sock.close()
+                raise
+        else:
+            with span('connect', host=conn.host):
+                conn.connect()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    # -------------------------------------------------------------------------
+    # Requests
+    # -------------------------------------------------------------------------
+
+    def _send(self, method: str, url: str, headers: Dict[str, str], stream: bool = False):
+        parsed = urlparse(url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ('http', 'https') or not parsed.hostname:
+            raise URLError(f"unsupported URL: {url}")
+        port = parsed.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parsed.hostname, port)
+
+        target = parsed.path or '/'
+        if parsed.query:
+            target += '?' + parsed.query
+
+        all_headers = {'User-Agent': USER_AGENT}
+        all_headers.update(headers or {})
+
+        check_cancelled()
+        conn, reused = self._checkout(key)
+        while True:
+            path = url if getattr(conn, '_mg_absolute_url', False) else target
+            try:
+                if conn.sock is None and timings_enabled():
+                    self._connect(conn)
+                with span('wait', url=url, reused=reused):
+                    conn.request(method, path, headers=all_headers)
+                    resp = conn.getresponse()
+                body = None
+                if not stream:
+                    with span('download', url=url) as record:
+                        body = resp.read()
+                        record['bytes'] = len(body)
+            except _STALE_ERRORS as e:
+                conn.close()
+                # A reused connection may have been closed by the server, retry once on a fresh one
+                if reused and method in ('GET', 'HEAD'):
+                    conn, reused = self._new_connection(*key), False
+                    continue
+                raise URLError(e)
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                reason = e.reason if isinstance(e, URLError) else e
+                if isinstance(e, socket.timeout):
+                    reason = 'timed out'
+                raise URLError(reason)
+            break
+
+        with self._lock:
+            self.stats['requests'] += 1
+
+        if stream:
+            return StreamingResponse(self, key, conn, resp, url)
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+
+        return Response(resp.status, resp.reason, resp.headers, url, body)
+
+    def request(self, method: str, url: str, headers: Dict[str, str] = None,
+                follow_redirects: bool = False, max_redirects: int = MAX_REDIRECTS) -> Response:
+        """
+        Perform an HTTP request and read the full response.
+
+        Args:
+            method: HTTP method
+            url: Absolute http(s) URL
+            headers: Extra request headers
+            follow_redirects: Follow 3xx responses with a Location header
+            max_redirects: Maximum number of redirects to follow
+
+        Returns:
+            Response (any status, including 4xx/5xx)
+
+        Raises:
+            URLError: Connection or protocol failure
+        """
+        resp = self._send(method, url, headers)
+        redirects = 0
+        while follow_redirects and resp.status in REDIRECT_CODES and resp.header('Location'):
+            redirects += 1
+            if redirects > max_redirects:
+                raise URLError(f"too many redirects fetching {url}")
+            next_url = urljoin(resp.url, resp.header('Location'))
+            if resp.status == 303:
+                method = 'GET'
+            resp = self._send(method, next_url, headers)
+        return resp
+
+    def open(self, method: str, url: str, headers: Dict[str, str] = None,
+             follow_redirects: bool = False, max_redirects: int = MAX_REDIRECTS) -> 'StreamingResponse':
+        """
+        Perform an HTTP request and return the response unread.
+
+        The body is read in chunks with StreamingResponse.read(n); the
+        connection goes back to the pool once the body is fully consumed.
+        Use as a context manager so abandoned responses are closed.
+        """
+        resp = self._send(method, url, headers, stream=True)
+        redirects = 0
+        while follow_redirects and resp.status in REDIRECT_CODES and resp.header('Location'):
+            redirects += 1
+            resp.close()
+            if redirects > max_redirects:
+                raise URLError(f"too many redirects fetching {url}")
+            next_url = urljoin(resp.url, resp.header('Location'))
+            if resp.status == 303:
+                method = 'GET'
+            resp = self._send(method, next_url, headers, stream=True)
+        return resp
+
+
+class StreamingResponse:
+    """HTTP response whose body is read incrementally (file-like, binary)."""
+
+    def __init__(self, transport: HTTPTransport, key: Tuple[str, str, int],
+                 conn: http.client.HTTPConnection, resp: http.client.HTTPResponse, url: str):
+        self.status = resp.status
+        self.reason = resp.reason
+        self.headers = resp.headers
+        self.url = url
+        self._transport = transport
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._bytes = 0
+        self._timer = (time.time(), time.perf_counter()) if timings_enabled() else None
+
+    def header(self, name: str, default: str = None) -> Optional[str]:
+        """Get a response header (case-insensitive)."""
+        return self.headers.get(name, default)
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes (all remaining when size < 0)."""
+        if self._resp is None:
+            return b''
+        if cancelled():
+            # Abandoned mid-body: the connection cannot go back to the pool
+            self._release(reuse=False)
+            raise Cancelled()
+        try:
+            data = self._resp.read() if size is None or size < 0 else self._resp.read(size)
+        except (OSError, http.client.HTTPException) as e:
+            self._release(reuse=False)
+            raise URLError(e)
+        self._bytes += len(data)
+        if not data or self._resp.isclosed():
+            self._release(reuse=True)
+        return data
+
+    def _release(self, reuse: bool) -> None:
+        resp, self._resp = self._resp, None
+        if resp is None:
+            return
+        if self._timer:
+            start, begin = self._timer
+            emit_span('download', start, time.perf_counter() - begin, url=self.url, bytes=self._bytes)
+        if reuse and resp.isclosed() and not resp.will_close:
+            self._transport._checkin(self._key, self._conn)
+        else:
+            self._conn.close()
+
+    def close(self) -> None:
+        """Close the response; a partially read body closes the connection."""
+        self._release(reuse=True)
+
+    def __enter__(self) -> 'StreamingResponse':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# =============================================================================
+# Shared instance
+# =============================================================================
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """Get the process-wide shared transport."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport()
+    return _transport
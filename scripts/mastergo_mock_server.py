@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the MasterGo API, for load and latency testing offline.
+
+Serves the routes the scripts use:
+
+- /mcp/dsl?fileId=&layerId=   DSL from a fixture, or a synthetic page
+                              (ETag / If-None-Match supported)
+- /goto/<code>                302 to /file/<fileId>?layer_id=<layerId>
+- /docs/<name>.mdx            Component documentation (linked from the pages)
+
+Latency, slow-request tails, server errors, 429s and dropped connections are
+injected at configurable rates. Point the scripts at it through
+MASTERGO_ENDPOINT; short links and doc URLs of the served pages point back
+at the server.
+
+Fixtures: with --fixtures DIR, /mcp/dsl serves DIR/<fileId>/<layerId>.json
+(':' in the layer id written as '-') or DIR/default.json, and docs are read
+from DIR/docs/. Anything missing is synthesized.
+
+Usage:
+  # Start on port 8000 with 50 ms latency, 2% 503s and 5% 429s
+  python mastergo_mock_server.py --port 8000 --latency 50 --error-rate 0.02 --rate-limit-rate 0.05
+
+  # In another shell
+  export MASTERGO_ENDPOINT=http://127.0.0.1:8000 MASTERGO_TOKEN=mock
+  python mastergo_get_dsl.py http://127.0.0.1:8000/goto/home --no-cache
+
+  # As module
+  from mastergo_mock_server import MockServer
+  with MockServer(latency=0.02, nodes=5000) as server:
+      get_dsl('1', '0:1', 'mock', server.endpoint)
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+# Import from sibling module
+try:
+    from mastergo_synth import NAVIGATION_TARGETS, generate_dsl
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_synth import NAVIGATION_TARGETS, generate_dsl
+
+DEFAULT_PORT = 8000
+DEFAULT_NODES = 200
+
+
+# =============================================================================
+# Synthetic Data
+# =============================================================================
+
+def _seed(*parts: str) -> int:
+    return int(hashlib.blake2b('/'.join(parts).encode('utf-8'), digest_size=8).hexdigest(), 16)
+
+
+def synthetic_doc(name: str) -> str:
+    return f'# {name}\n\nSynthetic documentation for `{name}`.\n\n## Props\n\n| Prop | Type |\n|------|------|\n| size | string |\n'
+
+
+# =============================================================================
+# Server
+# =============================================================================
+
+class MockConfig:
+    """Behaviour of the mock server. Rates are probabilities per request, times in seconds."""
+
+    def __init__(self, nodes: int = DEFAULT_NODES, fixtures: Optional[str] = None,
+                 latency: float = 0.0, jitter: float = 0.0, slow_rate: float = 0.0, slow: float = 1.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: int = 1,
+                 drop_rate: float = 0.0, token: Optional[str] = None, seed: Optional[int] = None):
+        self.nodes = nodes
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow = slow
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.drop_rate = drop_rate
+        self.token = token
+        self.random = random.Random(seed)
+        self.started = formatdate(usegmt=True)
+        self.stats = {'requests': 0, 'ok': 0, 'notModified': 0, 'redirects': 0, 'errors': 0,
+                      'rateLimited': 0, 'dropped': 0, 'bytes': 0}
+        self._bodies = {}  # (fileId, layerId) -> (body, etag)
+        self._lock = threading.Lock()
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return rate > 0 and self.random.random() < rate
+
+    def delay(self) -> float:
+        with self._lock:
+            seconds = self.latency + self.random.uniform(-self.jitter, self.jitter)
+            if self.slow_rate > 0 and self.random.random() < self.slow_rate:
+                seconds += self.slow
+        return max(0.0, seconds)
+
+    def fixture(self, *parts: str) -> Optional[bytes]:
+        if not self.fixtures:
+            return None
+        path = os.path.join(self.fixtures, *parts)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def dsl_body(self, file_id: str, layer_id: str, base_url: str):
+        """(body, etag) served for a layer; built once per layer."""
+        key = (file_id, layer_id)
+        with self._lock:
+            cached = self._bodies.get(key)
+        if cached:
+            return cached
+        body = (self.fixture(file_id, layer_id.replace(':', '-') + '.json')
+                or self.fixture('default.json'))
+        if body is not None:
+            data = json.loads(body)
+            if isinstance(data, dict) and isinstance(data.get('dsl'), dict):
+                body = json.dumps(data['dsl'], ensure_ascii=False).encode('utf-8')  # saved get_dsl output
+        else:
+            page = generate_dsl(self.nodes, seed=_seed(file_id, layer_id),
+                                page=layer_id.split(':', 1)[0], base_url=base_url)
+            body = json.dumps(page, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        with self._lock:
+            self._bodies[key] = (body, etag)
+        return body, etag
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'MasterGoMock/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    @property
+    def config(self) -> MockConfig:
+        return self.server.config
+
+    def base_url(self) -> str:
+        host = self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]
+        return f'http://{host}'
+
+    def send(self, status: int, body: bytes = b'', headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+        self.config.count('bytes', len(body))
+
+    def send_json(self, status: int, data: Any, headers: Dict[str, str] = None) -> None:
+        headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+        self.send(status, json.dumps(data).encode('utf-8'), headers)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        config = self.config
+        url = urlparse(self.path)
+        if url.path == '/_mock/stats':
+            self.send_json(200, config.stats)
+            return
+
+        config.count('requests')
+        time.sleep(config.delay())
+        if config.roll(config.drop_rate):
+            config.count('dropped')
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if config.roll(config.rate_limit_rate):
+            config.count('rateLimited')
+            self.send_json(429, {'message': 'Too Many Requests'}, {'Retry-After': str(config.retry_after)})
+            return
+        if config.roll(config.error_rate):
+            config.count('errors')
+            self.send_json(config.random.choice((500, 502, 503)), {'message': 'Injected server error'})
+            return
+
+        if url.path == '/mcp/dsl':
+            self.serve_dsl(parse_qs(url.query))
+        elif url.path.startswith('/goto/'):
+            self.serve_short_link(url.path[len('/goto/'):])
+        elif url.path.startswith('/docs/'):
+            self.serve_doc(url.path[len('/docs/'):])
+        elif url.path.startswith('/file/'):
+            config.count('ok')
+            self.send(200, b'<!doctype html><title>MasterGo</title>', {'Content-Type': 'text/html'})
+        else:
+            self.send_json(404, {'message': f'Not found: {url.path}'})
+
+    def serve_dsl(self, query: Dict[str, list]) -> None:
+        token = self.headers.get('X-MG-UserAccessToken')
+        if not token or (self.config.token and token != self.config.token):
+            self.send_json(401, {'message': 'Invalid access token'})
+            return
+        file_id = query.get('fileId', [''])[0]
+        layer_id = query.get('layerId', [''])[0]
+        if not file_id or not layer_id:
+            self.send_json(400, {'message': 'fileId and layerId are required'})
+            return
+
+        body, etag = self.config.dsl_body(file_id, layer_id, self.base_url())
+        headers = {'ETag': etag, 'Last-Modified': self.config.started}
+        if self.headers.get('If-None-Match') == etag:
+            self.config.count('notModified')
+            self.send(304, headers=headers)
+            return
+        self.config.count('ok')
+        headers['Content-Type'] = 'application/json'
+        self.send(200, body, headers)
+
+    def serve_short_link(self, code: str) -> None:
+        # Stable target per code: file id from its hash, layer 0:1 .. 0:NAVIGATION_TARGETS
+        seed = _seed(code)
+        target = f'{self.base_url()}/file/{seed % 10 ** 12}?layer_id=0:{seed % NAVIGATION_TARGETS + 1}'
+        self.config.count('redirects')
+        self.send(302, headers={'Location': target})
+
+    def serve_doc(self, name: str) -> None:
+        name = name.strip('/')
+        if not name or '..' in name.split('/'):
+            self.send_json(404, {'message': 'Not found'})
+            return
+        body = self.config.fixture('docs', *name.split('/'))
+        if body is None:
+            body = synthetic_doc(os.path.splitext(os.path.basename(name))[0]).encode('utf-8')
+        self.config.count('ok')
+        self.send(200, body, {'Content-Type': 'text/markdown; charset=utf-8'})
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class MockServer:
+    """
+    Mock server running in a background thread.
+
+    Keyword arguments are MockConfig settings; port 0 picks a free port.
+    `endpoint` is the value for MASTERGO_ENDPOINT.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, verbose: bool = False, **settings):
+        self.config = MockConfig(**settings)
+        self.httpd = _ThreadingServer((host, port), MockHandler)
+        self.httpd.config = self.config
+        self.httpd.verbose = verbose
+        self._thread = None
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def short_link(self, code: str) -> str:
+        return f'{self.endpoint}/goto/{quote(code)}'
+
+    def start(self) -> 'MockServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'MockServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def _rate(value: str) -> float:
+    rate = float(value)
+    if not 0 <= rate <= 1:
+        raise argparse.ArgumentTypeError('must be between 0 and 1')
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Local stand-in for the MasterGo API (load and latency testing)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Synthetic pages of 5000 nodes, 20 +/- 10 ms latency, 1% of requests 2 s slower
+  python mastergo_mock_server.py --nodes 5000 --latency 20 --jitter 10 --slow-rate 0.01 --slow 2000
+
+  # Serve saved DSL files, failing 5% of requests with 503 and 5% with 429
+  python mastergo_mock_server.py --fixtures ./fixtures --error-rate 0.05 --rate-limit-rate 0.05
+
+Use with: export MASTERGO_ENDPOINT=http://127.0.0.1:<port>
+Counters: GET /_mock/stats (also printed on exit).
+'''
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--fixtures', metavar='DIR', help='Directory of DSL and doc fixtures')
+    parser.add_argument('--nodes', type=int, default=DEFAULT_NODES,
+                        help=f'Nodes per synthetic page, i.e. payload size (default: {DEFAULT_NODES})')
+    parser.add_argument('--latency', type=float, default=0, metavar='MS', help='Latency per request')
+    parser.add_argument('--jitter', type=float, default=0, metavar='MS', help='Uniform +/- latency jitter')
+    parser.add_argument('--slow-rate', type=_rate, default=0, help='Fraction of requests with extra latency')
+    parser.add_argument('--slow', type=float, default=1000, metavar='MS',
+                        help='Extra latency of slow requests (default: 1000)')
+    parser.add_argument('--error-rate', type=_rate, default=0, help='Fraction answered with 500/502/503')
+    parser.add_argument('--rate-limit-rate', type=_rate, default=0, help='Fraction answered with 429')
+    parser.add_argument('--retry-after', type=int, default=1, metavar='SECONDS',
+                        help='Retry-After of 429 responses (default: 1)')
+    parser.add_argument('--drop-rate', type=_rate, default=0, help='Fraction of connections closed without response')
+    parser.add_argument('--token', help='Only accept this access token (default: any)')
+    parser.add_argument('--seed', type=int, help='Seed for injected faults (reproducible runs)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Log requests to stderr')
+
+    args = parser.parse_args()
+    if args.nodes < 1:
+        parser.error('--nodes must be at least 1')
+    if args.fixtures and not os.path.isdir(args.fixtures):
+        parser.error(f'--fixtures: not a directory: {args.fixtures}')
+
+    try:
+        server = MockServer(
+            args.host, args.port, args.verbose, nodes=args.nodes, fixtures=args.fixtures,
+            latency=args.latency / 1000, jitter=args.jitter / 1000, slow_rate=args.slow_rate,
+            slow=args.slow / 1000, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+            retry_after=args.retry_after, drop_rate=args.drop_rate, token=args.token, seed=args.seed)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Mock MasterGo API on {server.endpoint}", file=sys.stderr)
+    print(f"  export MASTERGO_ENDPOINT={server.endpoint}", file=sys.stderr)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.config.stats), file=sys.stderr)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
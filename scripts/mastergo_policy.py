@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+MasterGo API client policy.
+
+Per-endpoint request policy shared by all API calls:
+- Retries of transient failures (429, 5xx, network errors) with jittered
+  exponential backoff, honouring Retry-After
+- Client-side token-bucket rate limiter
+- Circuit breaker: after repeated failures the endpoint is failed fast
+  (CircuitOpenError) until a cooldown has passed, then probed again
+
+Statistics (requests, retries, time spent waiting, breaker state) are kept
+per endpoint and exposed through RequestPolicy.stats / policy_stats().
+
+Environment Variables:
+  MASTERGO_RETRIES      Retries of a failed request (default: 3)
+  MASTERGO_RATE_LIMIT   Requests per second per endpoint (default: unlimited)
+  MASTERGO_RATE_BURST   Requests allowed at once before limiting (default: rate, at least 1)
+
+Usage:
+  from mastergo_policy import get_policy, configure_policy
+
+  configure_policy('https://mastergo.com', rate=5, burst=10)
+  resp = get_policy(endpoint).request(get_transport(), 'GET', url, headers)
+  print(get_policy(endpoint).stats)
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+from urllib.error import URLError
+from urllib.parse import urlparse
+
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5          # seconds, first retry delay (before jitter)
+MAX_BACKOFF = 30.0             # seconds
+MAX_RETRY_AFTER = 120.0        # seconds; a longer Retry-After is not waited for
+BREAKER_THRESHOLD = 5          # consecutive failures that open the circuit
+BREAKER_COOLDOWN = 30.0        # seconds before an open circuit is probed again
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(ValueError):
+    """The endpoint failed repeatedly; requests are refused until the cooldown passes."""
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    try:
+        value = os.environ.get(name)
+        return default if value in (None, '') else float(value)
+    except ValueError:
+        return default
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+# =============================================================================
+# Rate Limiting
+# =============================================================================
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token without waiting. Returns the seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now; a negative balance is what later callers wait for
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+# =============================================================================
+# Circuit Breaker
+# =============================================================================
+
+class CircuitBreaker:
+    """
+    Closed -> open after `threshold` consecutive failures; after `cooldown`
+    seconds one probe request is let through (half-open): success closes the
+    circuit, failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opens = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before(self, name: str = 'endpoint') -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{name} is failing ({self.failures} consecutive failures), "
+                               f"not sending requests for {max(0, int(remaining + 0.999))}s")
+
+    def success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.opens += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def abandon(self) -> None:
+        """A probe ended without an answer (e.g. interrupted): allow another, count nothing."""
+        with self._lock:
+            if self._probing:
+                self._probing = False
+                if self.state == self.HALF_OPEN:
+                    self.state = self.OPEN
+
+
+# =============================================================================
+# Policy
+# =============================================================================
+
+class RequestPolicy:
+    """
+    Retry, rate limit and circuit breaker settings of one endpoint.
+
+    Args:
+        name: Endpoint label used in error messages
+        retries: Retries after the first attempt (0 disables retrying)
+        backoff: Base delay; attempt n waits a random time up to backoff * 2**n
+        max_backoff: Upper bound of a backoff delay
+        rate: Requests per second (None: unlimited)
+        burst: Token bucket size (defaults to rate)
+        threshold: Consecutive failures opening the circuit (0 disables the breaker)
+        cooldown: Seconds an open circuit refuses requests
+    """
+
+    def __init__(self, name: str = 'endpoint', retries: int = DEFAULT_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF, max_backoff: float = MAX_BACKOFF,
+                 rate: Optional[float] = None, burst: Optional[float] = None,
+                 threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.breaker = CircuitBreaker(threshold, cooldown) if threshold > 0 else None
+        self._lock = threading.Lock()
+        self._counts = {
+            'requests': 0,          # attempts sent
+            'retries': 0,           # attempts that were retries
+            'rateLimited': 0,       # 429 responses
+            'serverErrors': 0,      # 5xx responses
+            'networkErrors': 0,     # connection failures / timeouts
+            'backoffSeconds': 0.0,  # time slept between retries
+            'throttleSeconds': 0.0, # time waited for the rate limiter
+        }
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus breaker state ('closed', 'open', 'half-open' or None)."""
+        with self._lock:
+            stats = dict(self._counts)
+        stats['backoffSeconds'] = round(stats['backoffSeconds'], 3)
+        stats['throttleSeconds'] = round(stats['throttleSeconds'], 3)
+        breaker = self.breaker
+        stats['breaker'] = breaker.state if breaker else None
+        stats['breakerOpens'] = breaker.opens if breaker else 0
+        stats['breakerRejected'] = breaker.rejected if breaker else 0
+        return stats
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        jittered = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        return max(jittered, retry_after) if retry_after is not None else jittered
+
+    # The steps of execute(), shared with the asyncio client (mastergo_async)
+
+    def before_attempt(self, attempt: int) -> float:
+        """
+        Check the breaker and take a rate limiter token for attempt number
+        `attempt` (0 is the first). Returns the seconds to wait before sending.
+        """
+        if self.breaker:
+            self.breaker.before(self.name)
+        wait = self.bucket.reserve() if self.bucket else 0.0
+        with self._lock:
+            self._counts['requests'] += 1
+            if attempt:
+                self._counts['retries'] += 1
+            self._counts['throttleSeconds'] += wait
+        return wait
+
+    def after_response(self, status: int, retry_after: Optional[str], attempt: int) -> Optional[float]:
+        """Record a response. Returns the backoff before retrying, or None to keep it."""
+        if status == 429:
+            self._count('rateLimited')
+        elif status >= 500:
+            self._count('serverErrors')
+        if self.breaker:
+            # 429 means the endpoint is up but busy: not a breaker failure
+            if status >= 500:
+                self.breaker.failure()
+            else:
+                self.breaker.success()
+        if status not in RETRY_STATUSES or attempt >= self.retries or self._breaker_open():
+            return None
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None and seconds > MAX_RETRY_AFTER:
+            return None
+        return self._backoff(attempt, seconds)
+
+    def after_error(self, attempt: int) -> Optional[float]:
+        """Record a network failure. Returns the backoff before retrying, or None to give up."""
+        self._count('networkErrors')
+        if self.breaker:
+            self.breaker.failure()
+        if attempt >= self.retries or self._breaker_open():
+            return None
+        return self._backoff(attempt)
+
+    def after_exception(self) -> None:
+        """
+        Record an attempt that raised something else (interrupt, cancellation).
+
+        Only network and server failures count against the breaker; this
+        just ends a half-open probe so the next request can probe again.
+        """
+        if self.breaker:
+            self.breaker.abandon()
+
+    def _breaker_open(self) -> bool:
+        # Retrying would only raise CircuitOpenError and hide the last failure
+        return self.breaker is not None and self.breaker.state == CircuitBreaker.OPEN
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        wait = self.delay(attempt, retry_after)
+        self._count('backoffSeconds', wait)
+        return wait
+
+    def execute(self, send: Callable[[], Any]) -> Any:
+        """
+        Call send() under the policy and return its response.
+
+        send() performs one attempt and returns an object with `status`,
+        `header(name)` and optionally `close()`, or raises URLError. Retryable
+        responses are retried while attempts remain and the circuit stays
+        closed; the last response is returned whatever its status, the last
+        URLError re-raised.
+
+        Raises:
+            CircuitOpenError: The endpoint's circuit is open
+            URLError: Network failure on the last attempt
+        """
+        attempt = 0
+        while True:
+            wait = self.before_attempt(attempt)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                resp = send()
+            except URLError:
+                backoff = self.after_error(attempt)
+                if backoff is None:
+                    raise
+            except BaseException:
+                self.after_exception()
+                raise
+            else:
+                backoff = self.after_response(resp.status, resp.header('Retry-After'), attempt)
+                if backoff is None:
+                    return resp
+                close = getattr(resp, 'close', None)
+                if close:
+                    close()
+            time.sleep(backoff)
+            attempt += 1
+
+    def request(self, transport, method: str, url: str, headers: Dict[str, str] = None,
+                follow_redirects: bool = False, stream: bool = False):
+        """transport.request() (or transport.open() with stream=True) under the policy."""
+        send = transport.open if stream else transport.request
+        return self.execute(lambda: send(method, url, headers, follow_redirects=follow_redirects))
+
+
+# =============================================================================
+# Registry
+# =============================================================================
+
+_policies = {}  # type: Dict[str, RequestPolicy]
+_settings = {}  # type: Dict[str, Dict[str, Any]]
+_registry_lock = threading.Lock()
+
+
+def _origin(endpoint: str) -> str:
+    parsed = urlparse(endpoint)
+    return f"{parsed.scheme}://{parsed.netloc}".lower() if parsed.netloc else endpoint
+
+
+def configure_policy(endpoint: str, **settings) -> RequestPolicy:
+    """
+    Set the policy of an endpoint (scheme://host[:port]); keyword arguments
+    as RequestPolicy. Unset ones come from the environment. Resets its stats.
+    """
+    key = _origin(endpoint)
+    with _registry_lock:
+        _settings[key] = settings
+        _policies.pop(key, None)
+    return get_policy(endpoint)
+
+
+def get_policy(endpoint: str) -> RequestPolicy:
+    """The shared policy of an endpoint (any URL on it works)."""
+    key = _origin(endpoint)
+    with _registry_lock:
+        policy = _policies.get(key)
+        if policy is None:
+            settings = {
+                'retries': int(_env_float('MASTERGO_RETRIES', DEFAULT_RETRIES)),
+                'rate': _env_float('MASTERGO_RATE_LIMIT', None),
+                'burst': _env_float('MASTERGO_RATE_BURST', None),
+            }
+            settings.update(_settings.get(key, {}))
+            policy = _policies[key] = RequestPolicy(name=key, **settings)
+    return policy
+
+
+def policy_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every endpoint used so far: {endpoint: stats}."""
+    with _registry_lock:
+        policies = dict(_policies)
+    return {key: policy.stats for key, policy in policies.items()}
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+MasterGo profiler mode.
+
+`--profile PATH` on the analyzer and utils CLIs profiles the whole run and,
+when the process exits, writes:
+
+  PATH            cProfile data (pstats: snakeviz, `python -m pstats PATH`, ...)
+  PATH.collapsed  collapsed stacks ("a;b;c count" per line) for flamegraph
+                  tools (flamegraph.pl, speedscope, inferno)
+
+and prints the top functions by own time to stderr. stdout is not touched.
+
+cProfile records calls, not stacks, so the collapsed stacks come from a
+sampler thread reading the main thread's stack every millisecond.
+
+Usage:
+  python mastergo_analyze.py URL --profile /tmp/analyze.prof > /dev/null
+  flamegraph.pl /tmp/analyze.prof.collapsed > analyze.svg
+
+  # Summary of a saved profile
+  python mastergo_profile.py /tmp/analyze.prof --top 40 --sort cumulative
+
+  # As module
+  from mastergo_profile import Profiler
+  with Profiler() as profiler:
+      analyze_dsl(dsl)
+  profiler.write('/tmp/run.prof')
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import atexit
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from typing import Optional
+
+SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+DEFAULT_TOP = 25
+SORT_KEYS = ('tottime', 'cumulative', 'ncalls')
+
+
+# =============================================================================
+# Profiler
+# =============================================================================
+
+def _frame_label(code) -> str:
+    # ';' separates frames in collapsed stacks
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+
+
+class Profiler:
+    """cProfile plus sampled stacks of the thread that started it."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread_id = None
+        self._sampler = None
+        self._stopped = threading.Event()
+        self._switch_interval = None
+
+    def start(self) -> 'Profiler':
+        self._thread_id = threading.get_ident()
+        self._stopped.clear()
+        # The sampler needs the GIL to look at the stack; hand it over as often as it samples
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._sampler = threading.Thread(target=self._sample, name='mastergo-profile', daemon=True)
+        self._sampler.start()
+        self.profile.enable()
+        return self
+
+    def stop(self) -> None:
+        if self._sampler is None:
+            return
+        self.profile.disable()
+        self._stopped.set()
+        self._sampler.join()
+        self._sampler = None
+        sys.setswitchinterval(self._switch_interval)
+
+    def __enter__(self) -> 'Profiler':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _sample(self) -> None:
+        labels = {}  # code object -> label
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                self.stacks[';'.join(stack)] += 1
+                self.samples += 1
+            del frame
+
+    def collapsed(self) -> str:
+        """Sampled stacks in collapsed format, most frequent first."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def write(self, path: str) -> None:
+        """Write pstats to path and collapsed stacks to path.collapsed."""
+        self.profile.dump_stats(path)
+        with open(path + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+
+    def summary(self, top: int = DEFAULT_TOP, sort: str = 'tottime', stream=None) -> None:
+        """Print the top functions (to stderr by default)."""
+        print_summary(pstats.Stats(self.profile, stream=stream or sys.stderr), top, sort)
+
+
+def print_summary(stats: pstats.Stats, top: int = DEFAULT_TOP, sort: str = 'tottime') -> None:
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+
+
+# =============================================================================
+# CLI Integration
+# =============================================================================
+
+def add_profile_arguments(parser) -> None:
+    """Add --profile/--profile-top to an argparse parser."""
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Profile the run: pstats to PATH, collapsed stacks to PATH.collapsed, '
+                             'top functions to stderr')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP, metavar='N',
+                        help=f'Functions listed in the profile summary (default: {DEFAULT_TOP})')
+
+
+def setup_profiling(args) -> Optional[Profiler]:
+    """Start profiling when --profile was given; results are written at exit."""
+    path = getattr(args, 'profile', None)
+    if not path:
+        return None
+    profiler = Profiler().start()
+
+    def finish() -> None:
+        profiler.stop()
+        try:
+            profiler.write(path)
+        except OSError as e:
+            print(f"Error: Cannot write profile - {e}", file=sys.stderr)
+            return
+        profiler.summary(args.profile_top)
+        print(f"Profile: {path} (pstats), {path}.collapsed ({profiler.samples} stack samples)",
+              file=sys.stderr)
+
+    atexit.register(finish)
+    return profiler
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Summarize a saved MasterGo profile',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python mastergo_analyze.py URL --profile /tmp/analyze.prof > /dev/null
+  python mastergo_profile.py /tmp/analyze.prof --sort cumulative --top 40
+'''
+    )
+    parser.add_argument('path', help='pstats file written by --profile')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'Functions to list (default: {DEFAULT_TOP})')
+    parser.add_argument('--sort', choices=SORT_KEYS, default='tottime', help='Sort key (default: tottime)')
+
+    args = parser.parse_args()
+    try:
+        stats = pstats.Stats(args.path, stream=sys.stdout)
+    except (OSError, TypeError, ValueError, EOFError) as e:
+        print(f"Error: Cannot read profile {args.path} - {e}", file=sys.stderr)
+        sys.exit(1)
+    print_summary(stats, args.top, args.sort)
+
+
+if __name__ == '__main__':
+    main()
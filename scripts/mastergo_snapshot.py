@@ -0,0 +1,759 @@
+#!/usr/bin/env python3
+"""
+MasterGo DSL snapshots.
+
+Binary snapshot of a DSL response that is opened with mmap instead of
+parsed. Loading costs a header read; nodes are decoded on access:
+
+  header   magic, version, section counts and offsets
+  blobs    per-node JSON values of the fields below, concatenated
+  nodes    fixed-width records in pre-order: id/name/type/layerType string
+           indexes, key list, parent, depth, subtree end, children range,
+           value range, blob offset
+  children child entries (node index, or -1 - string index for ID refs)
+  values   per-node end offsets of each field's JSON value in the blob
+  slots    where top-level nodes sit in the document (nodes, root, nodeMap)
+  strings  interned UTF-8 strings (ids, names, types, key lists) + offsets
+  meta     small JSON: source tag, slot paths, nodeMap ranges
+  document the response without its nodes (version, localStyleMap, ...)
+
+A snapshot round-trips losslessly (same values, same key order). Nodes are
+read-only LazyNode mappings: `id`, `name`, `type`, `layerType` and
+`children` come straight from the record, any other field is decoded from
+its own JSON slice the first time it is read. Subtrees that are never
+visited are never decoded.
+
+Snapshots of fetched pages are kept next to the cached body in the skill's
+`.cache/dsl/` directory and reused for as long as the body is.
+
+Usage:
+  # Convert a DSL response, inspect it, turn it back into JSON
+  python mastergo_snapshot.py save dsl.json -o page.snap
+  python mastergo_snapshot.py info page.snap
+  python mastergo_snapshot.py load page.snap
+
+  # Fetch a page through the cache and print the path of its snapshot
+  python mastergo_snapshot.py fetch "https://mastergo.com/goto/xxx"
+
+  # As module
+  from mastergo_snapshot import Snapshot, save_snapshot, load_dsl_from_url
+  dsl = Snapshot('page.snap').document       # use like a parsed response
+  dsl = load_dsl_from_url(url)               # get_dsl(), via a cached snapshot
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import collections.abc
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import weakref
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Import from sibling module
+try:
+    from mastergo_cache import get_dsl_cache, get_cache_mode, add_cache_arguments, CACHE_OFF, CACHE_USE
+    from mastergo_compact import StringTable
+    from mastergo_get_dsl import (build_dsl_response, extract_ids_from_url, fetch_dsl_body, get_dsl,
+                                  get_endpoint, get_token)
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cache import get_dsl_cache, get_cache_mode, add_cache_arguments, CACHE_OFF, CACHE_USE
+    from mastergo_compact import StringTable
+    from mastergo_get_dsl import (build_dsl_response, extract_ids_from_url, fetch_dsl_body, get_dsl,
+                                  get_endpoint, get_token)
+
+MAGIC = b'MGSNAP\x00\x00'
+VERSION = 1
+
+# magic, version, node/string/child/value/slot counts,
+# blob/nodes/children/values/slots/string data/string offsets/meta/document offsets, meta/document lengths
+_HEADER = struct.Struct('<8s6I11Q')
+# id, name, type, layerType, keys, parent, depth, end, child start, child count, value start, blob offset
+_NODE = struct.Struct('<8i3IQ')
+# path number, key (list position or string index), node index
+_SLOT = struct.Struct('<3i')
+_SPAN = struct.Struct('<2I')
+_END = struct.Struct('<I')
+_STRING_SPAN = struct.Struct('<2Q')
+
+# Record field positions
+_KEYS, _PARENT, _DEPTH, _END_POS, _CHILD_START, _CHILD_COUNT, _VALUE_START, _BLOB = range(4, 12)
+
+# String fields stored in the record rather than as JSON
+_FAST_FIELDS = {'id': 0, 'name': 1, 'type': 2, 'layerType': 3}
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), check_circular=False).encode
+# Decodes one JSON value at an offset; values are written by _encode, so no whitespace handling
+_scan = json.JSONDecoder().scan_once
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _utf8(text: str) -> bytes:
+    # surrogatepass: JSON may carry lone surrogates ("\\ud800"), keep them as they are
+    return text.encode('utf-8', 'surrogatepass')
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+def _node_slots(document: Dict[str, Any]):
+    """
+    Split a response into its node-free remainder and the top-level node slots.
+
+    Nodes are looked for like mastergo_stream does: `nodes`, `root` and
+    `nodeMap` of the response or of its `dsl`. Returns (document, paths,
+    eager, maps) where eager is [(path number, key, node)] and maps is
+    [(path number, [(id, node), ...])] for nodeMaps holding only nodes.
+    """
+    document = dict(document)
+    paths, eager, maps = [], [], []
+
+    def path_number(path):
+        paths.append(list(path))
+        return len(paths) - 1
+
+    containers = [((), document)]
+    if isinstance(document.get('dsl'), dict):
+        dsl = document['dsl'] = dict(document['dsl'])
+        containers.append((('dsl',), dsl))
+
+    for base, container in containers:
+        nodes = container.get('nodes')
+        if isinstance(nodes, list) and any(isinstance(node, dict) for node in nodes):
+            nodes = container['nodes'] = list(nodes)
+            number = path_number(base + ('nodes',))
+            for pos, node in enumerate(nodes):
+                if isinstance(node, dict):
+                    eager.append((number, pos, node))
+                    nodes[pos] = None
+        if isinstance(container.get('root'), dict):
+            eager.append((path_number(base), 'root', container['root']))
+            container['root'] = None
+        node_map = container.get('nodeMap')
+        if isinstance(node_map, dict) and node_map:
+            if all(isinstance(node, dict) for node in node_map.values()):
+                maps.append((path_number(base + ('nodeMap',)), list(node_map.items())))
+                container['nodeMap'] = None
+            else:
+                node_map = container['nodeMap'] = dict(node_map)
+                number = path_number(base + ('nodeMap',))
+                for key, node in node_map.items():
+                    if isinstance(node, dict):
+                        eager.append((number, key, node))
+                        node_map[key] = None
+    return document, paths, eager, maps
+
+
+def _is_node_list(value: Any) -> bool:
+    return value.__class__ is list and all(
+        child.__class__ is str or isinstance(child, dict) for child in value)
+
+
+def _write(document: Dict[str, Any], out, source: Optional[str]) -> Dict[str, int]:
+    if not isinstance(document, dict):
+        raise ValueError("A snapshot needs a JSON object (DSL response)")
+    document, paths, eager, maps = _node_slots(document)
+
+    strings = StringTable()
+    intern = strings.intern
+    key_lists = {}
+    records = bytearray()
+    parents = array('i')
+    children = array('i')
+    values = array('I')
+    slots = bytearray()
+
+    out.write(bytes(_HEADER.size))
+    blob_start = blob_pos = _HEADER.size
+
+    def add_tree(root) -> int:
+        nonlocal blob_pos
+        first = len(parents)
+        # Stack entries: (node, parent index, depth, position in children to fill)
+        stack = [(root, -1, 0, -1)]
+        while stack:
+            node, parent, depth, entry = stack.pop()
+            index = len(parents)
+            if entry >= 0:
+                children[entry] = index
+            parents.append(parent)
+
+            keys = tuple(node)
+            key_list = key_lists.get(keys)
+            if key_list is None:
+                key_list = key_lists[keys] = intern(_encode(list(keys)))
+            fast = [-1, -1, -1, -1]
+            value_start = len(values)
+            child_start = len(children)
+            nested = ()
+            parts = []
+            size = 0
+            for key in keys:
+                value = node[key]
+                if key in _FAST_FIELDS and value.__class__ is str:
+                    fast[_FAST_FIELDS[key]] = intern(value)
+                elif key == 'children' and _is_node_list(value):
+                    nested = []
+                    for child in value:
+                        if child.__class__ is str:
+                            children.append(-1 - intern(child))
+                        else:
+                            nested.append((child, len(children)))
+                            children.append(0)
+                else:
+                    data = _utf8(_encode(value))
+                    parts.append(data)
+                    size += len(data)
+                values.append(size)
+            records.extend(_NODE.pack(fast[0], fast[1], fast[2], fast[3], key_list, parent, depth, 0,
+                                  child_start, len(children) - child_start, value_start,
+                                  blob_pos - blob_start))
+            if parts:
+                out.write(b''.join(parts))
+                blob_pos += size
+            for child, entry in reversed(nested):
+                stack.append((child, index, depth + 1, entry))
+        return first
+
+    for number, key, node in eager:
+        slot_key = key if key.__class__ is int else intern(key)
+        slots += _SLOT.pack(number, slot_key, add_tree(node))
+    map_ranges = []
+    for number, items in maps:
+        map_ranges.append([number, len(slots) // _SLOT.size, len(items)])
+        for key, node in items:
+            slots += _SLOT.pack(number, intern(key), add_tree(node))
+
+    # Subtree ends: children come after their parent, one backward pass propagates them
+    total = len(parents)
+    ends = array('i', range(1, total + 1))
+    for index in range(total - 1, -1, -1):
+        parent = parents[index]
+        if parent >= 0 and ends[index] > ends[parent]:
+            ends[parent] = ends[index]
+    for index in range(total):
+        struct.pack_into('<i', records, index * _NODE.size + _END_POS * 4, ends[index])
+
+    nodes_off = out.tell()
+    out.write(records)
+    children_off = out.tell()
+    out.write(_little_endian(children))
+    values_off = out.tell()
+    out.write(_little_endian(values))
+    slots_off = out.tell()
+    out.write(slots)
+
+    string_data_off = out.tell()
+    offsets = array('Q', [0])
+    position = 0
+    for value in strings.values:
+        data = _utf8(value)
+        out.write(data)
+        position += len(data)
+        offsets.append(position)
+    string_offsets_off = out.tell()
+    out.write(_little_endian(offsets))
+
+    meta = _utf8(_encode({'source': source, 'paths': paths, 'maps': map_ranges, 'eager': len(eager)}))
+    meta_off = out.tell()
+    out.write(meta)
+    document_data = _utf8(_encode(document))
+    document_off = out.tell()
+    out.write(document_data)
+    end = out.tell()
+
+    out.seek(0)
+    out.write(_HEADER.pack(MAGIC, VERSION, total, len(strings), len(children), len(values),
+                           len(slots) // _SLOT.size, blob_start, nodes_off, children_off, values_off,
+                           slots_off, string_data_off, string_offsets_off, meta_off, document_off,
+                           len(meta), len(document_data)))
+    return {'nodes': total, 'strings': len(strings), 'bytes': end}
+
+
+def save_snapshot(document: Dict[str, Any], path: str, source: str = None) -> Dict[str, int]:
+    """
+    Write a DSL response (as returned by get_dsl, or a raw DSL) as a snapshot.
+
+    The file is replaced atomically. `source` is an opaque tag stored with
+    the snapshot (Snapshot.source), e.g. to tie it to a cache entry.
+
+    Returns:
+        {'nodes': node count, 'strings': interned strings, 'bytes': file size}
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            info = _write(document, out, source)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return info
+
+
+# =============================================================================
+# Reading
+# =============================================================================
+
+class LazyNode(collections.abc.Mapping):
+    """
+    Read-only DSL node backed by a snapshot.
+
+    Behaves like the node dict (same keys, same order); field values are
+    decoded on first access and kept, `children` is built on each access
+    so visited subtrees can be released.
+    """
+
+    __slots__ = ('_snapshot', '_index', '_record', '_keys', '_positions', '_values', '__weakref__')
+
+    def __init__(self, snapshot: 'Snapshot', index: int):
+        self._snapshot = snapshot
+        self._index = index
+        self._record = record = _NODE.unpack_from(snapshot._mm, snapshot._nodes_off + index * _NODE.size)
+        self._keys, self._positions = snapshot._key_list(record[_KEYS])
+        self._values = {}
+
+    def __getitem__(self, key: str) -> Any:
+        values = self._values
+        if key in values:
+            return values[key]
+        pos = self._positions.get(key)
+        if pos is None:
+            raise KeyError(key)
+        return self._snapshot._field(self, key, pos)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        values = self._values
+        if key in values:
+            return values[key]
+        pos = self._positions.get(key)
+        if pos is None:
+            return default
+        return self._snapshot._field(self, key, pos)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"<LazyNode {self.get('type')} {self.get('id')!r}>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The node and its subtree as plain dicts."""
+        return self._snapshot.materialize(self._index)
+
+
+class NodeMap(collections.abc.Mapping):
+    """Read-only `nodeMap` of a snapshot (id -> LazyNode); the id index is built on first lookup."""
+
+    __slots__ = ('_snapshot', '_start', '_count', '_index')
+
+    def __init__(self, snapshot: 'Snapshot', start: int, count: int):
+        self._snapshot = snapshot
+        self._start = start
+        self._count = count
+        self._index = None
+
+    def _lookup(self) -> Dict[str, int]:
+        if self._index is None:
+            string = self._snapshot.string
+            self._index = {string(key): node for _, key, node in self._snapshot._slots(self._start, self._count)}
+        return self._index
+
+    def __getitem__(self, key: str) -> LazyNode:
+        return self._snapshot.node(self._lookup()[key])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        index = self._lookup().get(key)
+        return default if index is None else self._snapshot.node(index)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._lookup()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._lookup())
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class Snapshot:
+    """
+    A snapshot file mapped into memory.
+
+    Raises:
+        ValueError: Not a snapshot, or written by an incompatible version
+        OSError: File cannot be read
+
+    Example:
+        >>> with Snapshot('page.snap') as snap:
+        ...     dsl = snap.document
+        ...     extract_texts(dsl)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            try:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Not a MasterGo snapshot: {path}")
+        if len(self._mm) < _HEADER.size or self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a MasterGo snapshot: {path}")
+        (_, version, self.node_count, self.string_count, self._child_count, self._value_count,
+         self._slot_count, self._blob_off, self._nodes_off, self._children_off, self._values_off,
+         self._slots_off, self._string_data_off, self._string_offsets_off, meta_off, self._document_off,
+         meta_len, self._document_len) = _HEADER.unpack_from(self._mm, 0)
+        if version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Unsupported snapshot version {version}: {path}")
+        meta = json.loads(self._mm[meta_off:meta_off + meta_len].decode('utf-8', 'surrogatepass'))
+        self.source = meta['source']
+        self._paths = meta['paths']
+        self._maps = meta['maps']
+        self._eager = meta['eager']
+        self._strings = {}
+        self._key_lists = {}
+        # One LazyNode per index while it is in use, so identity (DSLIndex) holds
+        self._nodes = weakref.WeakValueDictionary()
+        self._document = None
+
+    def close(self) -> None:
+        """Unmap the file; nodes read from it can no longer be decoded."""
+        self._mm.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Low-level access
+
+    def string(self, index: int) -> str:
+        """Interned string by index."""
+        value = self._strings.get(index)
+        if value is None:
+            start, end = _STRING_SPAN.unpack_from(self._mm, self._string_offsets_off + 8 * index)
+            base = self._string_data_off
+            value = self._strings[index] = self._mm[base + start:base + end].decode('utf-8', 'surrogatepass')
+        return value
+
+    def _key_list(self, index: int) -> Tuple[Tuple[str, ...], Dict[str, int]]:
+        key_list = self._key_lists.get(index)
+        if key_list is None:
+            keys = tuple(json.loads(self.string(index)))
+            key_list = self._key_lists[index] = (keys, {key: pos for pos, key in enumerate(keys)})
+        return key_list
+
+    def _slots(self, start: int, count: int) -> Iterator[Tuple[int, int, int]]:
+        offset = self._slots_off + start * _SLOT.size
+        return _SLOT.iter_unpack(self._mm[offset:offset + count * _SLOT.size])
+
+    def _children(self, record: tuple) -> List[Any]:
+        count = record[_CHILD_COUNT]
+        if not count:
+            return []
+        entries = struct.unpack_from(f'<{count}i', self._mm, self._children_off + 4 * record[_CHILD_START])
+        node, string = self.node, self.string
+        return [node(entry) if entry >= 0 else string(-1 - entry) for entry in entries]
+
+    def _json(self, record: tuple, begin: int, end: int) -> Any:
+        start = self._blob_off + record[_BLOB]
+        return _scan(self._mm[start + begin:start + end].decode('utf-8', 'surrogatepass'), 0)[0]
+
+    def _field(self, node: LazyNode, key: str, pos: int) -> Any:
+        record = node._record
+        offset = self._values_off + 4 * (record[_VALUE_START] + pos)
+        if pos:
+            begin, end = _SPAN.unpack_from(self._mm, offset - 4)
+        else:
+            begin, (end,) = 0, _END.unpack_from(self._mm, offset)
+        if begin < end:
+            value = self._json(record, begin, end)
+        elif key == 'children':
+            # Not kept, so visited subtrees can be released
+            return self._children(record)
+        else:
+            value = self.string(record[_FAST_FIELDS[key]])
+        node._values[key] = value
+        return value
+
+    # Nodes
+
+    def node(self, index: int) -> LazyNode:
+        """Node by pre-order index."""
+        node = self._nodes.get(index)
+        if node is None:
+            node = self._nodes[index] = LazyNode(self, index)
+        return node
+
+    def materialize(self, index: int) -> Dict[str, Any]:
+        """Node by pre-order index and its subtree, as plain dicts."""
+        mm = self._mm
+        result = {}
+        stack = [(index, result)]
+        while stack:
+            index, out = stack.pop()
+            record = _NODE.unpack_from(mm, self._nodes_off + index * _NODE.size)
+            keys, _ = self._key_list(record[_KEYS])
+            ends = struct.unpack_from(f'<{len(keys)}I', mm, self._values_off + 4 * record[_VALUE_START])
+            begin = 0
+            for key, end in zip(keys, ends):
+                if begin < end:
+                    out[key] = self._json(record, begin, end)
+                elif key == 'children':
+                    items = out[key] = []
+                    count = record[_CHILD_COUNT]
+                    if count:
+                        entries = struct.unpack_from(f'<{count}i', mm,
+                                                     self._children_off + 4 * record[_CHILD_START])
+                        for entry in entries:
+                            if entry < 0:
+                                items.append(self.string(-1 - entry))
+                            else:
+                                child = {}
+                                items.append(child)
+                                stack.append((entry, child))
+                else:
+                    out[key] = self.string(record[_FAST_FIELDS[key]])
+                begin = end
+        return result
+
+    # Documents
+
+    def _assemble(self, lazy: bool) -> Dict[str, Any]:
+        start = self._document_off
+        document = json.loads(self._mm[start:start + self._document_len].decode('utf-8', 'surrogatepass'))
+        make = self.node if lazy else self.materialize
+
+        def resolve(path):
+            value = document
+            for key in path:
+                value = value[key]
+            return value
+
+        for number, start, count in self._maps:
+            path = self._paths[number]
+            if lazy:
+                value = NodeMap(self, start, count)
+            else:
+                value = {self.string(key): make(node) for _, key, node in self._slots(start, count)}
+            resolve(path[:-1])[path[-1]] = value
+        for number, key, node in self._slots(0, self._eager):
+            container = resolve(self._paths[number])
+            container[key if container.__class__ is list else self.string(key)] = make(node)
+        return document
+
+    @property
+    def document(self) -> Dict[str, Any]:
+        """The response with LazyNode nodes, usable wherever a parsed DSL is expected."""
+        if self._document is None:
+            self._document = self._assemble(lazy=True)
+        return self._document
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The complete response as plain JSON data (equal to what was saved)."""
+        return self._assemble(lazy=False)
+
+    def info(self) -> Dict[str, Any]:
+        """Section sizes and counts."""
+        return {
+            'path': self.path,
+            'bytes': len(self._mm),
+            'nodes': self.node_count,
+            'strings': self.string_count,
+            'children': self._child_count,
+            'topLevelNodes': self._slot_count,
+            'blobBytes': self._nodes_off - self._blob_off,
+            'documentBytes': self._document_len,
+            'source': self.source,
+        }
+
+
+# =============================================================================
+# Cached Pages
+# =============================================================================
+
+def _open_cached(path: str, body_id: Optional[str]) -> Optional[Snapshot]:
+    """Open a cached snapshot if it was made from the body identified by body_id."""
+    if not body_id:
+        return None
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, ValueError):
+        return None
+    if snapshot.source != body_id:
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def load_dsl(file_id: str, layer_id: str, token: str = None, endpoint: str = None,
+             cache: str = None) -> Dict[str, Any]:
+    """
+    Fetch MasterGo DSL data like get_dsl, through a snapshot of the cached page.
+
+    The first call stores a snapshot next to the cached body; later calls
+    map it instead of parsing the body, so nodes are LazyNode views decoded
+    on access. The snapshot is replaced whenever the cached body is. Without
+    a cache (cache='off') this is get_dsl.
+
+    Returns:
+        Dict containing dsl, componentDocumentLinks, and rules
+    """
+    token = token or get_token()
+    endpoint = endpoint or get_endpoint()
+
+    if not token:
+        raise ValueError("MASTERGO_TOKEN env var is required but not set")
+
+    cache = cache or get_cache_mode()
+    if cache == CACHE_OFF:
+        return get_dsl(file_id, layer_id, token, endpoint, cache)
+
+    store = get_dsl_cache()
+    if cache == CACHE_USE:
+        entry = store.get(endpoint, file_id, layer_id, token, read_body=False)
+        if entry and entry.fresh:
+            snapshot = _open_cached(store.snapshot_path(entry), entry.meta.get('bodyId'))
+            if snapshot:
+                return snapshot.document
+
+    body = fetch_dsl_body(file_id, layer_id, token, endpoint, cache)
+    entry = store.get(endpoint, file_id, layer_id, token, read_body=False)
+    if entry is None or entry.meta.get('size') != len(body) or not entry.meta.get('bodyId'):
+        # Cache not writable (or replaced meanwhile), nothing to attach a snapshot to
+        return build_dsl_response(body)
+
+    # Still valid after a 304 Not Modified
+    snapshot = _open_cached(store.snapshot_path(entry), entry.meta['bodyId'])
+    if snapshot:
+        return snapshot.document
+
+    result = build_dsl_response(body)
+    try:
+        path = store.snapshot_path(entry)
+        save_snapshot(result, path, source=entry.meta['bodyId'])
+        store.written(os.path.getsize(path))
+    except OSError:
+        # Best effort, like the cache itself
+        pass
+    return result
+
+
+def load_dsl_from_url(url: str, token: str = None, endpoint: str = None, cache: str = None) -> Dict[str, Any]:
+    """load_dsl for a MasterGo URL or short link."""
+    file_id, layer_id = extract_ids_from_url(url, cache)
+    return load_dsl(file_id, layer_id, token, endpoint, cache)
+
+
+def cached_snapshot_path(file_id: str, layer_id: str, token: str = None, endpoint: str = None,
+                         cache: str = None) -> str:
+    """Make sure the page has a cached snapshot and return its path."""
+    token = token or get_token()
+    endpoint = endpoint or get_endpoint()
+    if (cache or get_cache_mode()) == CACHE_OFF:
+        raise ValueError("Snapshots of fetched pages are kept in the cache, which is disabled")
+    load_dsl(file_id, layer_id, token, endpoint, cache)
+    store = get_dsl_cache()
+    entry = store.get(endpoint, file_id, layer_id, token, read_body=False)
+    snapshot = _open_cached(store.snapshot_path(entry), entry.meta.get('bodyId')) if entry else None
+    if snapshot is None:
+        raise ValueError(f"Could not write a snapshot to {store.directory}")
+    snapshot.close()
+    return snapshot.path
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='MasterGo DSL snapshots (binary, mmap-loaded)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # DSL JSON (file or stdin) -> snapshot
+  python mastergo_snapshot.py save dsl.json -o page.snap
+  python mastergo_get_dsl.py URL | python mastergo_snapshot.py save - -o page.snap
+
+  # Snapshot -> DSL JSON, or a summary of its sections
+  python mastergo_snapshot.py load page.snap
+  python mastergo_snapshot.py info page.snap
+
+  # Fetch a page through the cache, print the path of its snapshot
+  python mastergo_snapshot.py fetch "https://mastergo.com/goto/xxx"
+  python mastergo_utils.py texts --snapshot "$(python mastergo_snapshot.py fetch URL)"
+'''
+    )
+    parser.add_argument('command', choices=['save', 'load', 'info', 'fetch'], help='Snapshot command')
+    parser.add_argument('source', help='save: DSL JSON file (- for stdin); load/info: snapshot; fetch: URL')
+    parser.add_argument('--output', '-o', help='save: snapshot file to write')
+    parser.add_argument('--pretty', '-p', action='store_true', help='load: pretty print JSON output')
+    parser.add_argument('--token', '-t', help='fetch: API Token (defaults to MASTERGO_TOKEN)')
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'save':
+            if not args.output:
+                parser.error('save requires --output')
+            if args.source == '-':
+                document = json.load(sys.stdin)
+            else:
+                with open(args.source, 'r', encoding='utf-8') as f:
+                    document = json.load(f)
+            info = save_snapshot(document, args.output)
+            print(f"Wrote {args.output}: {info['nodes']} nodes, {info['strings']} strings, "
+                  f"{info['bytes']} bytes", file=sys.stderr)
+        elif args.command == 'load':
+            with Snapshot(args.source) as snapshot:
+                indent = 2 if args.pretty else None
+                print(json.dumps(snapshot.to_dict(), ensure_ascii=False, indent=indent))
+        elif args.command == 'info':
+            with Snapshot(args.source) as snapshot:
+                print(json.dumps(snapshot.info(), indent=2))
+        else:
+            file_id, layer_id = extract_ids_from_url(args.source, args.cache)
+            print(cached_snapshot_path(file_id, layer_id, args.token, cache=args.cache))
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+MasterGo streaming DSL parser.
+
+Incremental JSON parser for very large DSL payloads. The input (HTTP
+response, stdin or a file) is read in chunks and every DSL node is emitted
+as soon as its object closes, without its nested child nodes. Memory stays
+bounded by the depth of the tree and the chunk size, not by the size of
+the document.
+
+Nodes are recognised in the `nodes` array, `root`, `nodeMap` values and the
+`children` arrays of other nodes (at top level or under a wrapping `dsl`
+key). Everything else in the document (version, localStyleMap, rules, ...)
+is kept and available as `parser.document` once the stream is consumed.
+ID-string children are not resolved: nodeMap nodes are emitted where the
+nodeMap appears, as top-level nodes.
+
+Usage:
+  # As module
+  from mastergo_stream import DSLStreamParser, stream_extract
+
+  for event in DSLStreamParser(open('dsl.json', 'rb')):
+      print(event.depth, event.node.get('name'))
+
+  stream_extract(sys.stdin.buffer, ['texts', 'navigations'])
+
+  # As CLI
+  cat dsl.json | python mastergo_stream.py texts navigations components
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import codecs
+import json
+import re
+import sys
+from json.decoder import scanstring
+from typing import Any, Dict, Iterator, List, Optional
+
+# Import from sibling module
+try:
+    from mastergo_utils import EXTRACTORS, ComponentLinkExtractor, Extractor, get_doc_links
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_utils import EXTRACTORS, ComponentLinkExtractor, Extractor, get_doc_links
+
+CHUNK_SIZE = 64 * 1024
+# Failed C-decoder attempts tolerated per chunk before falling back to tokens
+MAX_FAST_FAILURES = 16
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?')
+_NUMBER_CHARS = re.compile(r'[-+.eE0-9]*')
+_LITERALS = {'t': ('true', True), 'f': ('false', False), 'n': ('null', None)}
+
+# Frame kinds
+_TOP, _DSL, _MAP, _NODE, _NODEMAP, _ARRAY, _CHILDREN, _NODES = range(8)
+_OBJECT_FRAMES = (_TOP, _DSL, _MAP, _NODE, _NODEMAP)
+_DSL_FRAMES = (_TOP, _DSL)
+_NODE_LISTS = (_CHILDREN, _NODES, _NODEMAP)
+_DECODABLE = (_MAP, _NODE, _ARRAY)
+_SOURCES = {_CHILDREN: 'children', _NODES: 'nodes', _NODEMAP: 'nodeMap'}
+
+# Placeholder value for a node that was already emitted
+_EMITTED = object()
+
+
+class NodeEvent:
+    """
+    A DSL node read from the stream.
+
+    Attributes:
+        node: Node dict; nested child nodes are not included (ID-string children are kept)
+        seq: Pre-order position of the node in the document
+        depth: Nesting depth (0 for top-level and nodeMap nodes)
+        parent_seq: seq of the parent node, None for top-level nodes
+        parent_id: id of the parent node, if it appeared before the children
+        source: Where the node was found: 'nodes', 'root', 'nodeMap' or 'children'
+    """
+
+    __slots__ = ('node', 'seq', 'depth', 'parent_seq', 'parent_id', 'source')
+
+    def __init__(self, node: Dict[str, Any], seq: int, depth: int,
+                 parent_seq: Optional[int], parent_id: Optional[str], source: str = 'children'):
+        self.node = node
+        self.seq = seq
+        self.depth = depth
+        self.parent_seq = parent_seq
+        self.parent_id = parent_id
+        self.source = source
+
+
+def _subtree_events(node: Dict[str, Any], seq: int, depth: int, parent_seq: Optional[int],
+                    parent_id: Optional[str], source: str) -> List[NodeEvent]:
+    """Split an already decoded node into events (children first), like the tokenizer does."""
+    # Pre-order walk assigns seq numbers and strips child nodes from their parents
+    ordered = []
+    stack = [(node, depth, parent_seq, parent_id, source)]
+    while stack:
+        node, depth, parent_seq, parent_id, source = stack.pop()
+        ordered.append(NodeEvent(node, seq, depth, parent_seq, parent_id, source))
+        children = node.get('children')
+        if isinstance(children, list):
+            child_nodes = [child for child in children if isinstance(child, dict)]
+            if child_nodes:
+                remaining = [child for child in children if not isinstance(child, dict)]
+                if remaining:
+                    node['children'] = remaining
+                else:
+                    del node['children']
+                node_id = node.get('id')
+                for child in reversed(child_nodes):
+                    stack.append((child, depth + 1, seq, node_id, 'children'))
+        seq += 1
+
+    # Post-order: every node after all of its descendants
+    events = []
+    pending = []
+    for event in ordered:
+        while pending and pending[-1].seq != event.parent_seq:
+            events.append(pending.pop())
+        pending.append(event)
+    events.extend(reversed(pending))
+    return events
+
+
+class DSLStreamParser:
+    """
+    Chunked JSON parser emitting NodeEvents in document order of node *end*
+    (children before their parent). `seq` gives the pre-order position.
+
+    Values that are already complete in the buffer are decoded with the C
+    json scanner; only containers cut by a chunk boundary are tokenized.
+    The tokenizer checks values, not separators (a stray ',' is ignored).
+
+    Example:
+        >>> parser = DSLStreamParser(sys.stdin.buffer)
+        >>> texts = [e.node['characters'] for e in parser if e.node.get('type') == 'TEXT']
+        >>> parser.document['dsl']['version']
+        '1.0.0'
+    """
+
+    def __init__(self, fp, chunk_size: int = CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.document = None
+        self.node_count = 0
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[NodeEvent]:
+        return self.nodes()
+
+    def nodes(self) -> Iterator[NodeEvent]:
+        """Parse the stream, yielding one NodeEvent per DSL node."""
+        fp = self.fp
+        chunk_size = self.chunk_size
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        raw_decode = json.JSONDecoder().raw_decode
+        ws_match = _WHITESPACE.match
+        number_match = _NUMBER.match
+        number_span = _NUMBER_CHARS.match
+
+        buf = ''
+        pos = 0
+        eof = False
+        fast_failures = 0
+        # Frames are lists: [kind, container, pending key, node seq, node depth, parent seq, source]
+        stack = []
+        node_frames = []
+        seq = 0
+        done = False
+
+        def read_more() -> str:
+            """Next decoded chunk, '' at end of input."""
+            while True:
+                chunk = fp.read(chunk_size)
+                if not chunk:
+                    return decoder.decode(b'', True)
+                self.bytes_read += len(chunk)
+                if not isinstance(chunk, bytes):
+                    return chunk
+                # A chunk may end inside a multi-byte character
+                text = decoder.decode(chunk)
+                if text:
+                    return text
+
+        while True:
+            pos = ws_match(buf, pos).end()
+            char = buf[pos] if pos < len(buf) else ''
+            # Refill when the next token may be cut by the end of the buffer
+            refill = not eof and (
+                not char
+                or (char in _LITERALS and len(buf) - pos < 5)
+                or (char in '-0123456789' and number_span(buf, pos).end() == len(buf))
+            )
+            if char == '"' and not eof:
+                try:
+                    value, end = scanstring(buf, pos + 1)
+                except json.JSONDecodeError:
+                    refill = True
+            if refill:
+                # Keep the unparsed tail and append the next chunk
+                more = read_more()
+                eof = not more
+                buf = buf[pos:] + more
+                pos = 0
+                fast_failures = 0
+                continue
+            if not char:
+                break
+
+            if done:
+                raise json.JSONDecodeError("Extra data", buf, pos)
+
+            frame = stack[-1] if stack else None
+
+            if char == '"':
+                if eof:
+                    value, end = scanstring(buf, pos + 1)
+                pos = end
+                if frame is not None and frame[0] in _OBJECT_FRAMES and frame[2] is None:
+                    frame[2] = value
+                    continue
+
+            elif char == ',' or char == ':':
+                pos += 1
+                continue
+
+            elif char == '{' or char == '[':
+                key = frame[2] if frame is not None else None
+                parent_kind = frame[0] if frame is not None else None
+                if char == '{':
+                    if frame is None:
+                        kind = _TOP
+                    elif parent_kind in _NODE_LISTS or (parent_kind in _DSL_FRAMES and key == 'root'):
+                        kind = _NODE
+                    elif parent_kind == _TOP and key == 'dsl':
+                        kind = _DSL
+                    elif parent_kind in _DSL_FRAMES and key == 'nodeMap':
+                        kind = _NODEMAP
+                    else:
+                        kind = _MAP
+                elif parent_kind == _NODE and key == 'children':
+                    kind = _CHILDREN
+                elif parent_kind in _DSL_FRAMES and key == 'nodes':
+                    kind = _NODES
+                else:
+                    kind = _ARRAY
+
+                depth, parent_seq, source = 0, None, None
+                if kind == _NODE:
+                    source = _SOURCES.get(parent_kind, 'root')
+                    if parent_kind == _CHILDREN and node_frames:
+                        depth, parent_seq = node_frames[-1][4] + 1, node_frames[-1][3]
+
+                decoded = False
+                if kind in _DECODABLE and fast_failures < MAX_FAST_FAILURES:
+                    try:
+                        value, pos = raw_decode(buf, pos)
+                        decoded = True
+                    except (ValueError, RecursionError):
+                        # Cut by the end of the buffer (or invalid, reported by the tokenizer)
+                        fast_failures += 1
+
+                if not decoded:
+                    pos += 1
+                    new_frame = [kind, [] if char == '[' else {}, None, seq, depth, parent_seq, source]
+                    if kind == _NODE:
+                        seq += 1
+                        node_frames.append(new_frame)
+                    stack.append(new_frame)
+                    continue
+
+                if kind == _NODE:
+                    parent_id = node_frames[-1][1].get('id') if parent_seq is not None else None
+                    events = _subtree_events(value, seq, depth, parent_seq, parent_id, source)
+                    seq += len(events)
+                    self.node_count += len(events)
+                    for event in events:
+                        yield event
+                    value = _EMITTED
+
+            elif char == '}' or char == ']':
+                pos += 1
+                if not stack:
+                    raise json.JSONDecodeError("Unexpected closing bracket", buf, pos - 1)
+                closed = stack.pop()
+                value = closed[1]
+                if closed[0] == _NODE:
+                    node_frames.pop()
+                    parent_id = None
+                    if closed[5] is not None:
+                        parent_id = node_frames[-1][1].get('id')
+                    self.node_count += 1
+                    yield NodeEvent(value, closed[3], closed[4], closed[5], parent_id, closed[6])
+                    value = _EMITTED
+                frame = stack[-1] if stack else None
+
+            elif char in '-0123456789':
+                match = number_match(buf, pos)
+                if not match:
+                    raise json.JSONDecodeError("Invalid number", buf, pos)
+                text = match.group()
+                value = float(text) if match.group(1) or match.group(2) else int(text)
+                pos = match.end()
+
+            elif char in _LITERALS:
+                word, value = _LITERALS[char]
+                if not buf.startswith(word, pos):
+                    raise json.JSONDecodeError("Expecting value", buf, pos)
+                pos += len(word)
+
+            else:
+                raise json.JSONDecodeError("Expecting value", buf, pos)
+
+            # Attach completed value to the enclosing container
+            if frame is None:
+                self.document = None if value is _EMITTED else value
+                done = True
+                continue
+            kind = frame[0]
+            if kind in _OBJECT_FRAMES:
+                key = frame[2]
+                frame[2] = None
+                if value is _EMITTED:
+                    continue
+                if kind == _NODE and key == 'children' and not value:
+                    # All children were emitted as nodes
+                    continue
+                frame[1][key] = value
+            elif value is not _EMITTED:
+                frame[1].append(value)
+
+        if stack or not done:
+            raise json.JSONDecodeError("Unexpected end of JSON input", buf, pos)
+
+
+# =============================================================================
+# Streaming Extraction
+# =============================================================================
+
+def stream_extract(fp, extractors: List[Any] = ('texts', 'navigations', 'components'),
+                   chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Run extractors over a streamed DSL in bounded memory.
+
+    Accepts the same registered names / Extractor instances as
+    mastergo_utils.run_extractors, except ones that need the whole tree
+    (e.g. 'tree'). Texts, navigations and component links come out in
+    document pre-order, like the in-memory versions; other extractors see
+    children before their parents.
+
+    Example:
+        >>> stream_extract(sys.stdin.buffer, ['texts', 'components'])
+        {'texts': [...], 'components': [...]}
+    """
+    instances = []
+    for extractor in extractors:
+        if isinstance(extractor, str):
+            if extractor not in EXTRACTORS:
+                raise ValueError(f"Unknown extractor: {extractor}")
+            extractor = EXTRACTORS[extractor]()
+        if type(extractor).leave is not Extractor.leave:
+            raise ValueError(f"Extractor '{extractor.name}' needs the whole tree and cannot stream")
+        instances.append(extractor)
+
+    ordered = [ex for ex in instances if ex.per_node]
+    # (seq, start, end) slices of each ordered extractor's result list
+    marks = {id(ex): [] for ex in ordered}
+    # Component links are first-seen unique, collect them per node and replay in order
+    link_extractors = [ex for ex in instances if isinstance(ex, ComponentLinkExtractor)]
+    links = []
+    others = [ex for ex in instances if not ex.per_node and ex not in link_extractors]
+
+    parser = DSLStreamParser(fp, chunk_size)
+    for event in parser:
+        node, depth, parent_id = event.node, event.depth, event.parent_id
+        for ex in ordered:
+            items = ex.result()
+            start = len(items)
+            ex.enter(node, depth, parent_id)
+            if len(items) > start:
+                marks[id(ex)].append((event.seq, start, len(items)))
+        for ex in others:
+            ex.enter(node, depth, parent_id)
+        if link_extractors and 'componentInfo' in node:
+            node_links = get_doc_links(node)
+            if node_links:
+                links.append((event.seq, node_links))
+
+    # Children are emitted before their parents, restore pre-order
+    for ex in ordered:
+        items = ex.result()
+        items[:] = [item for _, start, end in sorted(marks[id(ex)]) for item in items[start:end]]
+    links.sort(key=lambda entry: entry[0])
+    for ex in link_extractors:
+        for _, node_links in links:
+            ex.add(node_links)
+
+    results = {ex.name: ex.result() for ex in instances}
+
+    # Pre-extracted links of a wrapped get_dsl response take precedence
+    document = parser.document
+    if 'components' in results and isinstance(document, dict) and 'componentDocumentLinks' in document:
+        results['components'] = document['componentDocumentLinks']
+
+    return results
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    """CLI for streaming extraction from stdin."""
+    import argparse
+
+    streamable = [name for name, cls in EXTRACTORS.items() if cls.leave is Extractor.leave]
+    parser = argparse.ArgumentParser(description='Stream-extract data from a large MasterGo DSL on stdin')
+    parser.add_argument('extractors', nargs='+', choices=streamable, help='Extractors to run')
+    parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print output')
+
+    args = parser.parse_args()
+
+    try:
+        result = stream_extract(sys.stdin.buffer, args.extractors)
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if len(args.extractors) == 1:
+        result = result[args.extractors[0]]
+    indent = 2 if args.pretty else None
+    print(json.dumps(result, ensure_ascii=False, indent=indent))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+MasterGo shared style classes.
+
+Identical style sets repeat across the nodes of a page and across the pages
+of a site. Each node's merged styles (style.value + style.layoutStyles) are
+normalized and fingerprinted; every distinct set gets one class, so a page
+becomes a compact stylesheet plus a node -> class map.
+
+Class names are derived from the fingerprint and remembered in a table
+inside the skill directory (`.cache/styles.json`), so the same styles get
+the same class on every page and in every run.
+
+Usage:
+  # Stylesheet of the shared classes of a page
+  python mastergo_styles.py "https://mastergo.com/goto/xxx" --css
+
+  # Stylesheet + node -> class map for several pages (JSON)
+  python mastergo_styles.py URL1 URL2
+
+  # As module
+  from mastergo_styles import StyleTable, extract_styles
+  table = StyleTable.load()
+  result = extract_styles(dsl_response, table)
+  result['nodes']['1:12']   # 'mg-3fa9c1'
+  table.save()
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Import from sibling module
+try:
+    from mastergo_cache import STYLE_TABLE_FILE, add_cache_arguments, atomic_write, get_cache_dir
+    from mastergo_get_dsl import load_dsl
+    from mastergo_utils import Extractor, get_node_styles, run_extractors
+except ImportError:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cache import STYLE_TABLE_FILE, add_cache_arguments, atomic_write, get_cache_dir
+    from mastergo_get_dsl import load_dsl
+    from mastergo_utils import Extractor, get_node_styles, run_extractors
+
+DEFAULT_PREFIX = 'mg-'
+CLASS_HASH_CHARS = 6  # hex characters of the fingerprint in a class name (more on collision)
+TABLE_VERSION = 1
+
+Declarations = Tuple[Tuple[str, str], ...]
+
+
+# =============================================================================
+# Normalization
+# =============================================================================
+
+_UPPER = re.compile(r'([A-Z])')
+_SPACES = re.compile(r'\s+')
+
+
+def _property_name(name: str) -> str:
+    """CSS property name: camelCase (csstype) to kebab-case, vendor prefixes kept."""
+    if name.startswith('--'):
+        return name
+    if '-' in name:
+        return name.lower()
+    kebab = _UPPER.sub(r'-\1', name).lower()
+    if kebab.startswith(('webkit-', 'moz-', 'ms-', 'o-')):
+        kebab = '-' + kebab
+    return kebab
+
+
+def _css_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_css_text(item) for item in value)
+    return _SPACES.sub(' ', str(value)).strip()
+
+
+def normalize_styles(styles: Dict[str, Any]) -> Declarations:
+    """
+    Canonical form of a style dict: sorted (property, value) pairs.
+
+    Properties are kebab-cased, values turned into whitespace-normalized
+    text; empty values are dropped. Equal styles give equal tuples.
+    """
+    declarations = {}
+    for name, value in styles.items():
+        if value is None or isinstance(value, dict):
+            continue
+        text = _css_text(value)
+        if text:
+            declarations[_property_name(name)] = text
+    return tuple(sorted(declarations.items()))
+
+
+def style_fingerprint(declarations: Declarations) -> str:
+    """Hex fingerprint of normalized styles."""
+    data = json.dumps(declarations, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=8).hexdigest()
+
+
+# =============================================================================
+# Style Table
+# =============================================================================
+
+class StyleTable:
+    """
+    Interned style sets: fingerprint <-> class name.
+
+    In memory only unless a path is given; load()/save() use the table in
+    the cache directory. Saving merges with what other runs stored
+    meanwhile.
+    """
+
+    def __init__(self, path: Optional[str] = None, prefix: str = DEFAULT_PREFIX):
+        self.path = path
+        self.prefix = prefix
+        self.classes = {}    # fingerprint -> class name
+        self.styles = {}     # class name -> {property: value}
+        self._owner = {}     # class name -> fingerprint
+        self._interned = {}  # declarations -> class name (this process)
+        self._added = set()  # fingerprints new since load
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, prefix: str = DEFAULT_PREFIX) -> 'StyleTable':
+        """Table stored in the cache directory (or at path); empty if there is none yet."""
+        table = cls(path or os.path.join(get_cache_dir(), STYLE_TABLE_FILE), prefix)
+        for fingerprint, (suffix, styles) in table._read().items():
+            table._register(fingerprint, prefix + suffix, styles)
+        table._added.clear()
+        return table
+
+    def _read(self) -> Dict[str, List]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get('version') != TABLE_VERSION:
+            return {}
+        return data.get('classes') or {}
+
+    def _register(self, fingerprint: str, name: str, styles: Dict[str, str]) -> None:
+        self.classes[fingerprint] = name
+        self.styles[name] = styles
+        self._owner[name] = fingerprint
+        self._added.add(fingerprint)
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def intern(self, styles: Dict[str, Any]) -> Optional[str]:
+        """Class name for a style dict (None when it has no declarations)."""
+        declarations = normalize_styles(styles)
+        if not declarations:
+            return None
+        name = self._interned.get(declarations)
+        if name is not None:
+            return name
+        fingerprint = style_fingerprint(declarations)
+        with self._lock:
+            name = self.classes.get(fingerprint)
+            if name is None:
+                length = CLASS_HASH_CHARS
+                name = self.prefix + fingerprint[:length]
+                while name in self._owner:
+                    length += 2
+                    name = self.prefix + fingerprint[:length]
+                self._register(fingerprint, name, dict(declarations))
+            self._interned[declarations] = name
+        return name
+
+    def save(self) -> None:
+        """Write the table back (merged with the stored one). No-op for in-memory tables."""
+        if self.path is None or not self._added:
+            return
+        with self._lock:
+            stored = self._read()
+            # Stored without the prefix, so tables are shared between prefixes
+            taken = {entry[0] for entry in stored.values()}
+            for fingerprint in self._added:
+                name = self.classes[fingerprint]
+                suffix = name[len(self.prefix):]
+                if fingerprint not in stored and suffix not in taken:
+                    stored[fingerprint] = [suffix, self.styles[name]]
+            data = {'version': TABLE_VERSION, 'classes': stored}
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write(self.path, json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            self._added.clear()
+
+    def to_css(self, names: Optional[Iterable[str]] = None) -> str:
+        """Stylesheet of the given classes (all of them by default), one rule per line."""
+        rules = []
+        for name in (self.styles if names is None else names):
+            body = '; '.join(f'{prop}: {value}' for prop, value in self.styles[name].items())
+            rules.append(f'.{name} {{ {body}; }}')
+        return '\n'.join(rules) + ('\n' if rules else '')
+
+
+# =============================================================================
+# Extraction
+# =============================================================================
+
+class StyleClassExtractor(Extractor):
+    """Node id -> shared class of its merged styles."""
+
+    name = 'style_classes'
+
+    def __init__(self, table: StyleTable, page: Optional[str] = None):
+        self.table = table
+        self.page = page
+        self.nodes = {}
+        self.count = 0
+
+    def enter(self, node, depth, parent_id):
+        self.count += 1
+        style = node.get('style')
+        if not style:
+            return
+        name = self.table.intern(get_node_styles(node))
+        if name is not None:
+            node_id = node.get('id')
+            self.nodes[node_id if self.page is None else f'{self.page}/{node_id}'] = name
+
+    def result(self):
+        return self.nodes
+
+
+def extract_styles(dsl_data: Dict[str, Any], table: Optional[StyleTable] = None,
+                   page: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Shared style classes of a DSL (single traversal).
+
+    Args:
+        dsl_data: DSL response or DSLIndex
+        table: Style table to intern into (a new in-memory one by default);
+               reuse it across pages so they share classes
+        page: Prefix for node ids ("page/nodeId") when combining pages
+
+    Returns:
+        {'classes': {class: {property: value}} (used by this DSL, in first use order),
+         'nodes': {nodeId: class}, 'stats': {'nodes', 'styledNodes', 'classes'}}
+    """
+    table = table if table is not None else StyleTable()
+    extractor = StyleClassExtractor(table, page)
+    nodes = run_extractors(dsl_data, [extractor])['style_classes']
+    used = dict.fromkeys(nodes.values())
+    return {
+        'classes': {name: table.styles[name] for name in used},
+        'nodes': nodes,
+        'stats': {'nodes': extractor.count, 'styledNodes': len(nodes), 'classes': len(used)},
+    }
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Extract shared style classes from MasterGo DSL',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Stylesheet of the shared classes of a page
+  python mastergo_styles.py "https://mastergo.com/goto/xxx" --css
+
+  # Classes and node -> class map of several pages, sharing classes (JSON)
+  python mastergo_styles.py URL1 URL2 --pretty
+
+  # From stdin, without touching the stored class table
+  python mastergo_get_dsl.py URL | python mastergo_styles.py - --no-persist
+'''
+    )
+    parser.add_argument('sources', nargs='+', help='MasterGo URLs, DSL JSON files or - for stdin')
+    parser.add_argument('--css', action='store_true', help='Only print the stylesheet')
+    parser.add_argument('--prefix', default=DEFAULT_PREFIX, help=f'Class name prefix (default: {DEFAULT_PREFIX})')
+    parser.add_argument('--no-persist', action='store_true',
+                        help='Do not read or update the class table in the cache directory')
+    parser.add_argument('--token', '-t', help='API Token (defaults to MASTERGO_TOKEN)')
+    parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+    if args.sources.count('-') > 1:
+        parser.error('only one source can be read from stdin')
+    if not re.match(r'^-?[A-Za-z_][\w-]*$', args.prefix):
+        parser.error('--prefix must start a valid CSS class name')
+
+    try:
+        table = StyleTable(prefix=args.prefix) if args.no_persist else StyleTable.load(prefix=args.prefix)
+        several = len(args.sources) > 1
+        classes, nodes = {}, {}
+        stats = {'nodes': 0, 'styledNodes': 0, 'classes': 0}
+        for i, source in enumerate(args.sources):
+            result = extract_styles(load_dsl(source, args.token, args.cache), table,
+                                    page=str(i) if several else None)
+            classes.update(result['classes'])
+            nodes.update(result['nodes'])
+            stats['nodes'] += result['stats']['nodes']
+            stats['styledNodes'] += result['stats']['styledNodes']
+        stats['classes'] = len(classes)
+        table.save()
+
+        stylesheet = table.to_css(classes)
+        if args.css:
+            sys.stdout.write(stylesheet)
+        else:
+            indent = 2 if args.pretty else None
+            print(json.dumps({'stylesheet': stylesheet, 'nodes': nodes, 'stats': stats},
+                             ensure_ascii=False, indent=indent))
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == '__main__':
+    main()
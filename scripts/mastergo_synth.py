@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Synthetic MasterGo DSL generator.
+
+Builds realistic pages of an exact node count for benchmarks and load
+tests: frames nested up to a maximum depth with a random fan-out, texts,
+component instances with documentation links, navigations, repeated style
+sets and a localStyleMap of mixed token types. Output is deterministic
+for a given seed.
+
+Usage:
+  # 100k node page as a /mcp/dsl body
+  python mastergo_synth.py --nodes 100000 > page.json
+
+  # Deep and narrow, text heavy, flat nodeMap shape
+  python mastergo_synth.py --nodes 5000 --depth 30 --fanout 2 --text-ratio 0.6 --flat
+
+  # As module
+  from mastergo_synth import generate_dsl
+  dsl = generate_dsl(nodes=10000, tokens=50, seed=1)
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+from collections import deque
+from typing import Any, Dict, List
+
+DEFAULT_NODES = 1000
+DEFAULT_DEPTH = 8
+DEFAULT_FANOUT = 6
+DEFAULT_TEXT_RATIO = 0.3
+DEFAULT_INSTANCE_RATIO = 0.1
+DEFAULT_NAVIGATION_RATIO = 0.02
+DEFAULT_TOKENS = 24
+DEFAULT_BASE_URL = 'https://example.com'
+NAVIGATION_TARGETS = 50  # navigations target layers 0:1 .. 0:NAVIGATION_TARGETS
+
+COMPONENTS = ('button', 'input', 'select', 'checkbox', 'table', 'modal', 'tabs', 'tooltip')
+COLORS = ('#1f2329', '#646a73', '#8f959e', '#ffffff', '#f5f6f7', '#3370ff', '#f54a45')
+TOKEN_TYPES = ('color', 'color', 'padding', 'border-radius', 'gap', 'text', 'effect')
+ALIAS_ROLES = {
+    'color': 'backgroundTokenId',
+    'padding': 'paddingTokenId',
+    'border-radius': 'radiusTokenId',
+    'gap': 'gapTokenId',
+}
+
+
+# =============================================================================
+# Tokens
+# =============================================================================
+
+def _token(index: int, rng: random.Random) -> Dict[str, Any]:
+    token_type = TOKEN_TYPES[index % len(TOKEN_TYPES)]
+    name = f'{token_type}-{index}'
+    token = {'id': f't-{index}', 'type': token_type, 'name': name, 'variable': f'--{name}'}
+    if token_type == 'color':
+        token['value'] = rng.choice(COLORS)
+    elif token_type == 'text':
+        size = rng.choice((12, 14, 16, 20, 24))
+        token['textItems'] = {
+            'fontfamily': {'value': 'PingFang SC'},
+            'fontsize': {'value': f'{size}px'},
+            'lineheight': {'value': f'{size + 8}px'},
+        }
+    elif token_type == 'effect':
+        token['effectItems'] = {'shadow': {'value': f'0 {rng.randint(1, 8)}px 16px rgba(0,0,0,0.12)'}}
+    else:
+        token['value'] = rng.choice((4, 8, 12, 16, 24))
+    return token
+
+
+def generate_style_map(tokens: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """localStyleMap of `tokens` entries cycling through the token types."""
+    rng = random.Random(seed)
+    style_map = {}
+    for index in range(tokens):
+        token = _token(index, rng)
+        style_map[token['id']] = token
+    return style_map
+
+
+# =============================================================================
+# Nodes
+# =============================================================================
+
+def generate_dsl(nodes: int = DEFAULT_NODES, depth: int = DEFAULT_DEPTH, fanout: int = DEFAULT_FANOUT,
+                 text_ratio: float = DEFAULT_TEXT_RATIO, instance_ratio: float = DEFAULT_INSTANCE_RATIO,
+                 navigation_ratio: float = DEFAULT_NAVIGATION_RATIO, tokens: int = DEFAULT_TOKENS,
+                 seed: int = 0, flat: bool = False, page: str = '1',
+                 base_url: str = DEFAULT_BASE_URL) -> Dict[str, Any]:
+    """
+    Generate a DSL page with exactly `nodes` nodes.
+
+    Args:
+        nodes: Node count
+        depth: Maximum nesting depth (top-level nodes are depth 0)
+        fanout: Maximum children per frame (each frame gets 1..fanout)
+        text_ratio: Share of non-root nodes that are TEXT
+        instance_ratio: Share of non-root nodes that are component INSTANCEs
+        navigation_ratio: Share of nodes with a navigation interaction
+        tokens: Size of localStyleMap; nodes reference its tokens
+        seed: Random seed (same arguments and seed, same page)
+        flat: Emit the nodeMap shape (children as id strings) instead of nesting
+        page: Prefix of the node ids ("page:n")
+        base_url: Base of the component documentation links
+
+    Returns:
+        DSL dict (the /mcp/dsl body)
+    """
+    if nodes < 1 or depth < 0 or fanout < 1:
+        raise ValueError("nodes and fanout must be at least 1, depth at least 0")
+    if text_ratio < 0 or instance_ratio < 0 or text_ratio + instance_ratio > 1:
+        raise ValueError("text and instance ratios must be non-negative and sum to at most 1")
+
+    rng = random.Random(seed)
+    style_map = generate_style_map(tokens, seed)
+    aliases = {}  # role -> token ids
+    for token_id, token in style_map.items():
+        role = ALIAS_ROLES.get(token['type'])
+        if role:
+            aliases.setdefault(role, []).append(token_id)
+    roles = sorted(aliases)
+    docs = [f'{base_url}/docs/{name}.mdx' for name in COMPONENTS]
+
+    count = 0
+
+    def make(kind: str) -> Dict[str, Any]:
+        nonlocal count
+        count += 1
+        node = {
+            'id': f'{page}:{count}',
+            'name': f'{kind.title()} {count}',
+            'type': kind,
+            'layout': {'width': {'type': 'PIXEL', 'value': rng.choice((24, 48, 120, 320, 640, 1440))},
+                       'height': {'type': 'PIXEL', 'value': rng.choice((16, 24, 32, 48, 200, 900))}},
+            'style': {'tag': 'TEXT' if kind == 'TEXT' else 'DIV',
+                      'value': {'color': rng.choice(COLORS)},
+                      'layoutStyles': {'display': 'flex', 'flexDirection': rng.choice(('row', 'column'))}},
+        }
+        if roles and rng.random() < 0.3:
+            role = rng.choice(roles)
+            node['style']['styleTokenAlias'] = {role: rng.choice(aliases[role])}
+        if kind == 'TEXT':
+            node['characters'] = f'Text {count}'
+        elif kind == 'INSTANCE':
+            node['componentInfo'] = {'componentSetDocumentLink': [rng.choice(docs)]}
+        if navigation_ratio and rng.random() < navigation_ratio:
+            target = f'0:{rng.randint(1, NAVIGATION_TARGETS)}'
+            node['interactive'] = [{'type': 'navigation', 'targetLayerId': target}]
+        return node
+
+    def pick_kind() -> str:
+        r = rng.random()
+        if r < text_ratio:
+            return 'TEXT'
+        if r < text_ratio + instance_ratio:
+            return 'INSTANCE'
+        return 'FRAME' if rng.random() < 0.6 else 'RECTANGLE'
+
+    # Breadth-first: frames are filled in order, new top-level frames when all are full
+    roots = []
+    pending = deque()  # (frame, depth) that can still get children
+    while count < nodes:
+        if not pending:
+            root = make('FRAME')
+            roots.append(root)
+            if depth > 0:
+                pending.append((root, 0))
+            continue
+        frame, level = pending.popleft()
+        children = frame['children'] = []
+        for _ in range(rng.randint(1, fanout)):
+            if count >= nodes:
+                break
+            child = make(pick_kind())
+            children.append(child)
+            if child['type'] == 'FRAME' and level + 1 < depth:
+                pending.append((child, level + 1))
+
+    dsl = {'version': '1.0', 'framework': 'REACT', 'settings': {'useToken': bool(tokens)},
+           'localStyleMap': style_map}
+    if not flat:
+        dsl['nodes'] = roots
+        return dsl
+
+    node_map = {}
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        node_map[node['id']] = node
+        children = node.get('children')
+        if children:
+            stack.extend(children)
+            node['children'] = [child['id'] for child in children]
+    dsl['nodes'] = [root['id'] for root in roots]
+    dsl['nodeMap'] = node_map
+    return dsl
+
+
+def count_nodes(dsl: Dict[str, Any]) -> int:
+    """Nodes of a generated DSL (either shape)."""
+    if 'nodeMap' in dsl:
+        return len(dsl['nodeMap'])
+    total = 0
+    stack = list(dsl.get('nodes', []))  # type: List[Dict[str, Any]]
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(node.get('children', ()))
+    return total
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate a synthetic MasterGo DSL page',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # 1M node page for benchmarks
+  python mastergo_synth.py --nodes 1000000 > big.json
+
+  # Analyze a generated page
+  python mastergo_synth.py --nodes 500 | python mastergo_analyze.py --stdin
+'''
+    )
+    parser.add_argument('--nodes', '-n', type=int, default=DEFAULT_NODES, help=f'Node count (default: {DEFAULT_NODES})')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help=f'Maximum depth (default: {DEFAULT_DEPTH})')
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT,
+                        help=f'Maximum children per frame (default: {DEFAULT_FANOUT})')
+    parser.add_argument('--text-ratio', type=float, default=DEFAULT_TEXT_RATIO,
+                        help=f'Share of TEXT nodes (default: {DEFAULT_TEXT_RATIO})')
+    parser.add_argument('--instance-ratio', type=float, default=DEFAULT_INSTANCE_RATIO,
+                        help=f'Share of INSTANCE nodes (default: {DEFAULT_INSTANCE_RATIO})')
+    parser.add_argument('--navigation-ratio', type=float, default=DEFAULT_NAVIGATION_RATIO,
+                        help=f'Share of nodes with a navigation (default: {DEFAULT_NAVIGATION_RATIO})')
+    parser.add_argument('--tokens', type=int, default=DEFAULT_TOKENS,
+                        help=f'localStyleMap size (default: {DEFAULT_TOKENS})')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--flat', action='store_true', help='nodeMap shape instead of nested children')
+    parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
+
+    args = parser.parse_args()
+    try:
+        dsl = generate_dsl(args.nodes, args.depth, args.fanout, args.text_ratio, args.instance_ratio,
+                           args.navigation_ratio, args.tokens, args.seed, args.flat)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        json.dump(dsl, sys.stdout, ensure_ascii=False, indent=2 if args.pretty else None,
+                  separators=None if args.pretty else (',', ':'))
+        sys.stdout.write('\n')
+    except BrokenPipeError:
+        # Reader went away: point stdout at devnull so the exit flush does not raise again
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+MasterGo phase timings.
+
+The scripts time their phases as spans: short link resolution (resolve),
+TCP connect (connect), TLS handshake (tls), request sent until response
+headers (wait), body read (download), JSON parsing (decode), tree walks
+(traverse) and output (format). Spans cost nothing until a hook is
+registered; each finished span is passed to the hooks as a dict:
+
+  {"span": "download", "start": 1700000000.123456, "duration": 0.0421,
+   "bytes": 183422, "url": "https://..."}
+
+start is a Unix timestamp, duration in seconds; bytes, nodes, url, host,
+reused and error are present when they apply.
+
+Usage:
+  # JSON span lines on stderr
+  python mastergo_get_dsl.py URL --timings > /dev/null
+  python mastergo_analyze.py URL --timings
+
+  # Totals per phase from collected span lines (other lines are skipped)
+  python mastergo_analyze.py URL --timings 2>&1 >/dev/null | python mastergo_timing.py
+
+  # As module: forward spans into your own tracing
+  import mastergo_timing
+  mastergo_timing.add_hook(lambda record: tracer.record(record['span'], record))
+  with mastergo_timing.span('my-phase') as record:
+      record['nodes'] = work()
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+Hook = Callable[[Dict[str, Any]], None]
+
+_hooks = []  # type: List[Hook]
+_hooks_lock = threading.Lock()
+
+
+# =============================================================================
+# Hooks
+# =============================================================================
+
+def add_hook(hook: Hook) -> None:
+    """Call hook(record) for every finished span (from any thread)."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + [hook]
+
+
+def remove_hook(hook: Hook) -> None:
+    global _hooks
+    with _hooks_lock:
+        _hooks = [h for h in _hooks if h is not hook]
+
+
+def enabled() -> bool:
+    """Whether spans are recorded (some hook is registered)."""
+    return bool(_hooks)
+
+
+def emit(record: Dict[str, Any]) -> None:
+    """Pass a finished span to the hooks; failing hooks are ignored."""
+    for hook in _hooks:
+        try:
+            hook(record)
+        except Exception:
+            pass
+
+
+def stderr_hook(stream=None) -> Hook:
+    """Hook writing each span as one JSON line (to stderr by default)."""
+    lock = threading.Lock()
+
+    def write(record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with lock:
+            (stream or sys.stderr).write(line)
+    return write
+
+
+# =============================================================================
+# Spans
+# =============================================================================
+
+@contextmanager
+def span(phase: str, **fields) -> Iterator[Dict[str, Any]]:
+    """
+    Time the block as a span of `phase`.
+
+    Yields the record so the block can add fields (bytes, nodes, ...). An
+    exception leaving the block is noted as 'error' and re-raised.
+    """
+    if not _hooks:
+        yield {}
+        return
+    record = {}
+    record.update(fields)
+    start = time.time()
+    begin = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record['error'] = type(e).__name__
+        raise
+    finally:
+        emit_span(phase, start, time.perf_counter() - begin, **record)
+
+
+def emit_span(phase: str, start: float, duration: float, **fields) -> None:
+    """Emit a span measured by the caller (start: Unix time, duration: seconds)."""
+    if _hooks:
+        emit(dict({'span': phase, 'start': round(start, 6), 'duration': round(duration, 6)}, **fields))
+
+
+def add_timing_arguments(parser) -> None:
+    """Add the --timings switch to an argparse parser."""
+    parser.add_argument('--timings', action='store_true',
+                        help='Write phase timing spans as JSON lines to stderr')
+
+
+def setup_timings(args) -> None:
+    """Start writing spans to stderr when --timings was given."""
+    if getattr(args, 'timings', False):
+        add_hook(stderr_hook())
+
+
+# =============================================================================
+# Summary
+# =============================================================================
+
+def read_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Span records among text lines (e.g. a captured stderr)."""
+    for line in lines:
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and 'span' in record and 'duration' in record:
+            yield record
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Per phase: count, total and max duration, bytes and nodes (in first-seen order)."""
+    phases = {}
+    for record in records:
+        total = phases.setdefault(record['span'], {'count': 0, 'seconds': 0.0, 'max': 0.0,
+                                                   'bytes': 0, 'nodes': 0})
+        total['count'] += 1
+        total['seconds'] += record['duration']
+        total['max'] = max(total['max'], record['duration'])
+        total['bytes'] += record.get('bytes') or 0
+        total['nodes'] += record.get('nodes') or 0
+    for total in phases.values():
+        total['seconds'] = round(total['seconds'], 6)
+    return phases
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Summarize MasterGo timing spans per phase',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  python mastergo_get_dsl.py URL --timings 2>&1 >/dev/null | python mastergo_timing.py
+  python mastergo_timing.py spans.log --json
+'''
+    )
+    parser.add_argument('file', nargs='?', help='File with span lines (default: stdin)')
+    parser.add_argument('--json', action='store_true', help='JSON output')
+
+    args = parser.parse_args()
+    try:
+        if args.file:
+            with open(args.file, 'r', encoding='utf-8') as f:
+                phases = summarize(read_records(f))
+        else:
+            phases = summarize(read_records(sys.stdin))
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(phases, indent=2))
+        return
+    print(f"{'Phase':<12} {'Count':>6} {'Total ms':>10} {'Max ms':>10} {'Bytes':>12} {'Nodes':>10}")
+    for phase, total in phases.items():
+        print(f"{phase:<12} {total['count']:>6} {total['seconds'] * 1000:>10.1f} {total['max'] * 1000:>10.1f}"
+              f" {total['bytes']:>12} {total['nodes']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+MasterGo design tokens.
+
+Index of the design tokens of one or more DSL responses, built in one pass:
+
+- token id -> resolved token (CSS variable, value; text and effect tokens
+  expanded into one variable per sub-item, e.g. --title-font-size)
+- token id -> nodes using it, and node id -> tokens it uses (by role)
+- node id -> CSS declarations referencing the variables
+
+and a deduplicated `:root { --var: value; }` stylesheet of all tokens.
+
+Usage:
+  # Token stylesheet of a page
+  python mastergo_tokens.py "https://mastergo.com/goto/xxx" --css
+
+  # Resolved tokens and their usage, for several pages at once
+  python mastergo_tokens.py URL1 URL2
+
+  # As module
+  from mastergo_tokens import TokenIndex
+  index = TokenIndex().add(dsl_response)
+  index.node_css('1:12')   # {'background-color': 'var(--brand-primary)'}
+  print(index.to_css())
+
+Zero dependencies, compatible with Python 3.6+
+"""
+
+import argparse
+import json
+import re
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+# Import from sibling module
+try:
+    from mastergo_cache import add_cache_arguments
+    from mastergo_get_dsl import load_dsl
+    from mastergo_utils import Extractor, get_dsl_root, run_extractors
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cache import add_cache_arguments
+    from mastergo_get_dsl import load_dsl
+    from mastergo_utils import Extractor, get_dsl_root, run_extractors
+
+# styleTokenAlias role -> CSS property (other roles: camelCase name without "TokenId")
+ROLE_PROPERTIES = {
+    'backgroundTokenId': 'background-color',
+    'strokeColorTokenId': 'border-color',
+    'paddingTokenId': 'padding',
+    'gapTokenId': 'gap',
+    'radiusTokenId': 'border-radius',
+}
+
+# Sub-items of text and effect tokens -> CSS property (also the variable suffix)
+SUB_ITEM_PROPERTIES = {
+    'font': 'font',
+    'fontfamily': 'font-family',
+    'fontstyle': 'font-style',
+    'fontsize': 'font-size',
+    'lineheight': 'line-height',
+    'decoration': 'text-decoration',
+    'letterspacing': 'letter-spacing',
+    'shadow': 'box-shadow',
+    'filter': 'filter',
+    'backdropfilter': 'backdrop-filter',
+}
+
+# Token types whose bare numbers are pixel lengths
+LENGTH_TYPES = ('padding', 'border-radius', 'border-width', 'gap')
+
+
+# =============================================================================
+# Resolution
+# =============================================================================
+
+def _kebab(name: str) -> str:
+    return re.sub(r'(?<=[a-z0-9])([A-Z])', r'-\1', name).lower()
+
+
+def _variable_name(token_id: str, token: Dict[str, Any]) -> str:
+    """CSS custom property of a token: its `variable`, else derived from its name or id."""
+    variable = token.get('variable') or ''
+    match = re.match(r'^var\((--[^,)]+)', variable.strip())
+    if match:
+        return match.group(1)
+    if variable:
+        return variable if variable.startswith('--') else f'--{variable}'
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '-', token.get('name') or token_id).strip('-').lower()
+    return f'--{slug or token_id}'
+
+
+def css_value(value: Any, token_type: str = '') -> str:
+    """CSS text of a token value (lists are space separated, numbers get px for lengths)."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return f'{value}px' if token_type in LENGTH_TYPES and value else str(value)
+    if isinstance(value, (list, tuple)):
+        return ' '.join(css_value(item, token_type) for item in value)
+    if isinstance(value, dict):
+        return css_value(value.get('value', ''), token_type)
+    return '' if value is None else str(value)
+
+
+def resolve_token(token_id: str, token: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resolved form of a localStyleMap entry.
+
+    Returns:
+        {'id', 'name', 'type', 'variable', 'value', 'variables'}, where
+        `variables` lists (variable, CSS value, CSS property) of every CSS
+        custom property the token defines. Plain tokens define one, text
+        and effect tokens one per sub-item (their `value` is then None and
+        `items` maps sub-item -> {'variable', 'value', 'property'}).
+    """
+    token_type = token.get('type', '')
+    variable = _variable_name(token_id, token)
+    resolved = {
+        'id': token_id,
+        'name': token.get('name', ''),
+        'type': token_type,
+        'variable': variable,
+        'value': None,
+    }
+
+    sub_items = token.get('textItems') or token.get('effectItems')
+    if isinstance(sub_items, dict):
+        items = {}
+        for key, item in sub_items.items():
+            if item is None:
+                continue
+            prop = SUB_ITEM_PROPERTIES.get(key, _kebab(key))
+            if isinstance(item, dict) and item.get('variable'):
+                sub_variable = _variable_name(f'{token_id}-{key}', item)
+            else:
+                sub_variable = f'{variable}-{prop}'
+            items[key] = {'variable': sub_variable, 'value': css_value(item, token_type), 'property': prop}
+        resolved['items'] = items
+        resolved['variables'] = [(item['variable'], item['value'], item['property']) for item in items.values()]
+    else:
+        resolved['value'] = css_value(token.get('value', ''), token_type)
+        resolved['variables'] = [(variable, resolved['value'], None)]
+    return resolved
+
+
+# =============================================================================
+# Index
+# =============================================================================
+
+class _AliasCollector(Extractor):
+    """(node id, styleTokenAlias) of every node referencing tokens."""
+
+    name = 'aliases'
+
+    def __init__(self):
+        self.aliases = []
+
+    def enter(self, node, depth, parent_id):
+        style = node.get('style')
+        if style:
+            alias = style.get('styleTokenAlias')
+            if alias:
+                self.aliases.append((node.get('id'), alias))
+
+    def result(self):
+        return self.aliases
+
+
+class TokenIndex:
+    """
+    Design tokens of one or more DSLs, with usage in both directions.
+
+    Add DSL responses (or DSLIndexes) with add(); with several files, pass
+    `page` so node ids stay distinct ("page/nodeId"). Tokens are keyed by
+    id; a later definition of the same id replaces the earlier one.
+    """
+
+    def __init__(self):
+        self.tokens = {}  # token id -> resolved token
+        self.usage = {}   # token id -> [node id]
+        self.node_tokens = {}  # node id -> {role: token id}
+        self._declarations = {}  # (role, token id) -> [(CSS property, value)]
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, dsl_data: Dict[str, Any], page: Optional[str] = None) -> 'TokenIndex':
+        """Index the tokens of a DSL and the nodes referencing them (one traversal)."""
+        for token_id, token in (get_dsl_root(dsl_data).get('localStyleMap') or {}).items():
+            if isinstance(token, dict):
+                self.tokens[token_id] = resolve_token(token_id, token)
+        self._declarations.clear()
+
+        for node_id, alias in run_extractors(dsl_data, [_AliasCollector()])['aliases']:
+            key = node_id if page is None else f'{page}/{node_id}'
+            roles = self.node_tokens.setdefault(key, {})
+            for role, token_id in alias.items():
+                if not token_id:
+                    continue
+                roles[role] = token_id
+                users = self.usage.setdefault(token_id, [])
+                if not users or users[-1] != key:
+                    users.append(key)
+        return self
+
+    def resolve(self, token_id: str) -> Optional[Dict[str, Any]]:
+        """Resolved token (see resolve_token), None for unknown ids."""
+        return self.tokens.get(token_id)
+
+    def nodes_using(self, token_id: str) -> List[str]:
+        """Ids of the nodes referencing a token, in document order."""
+        return self.usage.get(token_id, [])
+
+    def tokens_of(self, node_id: str) -> Dict[str, str]:
+        """{role: token id} of a node, e.g. {'backgroundTokenId': 'token-123'}."""
+        return self.node_tokens.get(node_id, {})
+
+    def declarations(self, role: str, token_id: str) -> List[Tuple[str, str]]:
+        """(CSS property, value) pairs for a token used in a role, values as var() references."""
+        key = (role, token_id)
+        cached = self._declarations.get(key)
+        if cached is None:
+            token = self.tokens.get(token_id)
+            if token is None:
+                cached = []
+            elif 'items' in token:
+                cached = [(item['property'], f"var({item['variable']})") for item in token['items'].values()]
+            else:
+                prop = ROLE_PROPERTIES.get(role) or _kebab(role[:-len('TokenId')] if role.endswith('TokenId') else role)
+                cached = [(prop, f"var({token['variable']})")]
+            self._declarations[key] = cached
+        return cached
+
+    def node_css(self, node_id: str) -> Dict[str, str]:
+        """CSS declarations of a node's token references: {property: 'var(--x)'}."""
+        css = {}
+        for role, token_id in self.tokens_of(node_id).items():
+            css.update(self.declarations(role, token_id))
+        return css
+
+    def variables(self, used_only: bool = False) -> Dict[str, str]:
+        """
+        CSS custom properties of all tokens: {variable: value}, deduplicated.
+
+        The first definition of a variable wins; see conflicts() for
+        variables defined with different values.
+        """
+        result = {}
+        for token_id, token in self.tokens.items():
+            if used_only and token_id not in self.usage:
+                continue
+            for variable, value, _ in token['variables']:
+                result.setdefault(variable, value)
+        return result
+
+    def conflicts(self) -> Dict[str, List[str]]:
+        """Variables defined by several tokens with different values: {variable: [values]}."""
+        values = {}
+        for token in self.tokens.values():
+            for variable, value, _ in token['variables']:
+                seen = values.setdefault(variable, [])
+                if value not in seen:
+                    seen.append(value)
+        return {variable: seen for variable, seen in values.items() if len(seen) > 1}
+
+    def to_css(self, used_only: bool = False, selector: str = ':root') -> str:
+        """Stylesheet declaring every token variable once."""
+        lines = [f'{selector} {{']
+        for variable, value in self.variables(used_only).items():
+            lines.append(f'  {variable}: {value};')
+        lines.append('}')
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self) -> Dict[str, Any]:
+        """Tokens (without the internal variables list) and usage."""
+        return {
+            'tokens': {token_id: {key: value for key, value in token.items() if key != 'variables'}
+                       for token_id, token in self.tokens.items()},
+            'usage': self.usage,
+            'conflicts': self.conflicts(),
+        }
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Resolve MasterGo design tokens and emit CSS variables',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # :root { --var: value } stylesheet of a page
+  python mastergo_tokens.py "https://mastergo.com/goto/xxx" --css
+
+  # Only tokens the page actually uses
+  python mastergo_tokens.py URL --css --used-only
+
+  # Resolved tokens and usage across several pages (JSON)
+  python mastergo_tokens.py URL1 URL2 --pretty
+
+  # Token declarations of one node
+  python mastergo_get_dsl.py URL | python mastergo_tokens.py - --node 1:12
+'''
+    )
+    parser.add_argument('sources', nargs='+', help='MasterGo URLs, DSL JSON files or - for stdin')
+    parser.add_argument('--css', action='store_true', help='Print the :root stylesheet')
+    parser.add_argument('--used-only', action='store_true', help='Only tokens referenced by nodes')
+    parser.add_argument('--node', metavar='ID', help='Print the CSS declarations of one node (PAGE/ID with several sources, PAGE counting from 0)')
+    parser.add_argument('--token', '-t', help='API Token (defaults to MASTERGO_TOKEN)')
+    parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
+    add_cache_arguments(parser)
+
+    args = parser.parse_args()
+    if args.sources.count('-') > 1:
+        parser.error('only one source can be read from stdin')
+
+    try:
+        index = TokenIndex()
+        several = len(args.sources) > 1
+        for i, source in enumerate(args.sources):
+            index.add(load_dsl(source, args.token, args.cache), page=str(i) if several else None)
+
+        indent = 2 if args.pretty else None
+        if args.css:
+            sys.stdout.write(index.to_css(args.used_only))
+        elif args.node:
+            print(json.dumps(index.node_css(args.node), ensure_ascii=False, indent=indent))
+        else:
+            print(json.dumps(index.to_json(), ensure_ascii=False, indent=indent))
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
+        sys.exit(1)
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,16 +9,60 @@ Usage:
   # As module
   from mastergo_utils import extract_texts, extract_navigations, build_component_tree
   
+  # Several extractions in one traversal
+  from mastergo_utils import run_extractors
+  run_extractors(dsl, ['texts', 'navigations', 'components', 'tokens_used', 'stats', 'tree'])
+  
+  # Selector queries (compiled once, answered from the DSLIndex)
+  from mastergo_utils import DSLIndex, query
+  index = DSLIndex(dsl)
+  query(index, 'FRAME[name^=Header] > TEXT')
+  
   # As CLI (for testing)
   cat dsl.json | python mastergo_utils.py texts
   cat dsl.json | python mastergo_utils.py navigations
   cat dsl.json | python mastergo_utils.py tree
+  cat dsl.json | python mastergo_utils.py all
+  
+  # Nodes matching a CSS-like selector
+  cat dsl.json | python mastergo_utils.py query 'FRAME[name^=Header] > TEXT'
+  cat dsl.json | python mastergo_utils.py query 'INSTANCE[componentInfo]:depth(<=3)' --full
+  
+  # Very large payloads, parsed incrementally
+  cat dsl.json | python mastergo_utils.py texts --stream
+  
+  # Binary snapshot (see mastergo_snapshot), mapped instead of parsed
+  python mastergo_utils.py texts --snapshot page.snap
+  
+  # Profile an extraction (see mastergo_profile), results on stdout as usual
+  cat dsl.json | python mastergo_utils.py all --profile /tmp/utils.prof
 """
 
+if __name__ == '__main__':
+    # Hand the run to mastergo_daemon when it is running (before the heavier imports below)
+    try:
+        from mastergo_daemon import run_in_daemon
+        run_in_daemon('mastergo_utils')
+    except ImportError:
+        pass
+
 import json
+import re
 import sys
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Mapping
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs
-from typing import Optional, Dict, List, Any
+from typing import Optional, Callable, Dict, Iterator, List, Any, Tuple, Union
+
+# Import from sibling module
+try:
+    from mastergo_cancel import Cancelled, cancelled
+except ImportError:
+    import os
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from mastergo_cancel import Cancelled, cancelled
 
 
 # =============================================================================
@@ -58,14 +102,1035 @@ def is_valid_mastergo_url(url: str) -> bool:
 
 
 # =============================================================================
-# DSL Extraction
+# Traversal
 # =============================================================================
+#
+# Traversals use an explicit stack instead of recursion, so arbitrarily deep
+# designs never hit Python's recursion limit. They stop with Cancelled when
+# the run is cancelled (see mastergo_cancel).
+
+# Stack marker for "subtree finished" entries
+_LEAVE = object()
+
+# Node types: plain dicts, or read-only mappings such as mastergo_snapshot.LazyNode
+_NODE_TYPES = (dict, Mapping)
+
 
 def get_dsl_root(dsl_data: Dict[str, Any]) -> Dict[str, Any]:
     """Get the actual DSL root from response (handles wrapped format)."""
     return dsl_data.get('dsl', dsl_data)
 
 
+def get_node_map(dsl_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Get the flat id -> node map (`nodeMap`), empty for nested-only DSLs."""
+    return get_dsl_root(dsl_data).get('nodeMap') or {}
+
+
+def get_root_nodes(dsl_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Get top-level nodes of a DSL: the `nodes` array followed by `root`.
+    
+    Entries given as ID strings are resolved through `nodeMap`.
+    """
+    root = get_dsl_root(dsl_data)
+    roots = list(root.get('nodes', []))
+    if root.get('root'):
+        roots.append(root['root'])
+    if any(isinstance(node, str) for node in roots):
+        node_map = get_node_map(dsl_data)
+        roots = [node_map.get(node) if isinstance(node, str) else node for node in roots]
+    return roots
+
+
+def _seen(visited: Optional[set], node: Dict[str, Any]) -> bool:
+    """Whether node's id was visited already (recording it otherwise); no-op without a set."""
+    if visited is None:
+        return False
+    node_id = node.get('id')
+    if node_id is None:
+        return False
+    if node_id in visited:
+        return True
+    visited.add(node_id)
+    return False
+
+
+def iter_nodes(dsl_data: Dict[str, Any], order: str = 'pre',
+               roots: Optional[List[Dict[str, Any]]] = None
+               ) -> Iterator[Tuple[Dict[str, Any], int, Optional[str], Tuple[int, ...]]]:
+    """
+    Lazily iterate over DSL nodes without recursion.
+    
+    Yields (node, depth, parent_id, path) tuples, where path holds the index
+    of the top-level node followed by the child index at every level.
+    Stopping the iteration early skips the rest of the tree. Children given
+    as ID strings are resolved through `nodeMap`; like DSLIndex, a node id
+    is visited once, so shared or cyclic references do not loop.
+    
+    Args:
+        dsl_data: DSL response (wrapped or unwrapped)
+        order: 'pre' (parents first), 'post' (children first) or 'bfs' (level by level)
+        roots: Nodes to start from (defaults to get_root_nodes(dsl_data))
+    
+    Example:
+        >>> next(n for n, *_ in iter_nodes(dsl_response) if n.get('type') == 'TEXT')
+        {'id': '1:12', 'type': 'TEXT', ...}
+    """
+    if order not in ('pre', 'post', 'bfs'):
+        raise ValueError(f"Unknown traversal order: {order}")
+    if roots is None:
+        roots = get_root_nodes(dsl_data)
+    node_map = get_node_map(dsl_data)
+    # Only ID string references can form cycles, so nested-only DSLs skip the bookkeeping
+    visited = set() if node_map else None
+    
+    if order == 'bfs':
+        queue = deque((node, 0, None, (i,)) for i, node in enumerate(roots))
+        while queue:
+            node, depth, parent_id, path = queue.popleft()
+            if not node or not isinstance(node, _NODE_TYPES) or _seen(visited, node):
+                continue
+            if cancelled():
+                raise Cancelled()
+            yield node, depth, parent_id, path
+            node_id = node.get('id')
+            for i, child in enumerate(node.get('children', [])):
+                if child.__class__ is str:
+                    child = node_map.get(child)
+                queue.append((child, depth + 1, node_id, path + (i,)))
+        return
+    
+    post = order == 'post'
+    for node, depth, parent_id, path, leaving in _walk(roots, node_map, visited, True, post):
+        if leaving is post:
+            yield node, depth, parent_id, path
+
+
+def _walk(roots: List[Any], node_map: Dict[str, Any], visited: Optional[set],
+          paths: bool, leaves: bool) -> Iterator[Tuple[Dict[str, Any], int, Optional[str], Any, bool]]:
+    """
+    Depth-first walk behind iter_nodes and run_extractors.
+    
+    Yields (node, depth, parent_id, path, leaving): every node once with
+    leaving=False, parents first, and with leaves=True once more with
+    leaving=True after its subtree. path is None unless paths is set.
+    """
+    # Stack entries are the yielded tuples
+    stack = [(node, 0, None, (i,) if paths else None, False) for i, node in reversed(list(enumerate(roots)))]
+    while stack:
+        entry = stack.pop()
+        node = entry[0]
+        if entry[4]:
+            yield entry
+            continue
+        if not node or not isinstance(node, _NODE_TYPES) or _seen(visited, node):
+            continue
+        if cancelled():
+            raise Cancelled()
+        yield entry
+        node, depth, parent_id, path, _ = entry
+        if leaves:
+            stack.append((node, depth, parent_id, path, True))
+        children = node.get('children')
+        if children:
+            node_id = node.get('id')
+            child_depth = depth + 1
+            for i in range(len(children) - 1, -1, -1):
+                child = children[i]
+                if child.__class__ is str:
+                    child = node_map.get(child)
+                stack.append((child, child_depth, node_id, path + (i,) if paths else None, False))
+
+
+def find_node(dsl_data: Dict[str, Any], node_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Find a node by id: through the DSLIndex or `nodeMap` when there is one,
+    otherwise by walking the tree until it is found.
+    """
+    if isinstance(dsl_data, DSLIndex):
+        return dsl_data.node(node_id)
+    node = get_node_map(dsl_data).get(node_id)
+    if node is not None:
+        return node
+    for node, _, _, _ in iter_nodes(dsl_data):
+        if node.get('id') == node_id:
+            return node
+    return None
+
+
+# =============================================================================
+# Index
+# =============================================================================
+
+class DSLIndex:
+    """
+    Flat index over a DSL response, built once in a single traversal.
+    
+    Resolves both DSL shapes (nested child dicts, or child ID strings plus a
+    flat `nodeMap`) and provides constant-time lookups:
+    
+    - nodes:     id -> node
+    - parents:   id -> parent id (None for top-level nodes)
+    - children:  id -> [child id, ...]
+    - by_type:   type -> [id, ...] (both `type` and `layerType` are indexed)
+    - depths:    id -> depth
+    
+    Nodes are also kept in pre-order, so a subtree is a contiguous range and
+    ancestor checks are O(1). Nodes without an `id` get a synthetic `#<n>` key.
+    A sorted name index for exact and prefix lookups is built on first use.
+    
+    The index can be passed wherever a DSL response is expected
+    (run_extractors, extract_*, analyze_dsl): `get`, `in` and `[]` read
+    through to the wrapped response.
+    
+    Example:
+        >>> index = DSLIndex(dsl_response)
+        >>> index.node('1:12')['name']
+        'Title'
+        >>> [index.node(i)['name'] for i in index.ancestors('1:12')]
+        ['Header', 'Page']
+    """
+    
+    def __init__(self, dsl_data: Dict[str, Any]):
+        self.data = dsl_data
+        self.nodes = {}
+        self.parents = {}
+        self.children = {}
+        self.by_type = {}
+        self.depths = {}
+        self.roots = []
+        self.order = []
+        self._pos = {}
+        self._end = {}
+        self._keys = {}
+        self._names = None
+        self._build()
+    
+    def _build(self) -> None:
+        node_map = get_node_map(self.data)
+        stack = [(node, None, 0) for node in reversed(get_root_nodes(self.data))]
+        while stack:
+            node, parent_key, depth = stack.pop()
+            if parent_key is _LEAVE:
+                # node is the key whose subtree just finished
+                self._end[node] = len(self.order)
+                continue
+            if not node or not isinstance(node, _NODE_TYPES) or id(node) in self._keys:
+                continue
+            if cancelled():
+                raise Cancelled()
+            
+            key = node.get('id')
+            if key is None or key in self.nodes:
+                key = f"#{len(self.order)}"
+            self._keys[id(node)] = key
+            self._pos[key] = len(self.order)
+            self.order.append(key)
+            self.nodes[key] = node
+            self.parents[key] = parent_key
+            self.depths[key] = depth
+            self.children[key] = []
+            if parent_key is None:
+                self.roots.append(key)
+            else:
+                self.children[parent_key].append(key)
+            
+            node_type = node.get('type')
+            self.by_type.setdefault(node_type, []).append(key)
+            layer_type = node.get('layerType')
+            if layer_type and layer_type != node_type:
+                self.by_type.setdefault(layer_type, []).append(key)
+            
+            stack.append((key, _LEAVE, depth))
+            children = node.get('children')
+            if children:
+                for i in range(len(children) - 1, -1, -1):
+                    child = children[i]
+                    if child.__class__ is str:
+                        child = node_map.get(child)
+                    stack.append((child, key, depth + 1))
+    
+    # Read-through access to the wrapped response
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+    
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+    
+    def __len__(self) -> int:
+        return len(self.order)
+    
+    # Lookups
+    
+    def key_of(self, node: Union[str, Dict[str, Any]]) -> Optional[str]:
+        """Get the index key of a node dict (or pass through a key)."""
+        if isinstance(node, str):
+            return node if node in self.nodes else None
+        return self._keys.get(id(node))
+    
+    def node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get node by id."""
+        return self.nodes.get(node_id)
+    
+    def parent(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """Get parent node, None for top-level nodes."""
+        parent_id = self.parents.get(node_id)
+        return self.nodes.get(parent_id) if parent_id is not None else None
+    
+    def ids_of_type(self, node_type: str) -> List[str]:
+        """Get ids of all nodes whose `type` or `layerType` matches."""
+        return self.by_type.get(node_type, [])
+    
+    def ids_with_name(self, name: str, prefix: bool = False) -> List[str]:
+        """Get ids of all nodes whose `name` equals (or starts with) name, in pre-order."""
+        if self._names is None:
+            entries = sorted((node['name'], pos) for pos, node in
+                             enumerate(self.nodes[key] for key in self.order)
+                             if node.get('name').__class__ is str)
+            self._names = ([entry[0] for entry in entries], [entry[1] for entry in entries])
+        names, positions = self._names
+        found = []
+        i = bisect_left(names, name)
+        while i < len(names) and (names[i].startswith(name) if prefix else names[i] == name):
+            found.append(positions[i])
+            i += 1
+        if prefix:
+            found.sort()
+        return [self.order[pos] for pos in found]
+    
+    def ancestors(self, node_id: str) -> List[str]:
+        """Get ancestor ids, nearest first."""
+        result = []
+        parent_id = self.parents.get(node_id)
+        while parent_id is not None:
+            result.append(parent_id)
+            parent_id = self.parents[parent_id]
+        return result
+    
+    def is_ancestor(self, ancestor_id: str, node_id: str) -> bool:
+        """Check whether ancestor_id is a strict ancestor of node_id in O(1)."""
+        if ancestor_id not in self._pos or node_id not in self._pos:
+            return False
+        pos = self._pos[node_id]
+        return self._pos[ancestor_id] < pos < self._end[ancestor_id]
+    
+    def subtree(self, node_id: str) -> List[str]:
+        """Get ids of node_id and all its descendants, in pre-order."""
+        if node_id not in self._pos:
+            return []
+        return self.order[self._pos[node_id]:self._end[node_id]]
+    
+    def subtree_size(self, node_id: str) -> int:
+        """Get number of nodes in the subtree rooted at node_id in O(1)."""
+        if node_id not in self._pos:
+            return 0
+        return self._end[node_id] - self._pos[node_id]
+
+
+# =============================================================================
+# Selectors
+# =============================================================================
+#
+# CSS-like node selectors, evaluated against a DSLIndex:
+#
+#   TEXT                      type (matches `type` or `layerType`), * for any
+#   #1:23                     id
+#   [componentInfo]           attribute present (dotted paths: [style.tag])
+#   [name=Title]              attribute equals ("quoted" or 'quoted' values too)
+#   [name^=Header]            ... starts with / [name$=x] ends with / [name*=x] contains
+#   [name~=^Btn\d+$]          ... matches a regular expression
+#   :depth(2)                 depth from the top-level node (also <, <=, >, >=)
+#   A B / A > B               descendant / child combinators
+#   A, B                      either selector
+#
+# The rightmost part is looked up through the id, type or name index when it
+# has such a constraint, otherwise it is searched under the matches of the
+# part before it; ancestors are then checked by walking up parent links.
+
+_SELECTOR_TOKEN = re.compile(r'''
+    \s*(?P<combinator>[>,])\s*
+  | (?P<space>\s+)
+  | (?P<type>\*|[A-Za-z_][\w-]*)
+  | \#(?P<id>(?:[^\s>,\[\]:]|:(?!depth\())+)
+  | \[\s*(?P<attr>[\w.-]+)\s*(?:(?P<op>[\^$*~]?=)\s*(?P<value>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|[^\]]*?))?\s*\]
+  | :depth\(\s*(?P<depth_op><=|>=|<|>|=)?\s*(?P<depth>\d+)\s*\)
+''', re.VERBOSE)
+
+_DEPTH_TESTS = {
+    '=': lambda depth, n: depth == n,
+    '<': lambda depth, n: depth < n,
+    '<=': lambda depth, n: depth <= n,
+    '>': lambda depth, n: depth > n,
+    '>=': lambda depth, n: depth >= n,
+}
+
+_MISSING = object()
+
+
+def _attribute(node: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value = node
+    for key in path:
+        if not isinstance(value, _NODE_TYPES) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _attribute_test(op: Optional[str], expected: Optional[str]):
+    """Predicate on an attribute value for one [attr op value] condition."""
+    if op is None:
+        return lambda value: value is not _MISSING
+    if op == '~=':
+        try:
+            pattern = re.compile(expected)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression in selector: {expected!r} ({e})")
+        return lambda value: value.__class__ is str and pattern.search(value) is not None
+    if op == '^=':
+        return lambda value: value.__class__ is str and value.startswith(expected)
+    if op == '$=':
+        return lambda value: value.__class__ is str and value.endswith(expected)
+    if op == '*=':
+        return lambda value: value.__class__ is str and expected in value
+    # Non-string values compare by their JSON spelling: [visible=false], [opacity=0.5]
+    return lambda value: (value == expected if value.__class__ is str
+                          else value is not _MISSING and json.dumps(value) == expected)
+
+
+class _Compound:
+    """One selector part, e.g. FRAME[name^=Header]:depth(<3)."""
+    
+    __slots__ = ('node_type', 'node_id', 'names', 'tests', 'depth_tests')
+    
+    def __init__(self):
+        self.node_type = None
+        self.node_id = None
+        self.names = []        # (name, is_prefix) usable with DSLIndex.ids_with_name
+        self.tests = []        # (path, predicate)
+        self.depth_tests = []  # (test, n)
+    
+    def matches(self, index: DSLIndex, key: str) -> bool:
+        node = index.nodes[key]
+        if self.node_type is not None and node.get('type') != self.node_type \
+                and node.get('layerType') != self.node_type:
+            return False
+        if self.node_id is not None and node.get('id') != self.node_id:
+            return False
+        for path, test in self.tests:
+            if not test(_attribute(node, path)):
+                return False
+        for test, n in self.depth_tests:
+            if not test(index.depths[key], n):
+                return False
+        return True
+    
+    def lookup(self, index: DSLIndex) -> Optional[List[str]]:
+        """Candidate ids from the indexes (pre-order), or None if nothing is indexed."""
+        if self.node_id is not None:
+            return [self.node_id] if self.node_id in index.nodes else []
+        candidates = None
+        if self.node_type is not None:
+            candidates = index.ids_of_type(self.node_type)
+        for name, prefix in self.names:
+            found = index.ids_with_name(name, prefix)
+            if candidates is None or len(found) < len(candidates):
+                candidates = found
+        return candidates
+
+
+class Selector:
+    """A compiled selector; see compile_selector()."""
+    
+    def __init__(self, text: str, alternatives: List[List[Tuple[Optional[str], _Compound]]]):
+        self.text = text
+        # Each alternative: [(combinator to the previous part, part), ...]
+        self._alternatives = alternatives
+    
+    def __repr__(self) -> str:
+        return f"Selector({self.text!r})"
+    
+    def select(self, index: DSLIndex) -> List[str]:
+        """Ids of the matching nodes in `index`, in pre-order."""
+        found = set()
+        for parts in self._alternatives:
+            found.update(self._select(index, parts))
+        return sorted(found, key=index._pos.__getitem__)
+    
+    def _select(self, index: DSLIndex, parts) -> List[str]:
+        combinator, last = parts[-1]
+        candidates = last.lookup(index)
+        if candidates is None:
+            if len(parts) == 1:
+                candidates = index.order
+            else:
+                scopes = self._select(index, parts[:-1])
+                candidates = self._scoped(index, scopes, combinator)
+                return [key for key in candidates if last.matches(index, key)]
+        return [key for key in candidates
+                if last.matches(index, key) and self._ancestors_match(index, parts, len(parts) - 1, key)]
+    
+    @staticmethod
+    def _scoped(index: DSLIndex, scopes: List[str], combinator: str) -> List[str]:
+        """Children (>) or descendants of the scope nodes, in pre-order, without repeats."""
+        if combinator == '>':
+            return [child for scope in scopes for child in index.children[scope]]
+        result = []
+        covered = -1
+        for scope in sorted(scopes, key=index._pos.__getitem__):
+            start = index._pos[scope] + 1
+            end = index._end[scope]
+            if end <= covered:
+                continue
+            result.extend(index.order[max(start, covered):end])
+            covered = end
+        return result
+    
+    def _ancestors_match(self, index: DSLIndex, parts, i: int, key: str) -> bool:
+        """Whether parts[:i] match the ancestors of key (parts[i] matched key)."""
+        if i == 0:
+            return True
+        combinator = parts[i][0]
+        previous = parts[i - 1][1]
+        parent = index.parents[key]
+        while parent is not None:
+            if previous.matches(index, parent) and self._ancestors_match(index, parts, i - 1, parent):
+                return True
+            if combinator == '>':
+                return False
+            parent = index.parents[parent]
+        return False
+
+
+@lru_cache(maxsize=256)
+def compile_selector(selector: str) -> Selector:
+    """
+    Compile a CSS-like selector (see the Selectors section) once for reuse.
+    
+    Raises:
+        ValueError: Invalid selector
+    
+    Example:
+        >>> compile_selector('FRAME[name^=Header] > TEXT').select(DSLIndex(dsl_response))
+        ['1:12', '1:13']
+    """
+    text = selector.strip()
+    alternatives = []
+    parts = []
+    compound = None
+    combinator = None
+    pos = 0
+    
+    def fail(reason):
+        raise ValueError(f"Invalid selector {selector!r}: {reason} at position {pos}")
+    
+    while pos < len(text):
+        match = _SELECTOR_TOKEN.match(text, pos)
+        if not match:
+            fail('unexpected character')
+        if match.lastgroup in ('combinator', 'space'):
+            if compound is None:
+                fail('missing selector before combinator')
+            parts.append((combinator, compound))
+            compound = None
+            symbol = match.group('combinator')
+            if symbol == ',':
+                alternatives.append(parts)
+                parts, combinator = [], None
+            else:
+                combinator = symbol or ' '
+        else:
+            if compound is None:
+                compound = _Compound()
+            elif match.group('type'):
+                fail('type must come first in a selector part')
+            if match.group('type'):
+                if match.group('type') != '*':
+                    compound.node_type = match.group('type')
+            elif match.group('id'):
+                compound.node_id = match.group('id')
+            elif match.group('attr'):
+                op, value = match.group('op'), match.group('value')
+                if value is not None and value[:1] in ('"', "'"):
+                    value = re.sub(r'\\(.)', r'\1', value[1:-1])
+                path = tuple(match.group('attr').split('.'))
+                if path == ('name',) and op in ('=', '^='):
+                    compound.names.append((value, op == '^='))
+                compound.tests.append((path, _attribute_test(op, value)))
+            else:
+                test = _DEPTH_TESTS[match.group('depth_op') or '=']
+                compound.depth_tests.append((test, int(match.group('depth'))))
+        pos = match.end()
+    
+    if compound is None:
+        fail('empty selector' if not text else 'missing selector after combinator')
+    parts.append((combinator, compound))
+    alternatives.append(parts)
+    return Selector(text, alternatives)
+
+
+def query(dsl_data: Dict[str, Any], selector: Union[str, Selector],
+          limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Get the nodes matching a CSS-like selector, in document order.
+    
+    Args:
+        dsl_data: DSL response (wrapped or unwrapped) or a DSLIndex (reuse one for several queries)
+        selector: Selector string or compiled Selector
+        limit: Return at most this many nodes
+    
+    Example:
+        >>> [n['characters'] for n in query(dsl_response, 'FRAME[name^=Header] TEXT')]
+        ['Home', 'About']
+    """
+    index = dsl_data if isinstance(dsl_data, DSLIndex) else DSLIndex(dsl_data)
+    if isinstance(selector, str):
+        selector = compile_selector(selector)
+    keys = selector.select(index)
+    if limit is not None:
+        keys = keys[:limit]
+    return [index.nodes[key] for key in keys]
+
+
+# =============================================================================
+# Extraction Engine
+# =============================================================================
+#
+# All extractors run in one traversal of the DSL tree. An extractor receives
+# enter(node, depth, parent_id) before a node's children are visited and
+# leave(node, depth) after, then result() returns what it collected.
+
+EXTRACTORS = {}
+
+
+def register_extractor(cls):
+    """Class decorator registering an extractor under its `name`."""
+    EXTRACTORS[cls.name] = cls
+    return cls
+
+
+class Extractor:
+    """Base class for single-pass extractors."""
+    
+    name = ''
+    # result() is a list that enter() only appends to (lets streaming restore document order)
+    per_node = False
+    
+    def enter(self, node: Dict[str, Any], depth: int, parent_id: Optional[str]) -> None:
+        pass
+    
+    def leave(self, node: Dict[str, Any], depth: int) -> None:
+        pass
+    
+    def elide(self, node: Optional[Dict[str, Any]], depth: int, count: int) -> None:
+        """`count` children of node (None: top-level nodes) were pruned, called before leave()."""
+        pass
+    
+    def result(self) -> Any:
+        return None
+
+
+def get_doc_links(node: Dict[str, Any]) -> List[str]:
+    """Get component documentation links of a single node."""
+    comp_info = node.get('componentInfo')
+    if not comp_info:
+        return []
+    try:
+        return [link for link in comp_info.get('componentSetDocumentLink', []) if link]
+    except (TypeError, AttributeError):
+        return []
+
+
+@register_extractor
+class TextExtractor(Extractor):
+    """Text content of TEXT nodes: [{'id', 'name', 'text'}]."""
+    
+    name = 'texts'
+    per_node = True
+    
+    def __init__(self):
+        self.texts = []
+    
+    def enter(self, node, depth, parent_id):
+        if node.get('type') == 'TEXT' and node.get('characters'):
+            self.texts.append({
+                'id': node.get('id'),
+                'name': node.get('name'),
+                'text': node.get('characters'),
+            })
+    
+    def result(self):
+        return self.texts
+
+
+@register_extractor
+class NavigationExtractor(Extractor):
+    """Navigation interactions: [{'sourceId', 'sourceName', 'targetLayerId'}]."""
+    
+    name = 'navigations'
+    per_node = True
+    
+    def __init__(self, require_target: bool = True):
+        self.require_target = require_target
+        self.navigations = []
+    
+    def enter(self, node, depth, parent_id):
+        if 'interactive' not in node:
+            return
+        for interaction in node['interactive']:
+            if interaction.get('type') != 'navigation':
+                continue
+            if self.require_target and not interaction.get('targetLayerId'):
+                continue
+            self.navigations.append({
+                'sourceId': node.get('id'),
+                'sourceName': node.get('name'),
+                'targetLayerId': interaction.get('targetLayerId'),
+            })
+    
+    def result(self):
+        return self.navigations
+
+
+@register_extractor
+class ComponentLinkExtractor(Extractor):
+    """Unique component documentation links, in first-seen order."""
+    
+    name = 'components'
+    
+    def __init__(self):
+        self.links = {}
+    
+    def enter(self, node, depth, parent_id):
+        if 'componentInfo' in node:
+            self.add(get_doc_links(node))
+    
+    def add(self, links: List[str]) -> None:
+        for link in links:
+            self.links[link] = None
+    
+    def result(self):
+        return list(self.links)
+
+
+@register_extractor
+class TokenUsageExtractor(Extractor):
+    """Token references from style.styleTokenAlias: {tokenId: [nodeId, ...]}."""
+    
+    name = 'tokens_used'
+    
+    def __init__(self):
+        self.usage = {}
+    
+    def enter(self, node, depth, parent_id):
+        style = node.get('style')
+        if not style or not style.get('styleTokenAlias'):
+            return
+        for token_id in style['styleTokenAlias'].values():
+            if token_id:
+                self.usage.setdefault(token_id, []).append(node.get('id'))
+    
+    def result(self):
+        return self.usage
+
+
+@register_extractor
+class StatsExtractor(Extractor):
+    """Node counts: total, per type, texts, components, navigations, max depth."""
+    
+    name = 'stats'
+    
+    def __init__(self):
+        self.stats = {
+            'totalNodes': 0,
+            'textNodes': 0,
+            'componentInstances': 0,
+            'navigations': 0,
+            'maxDepth': 0,
+            'types': {},
+        }
+    
+    def enter(self, node, depth, parent_id):
+        stats = self.stats
+        stats['totalNodes'] += 1
+        node_type = node.get('type')
+        types = stats['types']
+        types[node_type] = types.get(node_type, 0) + 1
+        if node_type == 'TEXT' and node.get('characters'):
+            stats['textNodes'] += 1
+        if 'componentInfo' in node and get_doc_links(node):
+            stats['componentInstances'] += 1
+        if 'interactive' in node:
+            for interaction in node['interactive']:
+                if interaction.get('type') == 'navigation' and interaction.get('targetLayerId'):
+                    stats['navigations'] += 1
+        if depth > stats['maxDepth']:
+            stats['maxDepth'] = depth
+    
+    def result(self):
+        return self.stats
+
+
+class TreeBuilder(Extractor):
+    """
+    Extractor storing build(node, depth) of every node, nested like the DSL.
+    
+    Children are attached under 'children'. `count` is the number of nodes
+    built. When the traversal is pruned, items whose children were cut get
+    'elided' (number of direct children left out) and `elided` counts the
+    top-level nodes left out.
+    """
+    
+    name = 'tree'
+    
+    def __init__(self, build: Callable[[Dict[str, Any], int], Dict[str, Any]]):
+        self.build = build
+        self.roots = []
+        self.count = 0
+        self.elided = 0
+        self._stack = []
+    
+    def enter(self, node, depth, parent_id):
+        item = self.build(node, depth)
+        self.count += 1
+        if self._stack:
+            self._stack[-1].setdefault('children', []).append(item)
+        else:
+            self.roots.append(item)
+        self._stack.append(item)
+    
+    def leave(self, node, depth):
+        self._stack.pop()
+    
+    def elide(self, node, depth, count):
+        if node is None:
+            self.elided += count
+        else:
+            self._stack[-1]['elided'] = count
+    
+    def result(self):
+        return self.roots
+
+
+def component_tree_item(node: Dict[str, Any], depth: int) -> Dict[str, Any]:
+    """Component tree entry of a single node (without children)."""
+    style = node.get('style', {})
+    layout = node.get('layout', {})
+    
+    result = {
+        'id': node.get('id'),
+        'type': node.get('type'),
+        'name': node.get('name'),
+        'tag': style.get('tag', 'div'),
+    }
+    
+    # Size
+    width = layout.get('width', {})
+    height = layout.get('height', {})
+    if width and height:
+        result['size'] = f"{width.get('value', '?')}x{height.get('value', '?')}"
+    
+    # Text
+    if node.get('characters'):
+        result['text'] = node.get('characters')
+    
+    # Component doc
+    doc_links = node.get('componentInfo', {}).get('componentSetDocumentLink', [])
+    if doc_links:
+        result['componentDoc'] = doc_links[0]
+    
+    # Navigation
+    for action in node.get('interactive', []):
+        if action.get('type') == 'navigation':
+            result['navigateTo'] = action.get('targetLayerId')
+    
+    return result
+
+
+@register_extractor
+class ComponentTreeExtractor(TreeBuilder):
+    """Simplified component tree, see build_component_tree."""
+    
+    name = 'tree'
+    
+    def __init__(self):
+        super().__init__(component_tree_item)
+
+
+def run_extractors(dsl_data: Dict[str, Any], extractors: List[Any],
+                   roots: Optional[List[Dict[str, Any]]] = None,
+                   max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run several extractors in a single traversal.
+    
+    Args:
+        dsl_data: DSL response (wrapped or unwrapped) or a DSLIndex
+        extractors: Registered extractor names and/or Extractor instances
+        roots: Nodes to start from (defaults to get_root_nodes(dsl_data)).
+               With a DSLIndex, node ids are accepted too.
+        max_depth: Do not visit children of nodes at this depth (roots are depth 0)
+        max_nodes: Stop visiting nodes after this many, in pre-order.
+                   Pruned children are reported through Extractor.elide().
+    
+    Returns:
+        Dict of extractor name -> result
+    
+    Example:
+        >>> run_extractors(dsl_response, ['texts', 'navigations', 'stats'])
+        {'texts': [...], 'navigations': [...], 'stats': {...}}
+    """
+    instances = []
+    for extractor in extractors:
+        if isinstance(extractor, str):
+            if extractor not in EXTRACTORS:
+                raise ValueError(f"Unknown extractor: {extractor}")
+            extractor = EXTRACTORS[extractor]()
+        instances.append(extractor)
+    
+    # Only dispatch leave() to extractors that need it
+    enters = [ex.enter for ex in instances]
+    leaves = [ex.leave for ex in instances if type(ex).leave is not Extractor.leave]
+    
+    if max_depth is not None or max_nodes is not None:
+        if isinstance(dsl_data, DSLIndex):
+            lookup = dsl_data.node
+            roots = [lookup(r) if isinstance(r, str) else r
+                     for r in (roots if roots is not None else dsl_data.roots)]
+            node_map = get_node_map(dsl_data.data)
+        else:
+            node_map = get_node_map(dsl_data)
+            lookup = node_map.get
+            if roots is None:
+                roots = get_root_nodes(dsl_data)
+        elides = [ex.elide for ex in instances if type(ex).elide is not Extractor.elide]
+        visited = set() if node_map else None  # see iter_nodes
+        _run_pruned(lookup, roots, enters, leaves, elides, max_depth, max_nodes, visited)
+        return {ex.name: ex.result() for ex in instances}
+    
+    if isinstance(dsl_data, DSLIndex):
+        _run_indexed(dsl_data, enters, leaves, roots)
+        return {ex.name: ex.result() for ex in instances}
+    
+    if roots is None:
+        roots = get_root_nodes(dsl_data)
+    node_map = get_node_map(dsl_data)
+    visited = set() if node_map else None  # see iter_nodes
+    
+    for node, depth, parent_id, _, leaving in _walk(roots, node_map, visited, False, bool(leaves)):
+        if leaving:
+            for leave in leaves:
+                leave(node, depth)
+        else:
+            for enter in enters:
+                enter(node, depth, parent_id)
+    
+    return {ex.name: ex.result() for ex in instances}
+
+
+def _run_pruned(lookup: Callable[[str], Any], roots: List[Any], enters: List, leaves: List,
+                elides: List, max_depth: Optional[int], max_nodes: Optional[int],
+                visited: Optional[set] = None) -> None:
+    """
+    Dispatch extractor callbacks over the part of the tree within the limits.
+    
+    Work is proportional to the nodes visited (and their direct children),
+    not to the size of the tree: pruned subtrees are never entered. Node ids
+    in `visited` are skipped, and visited ones recorded (see iter_nodes).
+    """
+    budget = max_nodes if max_nodes is not None else -1
+    # Pruned direct children of each open node; the innermost open node is last
+    open_counts = []
+    top_elided = 0
+    
+    stack = [(node, 0, None) for node in reversed(roots)]
+    while stack:
+        node, depth, parent_id = stack.pop()
+        if parent_id is _LEAVE:
+            elided = open_counts.pop()
+            if elided:
+                for elide in elides:
+                    elide(node, depth, elided)
+            for leave in leaves:
+                leave(node, depth)
+            continue
+        if not node or _seen(visited, node):
+            continue
+        if cancelled():
+            raise Cancelled()
+        if budget == 0:
+            # Out of budget: whatever is left on the stack is a pruned child
+            if open_counts:
+                open_counts[-1] += 1
+            else:
+                top_elided += 1
+            continue
+        budget -= 1
+        for enter in enters:
+            enter(node, depth, parent_id)
+        stack.append((node, depth, _LEAVE))
+        children = node.get('children')
+        if not children:
+            open_counts.append(0)
+        elif budget == 0 or (max_depth is not None and depth >= max_depth):
+            open_counts.append(len(children))
+        else:
+            open_counts.append(0)
+            node_id = node.get('id')
+            child_depth = depth + 1
+            for i in range(len(children) - 1, -1, -1):
+                child = children[i]
+                if child.__class__ is str:
+                    child = lookup(child)
+                stack.append((child, child_depth, node_id))
+    
+    if top_elided:
+        for elide in elides:
+            elide(None, 0, top_elided)
+
+
+def _run_indexed(index: DSLIndex, enters: List, leaves: List,
+                 roots: Optional[List[Any]] = None) -> None:
+    """Dispatch extractor callbacks from a DSLIndex pre-order, without re-walking the tree."""
+    if roots is None:
+        root_keys = index.roots
+    else:
+        root_keys = [key for key in (index.key_of(root) for root in roots) if key is not None]
+    
+    order, nodes, parents, depths, ends = index.order, index.nodes, index.parents, index.depths, index._end
+    for root_key in root_keys:
+        base_depth = depths[root_key]
+        start = index._pos[root_key]
+        open_keys = []
+        for pos in range(start, ends[root_key]):
+            key = order[pos]
+            # Close subtrees that ended before this node
+            while open_keys and ends[open_keys[-1]] <= pos:
+                closed = open_keys.pop()
+                for leave in leaves:
+                    leave(nodes[closed], depths[closed] - base_depth)
+            if cancelled():
+                raise Cancelled()
+            node = nodes[key]
+            parent_key = parents[key]
+            parent_id = None if pos == start or parent_key is None else nodes[parent_key].get('id')
+            depth = depths[key] - base_depth
+            for enter in enters:
+                enter(node, depth, parent_id)
+            if leaves:
+                open_keys.append(key)
+        while open_keys:
+            closed = open_keys.pop()
+            for leave in leaves:
+                leave(nodes[closed], depths[closed] - base_depth)
+
+
+# =============================================================================
+# DSL Extraction
+# =============================================================================
+
 def extract_component_links(dsl_data: Dict[str, Any]) -> List[str]:
     """
     Extract component documentation links from DSL.
@@ -78,28 +1143,7 @@ def extract_component_links(dsl_data: Dict[str, Any]) -> List[str]:
     if 'componentDocumentLinks' in dsl_data:
         return dsl_data['componentDocumentLinks']
     
-    links = set()
-    root = get_dsl_root(dsl_data)
-    
-    def traverse(node: Optional[Dict]) -> None:
-        if not node:
-            return
-        try:
-            doc_links = node.get('componentInfo', {}).get('componentSetDocumentLink', [])
-            for link in doc_links:
-                if link:
-                    links.add(link)
-        except (TypeError, IndexError):
-            pass
-        for child in node.get('children', []):
-            traverse(child)
-    
-    for node in root.get('nodes', []):
-        traverse(node)
-    if root.get('root'):
-        traverse(root['root'])
-    
-    return list(links)
+    return run_extractors(dsl_data, ['components'])['components']
 
 
 def extract_navigations(dsl_data: Dict[str, Any]) -> List[Dict[str, str]]:
@@ -110,28 +1154,7 @@ def extract_navigations(dsl_data: Dict[str, Any]) -> List[Dict[str, str]]:
         >>> extract_navigations(dsl_response)
         [{'sourceId': '1:12', 'sourceName': 'Button', 'targetLayerId': '0:3'}]
     """
-    navigations = []
-    root = get_dsl_root(dsl_data)
-    
-    def traverse(node: Optional[Dict]) -> None:
-        if not node:
-            return
-        for interaction in node.get('interactive', []):
-            if interaction.get('type') == 'navigation' and interaction.get('targetLayerId'):
-                navigations.append({
-                    'sourceId': node.get('id'),
-                    'sourceName': node.get('name'),
-                    'targetLayerId': interaction['targetLayerId']
-                })
-        for child in node.get('children', []):
-            traverse(child)
-    
-    for node in root.get('nodes', []):
-        traverse(node)
-    if root.get('root'):
-        traverse(root['root'])
-    
-    return navigations
+    return run_extractors(dsl_data, ['navigations'])['navigations']
 
 
 def extract_texts(dsl_data: Dict[str, Any]) -> List[Dict[str, str]]:
@@ -142,27 +1165,7 @@ def extract_texts(dsl_data: Dict[str, Any]) -> List[Dict[str, str]]:
         >>> extract_texts(dsl_response)
         [{'id': '1:12', 'name': 'Title', 'text': 'Hello World'}]
     """
-    texts = []
-    root = get_dsl_root(dsl_data)
-    
-    def traverse(node: Optional[Dict]) -> None:
-        if not node:
-            return
-        if node.get('type') == 'TEXT' and node.get('characters'):
-            texts.append({
-                'id': node.get('id'),
-                'name': node.get('name'),
-                'text': node.get('characters'),
-            })
-        for child in node.get('children', []):
-            traverse(child)
-    
-    for node in root.get('nodes', []):
-        traverse(node)
-    if root.get('root'):
-        traverse(root['root'])
-    
-    return texts
+    return run_extractors(dsl_data, ['texts'])['texts']
 
 
 def extract_tokens(dsl_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
@@ -196,70 +1199,20 @@ def build_component_tree(dsl_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         >>> build_component_tree(dsl_response)
         [{'type': 'FRAME', 'name': 'Page', 'tag': 'div', 'children': [...]}]
     """
-    root = get_dsl_root(dsl_data)
-    
-    def build_node(node: Optional[Dict]) -> Optional[Dict]:
-        if not node:
-            return None
-        
-        style = node.get('style', {})
-        layout = node.get('layout', {})
-        
-        result = {
-            'id': node.get('id'),
-            'type': node.get('type'),
-            'name': node.get('name'),
-            'tag': style.get('tag', 'div'),
-        }
-        
-        # Size
-        width = layout.get('width', {})
-        height = layout.get('height', {})
-        if width and height:
-            result['size'] = f"{width.get('value', '?')}x{height.get('value', '?')}"
-        
-        # Text
-        if node.get('characters'):
-            result['text'] = node.get('characters')
-        
-        # Component doc
-        comp_info = node.get('componentInfo', {})
-        doc_links = comp_info.get('componentSetDocumentLink', [])
-        if doc_links:
-            result['componentDoc'] = doc_links[0]
-        
-        # Navigation
-        for action in node.get('interactive', []):
-            if action.get('type') == 'navigation':
-                result['navigateTo'] = action.get('targetLayerId')
-        
-        # Children
-        children = node.get('children', [])
-        if children:
-            result['children'] = [build_node(c) for c in children if c]
-        
-        return result
-    
-    trees = []
-    for node in root.get('nodes', []):
-        tree = build_node(node)
-        if tree:
-            trees.append(tree)
-    
-    if root.get('root'):
-        tree = build_node(root['root'])
-        if tree:
-            trees.append(tree)
-    
-    return trees
+    return run_extractors(dsl_data, ['tree'])['tree']
 
 
-def get_node_styles(node: Dict[str, Any]) -> Dict[str, Any]:
+def get_node_styles(node: Union[str, Dict[str, Any]], index: Optional[DSLIndex] = None) -> Dict[str, Any]:
     """
     Get merged style properties from a node.
     
-    Returns combined UI styles and layout styles.
+    Returns combined UI styles and layout styles. With an index, the node
+    can be given by id.
     """
+    if isinstance(node, str):
+        if index is None:
+            raise ValueError("Looking up a node by id requires a DSLIndex")
+        node = index.node(node) or {}
     style = node.get('style', {})
     return {
         **style.get('value', {}),
@@ -274,19 +1227,59 @@ def get_node_styles(node: Dict[str, Any]) -> Dict[str, Any]:
 def main():
     """CLI for testing utilities."""
     import argparse
+    from mastergo_cache import memoize
+    from mastergo_profile import add_profile_arguments, setup_profiling
     
     parser = argparse.ArgumentParser(description='MasterGo DSL utilities')
-    parser.add_argument('command', choices=['texts', 'navigations', 'components', 'tokens', 'tree'],
-                        help='Extraction command')
+    parser.add_argument('command', choices=['texts', 'navigations', 'components', 'tokens', 'tree',
+                                            'tokens_used', 'stats', 'all', 'query'],
+                        help='Extraction command (all: every extractor in one pass, '
+                             'query: nodes matching a selector)')
+    parser.add_argument('selector', nargs='?', help="query: CSS-like selector, e.g. 'FRAME[name^=Header] > TEXT'")
+    parser.add_argument('--limit', type=int, help='query: return at most this many nodes')
+    parser.add_argument('--full', action='store_true',
+                        help='query: print whole nodes (with children) instead of summaries')
     parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print output')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse stdin incrementally in bounded memory (texts, navigations, '
+                             'components, tokens_used, stats)')
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help='Read the DSL from a snapshot file (mastergo_snapshot) instead of stdin')
+    add_profile_arguments(parser)
     
     args = parser.parse_args()
+    setup_profiling(args)
+    
+    if (args.command == 'query') != (args.selector is not None):
+        parser.error('a selector is required by, and only accepted with, the query command')
+    if args.stream and args.snapshot:
+        parser.error('--stream and --snapshot cannot be combined')
+    if args.stream:
+        if args.command not in ('texts', 'navigations', 'components', 'tokens_used', 'stats'):
+            parser.error(f"--stream does not support '{args.command}'")
+        from mastergo_stream import stream_extract
+        try:
+            result = stream_extract(sys.stdin.buffer, [args.command])[args.command]
+        except json.JSONDecodeError as e:
+            print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
+            sys.exit(1)
+        indent = 2 if args.pretty else None
+        print(json.dumps(result, ensure_ascii=False, indent=indent))
+        return
     
     try:
-        dsl_data = json.load(sys.stdin)
+        if args.snapshot:
+            from mastergo_snapshot import Snapshot
+            dsl_data = Snapshot(args.snapshot).document
+        else:
+            data = sys.stdin.buffer.read()
+            dsl_data = memoize('json', data, json.loads)
     except json.JSONDecodeError as e:
         print(f"Error: Invalid JSON input - {e}", file=sys.stderr)
         sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     
     if args.command == 'texts':
         result = extract_texts(dsl_data)
@@ -298,9 +1291,40 @@ def main():
         result = extract_tokens(dsl_data)
     elif args.command == 'tree':
         result = build_component_tree(dsl_data)
+    elif args.command == 'query':
+        try:
+            if args.snapshot:
+                index = DSLIndex(dsl_data)
+            else:
+                index = memoize('index', data, lambda _: DSLIndex(dsl_data))
+            keys = compile_selector(args.selector).select(index)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if args.limit is not None:
+            keys = keys[:args.limit]
+        if args.full:
+            result = [index.nodes[key] for key in keys]
+        else:
+            result = [{
+                'id': index.nodes[key].get('id'),
+                'name': index.nodes[key].get('name'),
+                'type': index.nodes[key].get('type'),
+                'depth': index.depths[key],
+                'parentId': index.parents[key],
+            } for key in keys]
+    elif args.command == 'all':
+        result = run_extractors(dsl_data, list(EXTRACTORS))
+        if 'componentDocumentLinks' in dsl_data:
+            result['components'] = dsl_data['componentDocumentLinks']
+        result['tokens'] = extract_tokens(dsl_data)
+    else:
+        result = run_extractors(dsl_data, [args.command])[args.command]
     
     indent = 2 if args.pretty else None
-    print(json.dumps(result, ensure_ascii=False, indent=indent))
+    # Snapshot nodes are mappings rather than dicts
+    print(json.dumps(result, ensure_ascii=False, indent=indent,
+                     default=lambda value: dict(value) if isinstance(value, Mapping) else value))
 
 
 if __name__ == '__main__':